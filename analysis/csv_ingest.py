@@ -0,0 +1,247 @@
+# analysis/csv_ingest.py
+"""
+CSVLogger のログを Arrow のマルチスレッド CSV リーダーで読む
+
+列の型はヘッダーの列名から決める（型推論をしない）:
+    timestamp -> int64（ns、新形式）/ float64（秒、旧形式。先頭行で判定）
+    axisN / rate_hz -> float64
+    buttonN / dpad_* -> int8
+型が合わないファイル（手で編集したものなど）は pandas にフォールバックする。
+
+一括変換:
+    python -m analysis.csv_ingest logs --workers 4
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as pads
+import pyarrow.parquet as pq
+
+from loggers.companions import is_session_file
+from loggers.metadata import METADATA_KEY, read_metadata
+from loggers.parquet_logger import ParquetLogger, parquet_writer_options
+
+BLOCK_SIZE = 1 << 24
+
+
+def _peek(path: str):
+    """ヘッダー行と先頭のデータ行"""
+    with open(path, "r", encoding="utf-8") as f:
+        header = f.readline().strip()
+        first = f.readline().strip()
+    return header.split(",") if header else [], first.split(",") if first else []
+
+
+def column_type(name: str, sample=None):
+    if name == "timestamp":
+        if sample is not None and any(ch in sample for ch in ".eE"):
+            return pa.float64()
+        return pa.int64()
+    if name.startswith("axis") or name == "rate_hz":
+        return pa.float64()
+    if name.startswith("button") or name.startswith("dpad_"):
+        return pa.int8()
+    return None
+
+
+def csv_schema(names, first_row=None) -> dict:
+    """列名（と先頭行）から ConvertOptions 用の列の型を作る（既知の列のみ）"""
+    types = {}
+    for i, name in enumerate(names):
+        sample = first_row[i] if first_row and i < len(first_row) else None
+        t = column_type(name, sample)
+        if t is not None:
+            types[name] = t
+    return types
+
+
+def _options(path, columns=None, block_size=BLOCK_SIZE):
+    names, first = _peek(path)
+    convert = pacsv.ConvertOptions(
+        column_types=csv_schema(names, first),
+        include_columns=[c for c in columns if c in names] if columns is not None else None,
+    )
+    read = pacsv.ReadOptions(use_threads=True, block_size=block_size)
+    return read, convert, names
+
+
+def _block_size_for(path, rows):
+    """先頭行の長さから rows 行ぶんのブロックの大きさを見積もる"""
+    _, first = _peek(path)
+    row_bytes = len(",".join(first)) + 1
+    return min(BLOCK_SIZE, max(1 << 16, row_bytes * rows))
+
+
+def csv_file_format(path: str):
+    """pyarrow.dataset 用の CSV 形式（列の型は csv_schema）"""
+    names, first = _peek(path)
+    return pads.CsvFileFormat(convert_options=pacsv.ConvertOptions(column_types=csv_schema(names, first)))
+
+
+def csv_columns(path: str):
+    """CSV のヘッダーの列名"""
+    return _peek(path)[0]
+
+
+def read_csv_table(path: str, columns=None) -> pa.Table:
+    """CSV 全体を Arrow テーブルで読む（複数スレッドで並列に解析）"""
+    read, convert, _ = _options(path, columns)
+    return pacsv.read_csv(path, read_options=read, convert_options=convert)
+
+
+def read_csv_fast(path: str, columns=None, nrows=None) -> pd.DataFrame:
+    """
+    CSV を DataFrame で読む（pd.read_csv の置き換え）
+    - nrows を指定すると先頭のブロックだけを読む（プレビュー用）
+    """
+    try:
+        if nrows is None:
+            return read_csv_table(path, columns).to_pandas()
+        # プレビューは先頭の数行だけなので、大きなブロックを丸ごと解析しない
+        read, convert, _ = _options(path, columns, _block_size_for(path, nrows))
+        batches, n = [], 0
+        with pacsv.open_csv(path, read_options=read, convert_options=convert) as reader:
+            for batch in reader:
+                batches.append(batch)
+                n += batch.num_rows
+                if n >= nrows:
+                    break
+        if not batches:
+            return pd.read_csv(path, nrows=0, usecols=columns)
+        return pa.Table.from_batches(batches).slice(0, nrows).to_pandas()
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return pd.read_csv(path, usecols=columns, nrows=nrows)
+
+
+def iter_csv_frames(path: str, columns=None, chunk_rows=65536):
+    """
+    CSV を DataFrame のチャンクで順に返す（列の型は csv_schema、全体をメモリに載せない）
+    チャンクの行数はブロック単位のためおおよそ chunk_rows。
+    型が合わないファイルは、まだ何も返していなければ pandas の分割読み込みに切り替える。
+    """
+    read, convert, _ = _options(path, columns, _block_size_for(path, chunk_rows))
+    started = False
+    try:
+        with pacsv.open_csv(path, read_options=read, convert_options=convert) as reader:
+            for batch in reader:
+                started = True
+                yield batch.to_pandas()
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        if started:
+            raise
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows)
+
+
+def read_csv_range(path: str, start: int, end, column_names, columns=None) -> pd.DataFrame:
+    """
+    バイト範囲 [start, end) の行だけを読む（ヘッダーなし、SessionReader のチャンク読み出し用）
+    end が None ならファイル末尾まで
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read() if end is None else f.read(end - start)
+    _, first = _peek(path)
+    convert = pacsv.ConvertOptions(
+        column_types=csv_schema(column_names, first),
+        include_columns=columns,
+    )
+    read = pacsv.ReadOptions(use_threads=True, column_names=list(column_names))
+    try:
+        return pacsv.read_csv(pa.BufferReader(data), read_options=read, convert_options=convert).to_pandas()
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        import io
+        return pd.read_csv(io.BytesIO(data), header=None, names=list(column_names), usecols=columns)
+
+
+def convert_to_parquet(csv_path: str, parquet_path=None, row_group_size=ParquetLogger.row_group_size,
+                       overwrite=False) -> str:
+    """
+    CSV ログを Parquet に変換する（ストリーミング、メモリは row group 数個分）
+    サイドカーのメタデータ（時計アンカーなど）はスキーマのメタデータに移す。
+    """
+    parquet_path = parquet_path or os.path.splitext(csv_path)[0] + ".parquet"
+    if os.path.exists(parquet_path) and not overwrite:
+        return parquet_path
+    read, convert, _ = _options(csv_path)
+    meta = read_metadata(csv_path)
+    tmp = parquet_path + ".part"
+    writer = None
+    pending, pending_rows = [], 0
+    try:
+        with pacsv.open_csv(csv_path, read_options=read, convert_options=convert) as reader:
+            schema = reader.schema
+            if meta:
+                schema = schema.with_metadata({METADATA_KEY: json.dumps(meta, ensure_ascii=False).encode("utf-8")})
+            writer = pq.ParquetWriter(tmp, schema, **parquet_writer_options(schema))
+            for batch in reader:
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                # row group の大きさを記録時と揃える（再生時のシーク単位）
+                while pending_rows >= row_group_size:
+                    table = pa.Table.from_batches(pending, schema=reader.schema)
+                    writer.write_table(table.slice(0, row_group_size), row_group_size=row_group_size)
+                    rest = table.slice(row_group_size)
+                    pending, pending_rows = rest.to_batches(), rest.num_rows
+            if pending_rows:
+                table = pa.Table.from_batches(pending, schema=reader.schema)
+                writer.write_table(table, row_group_size=row_group_size)
+        writer.close()
+        writer = None
+        os.replace(tmp, parquet_path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return parquet_path
+
+
+def _convert_task(args):
+    path, overwrite = args
+    try:
+        return path, convert_to_parquet(path, overwrite=overwrite), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def convert_dir(save_dir: str, workers=None, overwrite=False, progress=None):
+    """save_dir の CSV ログを一括で Parquet に変換し、(csv, parquet, エラー) の一覧を返す"""
+    try:
+        names = sorted(e.name for e in os.scandir(save_dir) if e.is_file() and is_session_file(e.name))
+    except FileNotFoundError:
+        names = []
+    paths = [os.path.join(save_dir, n) for n in names if n.lower().endswith(".csv")]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for res in pool.map(_convert_task, [(p, overwrite) for p in paths]):
+            results.append(res)
+            if progress:
+                progress(len(results), len(paths))
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="CSV ログを Parquet に一括変換")
+    ap.add_argument("save_dir", nargs="?", default="logs")
+    ap.add_argument("--workers", type=int)
+    ap.add_argument("--overwrite", action="store_true", help="既存の Parquet を上書きする")
+    args = ap.parse_args(argv)
+    results = convert_dir(
+        args.save_dir, workers=args.workers, overwrite=args.overwrite,
+        progress=lambda done, total: print(f"\r{done}/{total}", end="", flush=True),
+    )
+    print()
+    failed = [r for r in results if r[2]]
+    print(f"変換 {len(results) - len(failed)} 件 / 失敗 {len(failed)} 件")
+    for csv_path, _, err in failed:
+        print(f"  {os.path.basename(csv_path)}: {err}")
+
+
+if __name__ == "__main__":
+    main()
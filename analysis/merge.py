@@ -0,0 +1,254 @@
+# analysis/merge.py
+"""
+複数セッションの時刻合わせ結合（as-of join）
+
+別々に記録したセッション（2人の操作者、2台のパッドなど）を、基準セッションの
+timestamp を共通の時間軸として横に並べた1つの表にする。
+- 基準の各行に、他のセッションの「直前（direction="backward"）」または
+  「最も近い（direction="nearest"）」サンプルを対応付ける。tolerance 秒より離れていれば欠損
+- 時刻は UNIX 秒に揃えてから比較する（to_epoch_seconds）。記録機器の時計のずれは offsets で補正する
+- 時計アンカーのない ns 形式のセッションは先頭行からの相対秒になるため、UNIX 秒のセッションと
+  混ぜるときは offsets の指定が必要（指定がなければエラー）
+- 入力は行グループ/チャンク単位で読み（CSV は csv_ingest の列の型で）、各セッションは基準チャンクの
+  範囲を覆う分だけ保持する（対応付けは searchsorted による一括処理）
+- 出力は Parquet（列名は "<接頭辞>_<列名>"、欠損は null）
+
+    python -m analysis.merge a.parquet b.parquet -o merged.parquet --tolerance 0.02 --names p1 p2
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from loggers.clock import to_epoch_seconds
+from loggers.metadata import METADATA_KEY, read_metadata
+from loggers.parquet_logger import ParquetLogger, parquet_writer_options
+from .ml_export import CHUNK_ROWS, iter_chunks, session_columns
+
+
+class _Source:
+    """1セッション分のチャンク読み出しと、未対応付けの行のバッファ"""
+    def __init__(self, path, prefix, offset=0.0, chunk_rows=CHUNK_ROWS):
+        self.path = path
+        self.prefix = prefix
+        self.offset = float(offset)
+        self.columns = [c for c in session_columns(path) if c != "timestamp"]
+        self._chunks = iter_chunks(path, self.columns, chunk_rows)
+        self._meta = read_metadata(path)
+        self.time_base = time_base(path, self._meta)
+        # アンカーのない ns 形式はチャンクをまたいで同じ基準（先頭行）から数える
+        self._t0 = None
+        self.t = np.zeros(0)
+        # 列の型は最初のチャンクで決まる（ボタンを float にしない）
+        self.values = None
+        self.exhausted = False
+
+    def _epoch(self, ts):
+        if ts.dtype.kind in "iu" and not (self._meta.get("clock_info") or {}).get("anchor"):
+            if self._t0 is None:
+                self._t0 = int(ts[0])
+            return (ts - self._t0) / 1e9 + self.offset
+        return to_epoch_seconds(ts, self._meta) + self.offset
+
+    def pull(self) -> bool:
+        """次のチャンクをバッファに追加する（読み切ったら False）"""
+        for chunk in self._chunks:
+            if chunk.empty:
+                continue
+            self.t = np.concatenate([self.t, self._epoch(chunk["timestamp"].to_numpy())])
+            if self.values is None:
+                self.values = {c: chunk[c].to_numpy() for c in self.columns}
+            else:
+                for c in self.columns:
+                    self.values[c] = np.concatenate([self.values[c], chunk[c].to_numpy()])
+            return True
+        self.exhausted = True
+        return False
+
+    def fill_until(self, t_start: float, t_end: float):
+        """
+        バッファの最終行が t_end より後になるまで読む（nearest で次の行も要るため）
+        読むたびに t_start の直前の行より前を捨てる。基準より大幅に早く始まったセッションでも
+        バッファは基準チャンクの範囲と1チャンク分に収まる。
+        """
+        while not self.exhausted and (not len(self.t) or self.t[-1] <= t_end):
+            self.drop_before(self.first_needed(t_start))
+            self.pull()
+
+    def first_needed(self, t_start: float) -> int:
+        """t_start 以降の基準時刻に対応付けうる最初の行（t_start の直前の行）"""
+        return max(0, int(np.searchsorted(self.t, t_start, side="right")) - 1)
+
+    def drop_before(self, i: int):
+        if i > 0:
+            self.t = self.t[i:]
+            for c in self.columns:
+                self.values[c] = self.values[c][i:]
+
+
+def time_base(path: str, meta=None) -> str:
+    """
+    セッションの時間軸: "epoch"（UNIX 秒に換算できる）/ "relative"（アンカーのない ns 形式、先頭行からの相対秒）
+    旧形式（float 秒）は UNIX 秒として扱う
+    """
+    meta = read_metadata(path) if meta is None else meta
+    if (meta.get("clock_info") or {}).get("anchor"):
+        return "epoch"
+    if path.lower().endswith(".parquet"):
+        t = pq.read_schema(path).field("timestamp").type
+        return "epoch" if pa.types.is_floating(t) else "relative"
+    with open(path, "r", encoding="utf-8") as f:
+        header = f.readline().strip().split(",")
+        first = f.readline().strip().split(",")
+    i = header.index("timestamp") if "timestamp" in header else -1
+    sample = first[i] if 0 <= i < len(first) else ""
+    return "epoch" if any(ch in sample for ch in ".eE") else "relative"
+
+
+def asof_indices(base_t, t, tolerance, direction="backward"):
+    """
+    base_t の各時刻に対応する t の行番号と、tolerance 以内で対応が取れたかのマスク
+    base_t と t はどちらも昇順であること
+    """
+    n = len(t)
+    idx = np.searchsorted(t, base_t, side="right") - 1
+    if direction == "nearest" and n:
+        nxt = np.minimum(idx + 1, n - 1)
+        prev = np.maximum(idx, 0)
+        use_next = (idx < 0) | (np.abs(t[nxt] - base_t) < np.abs(base_t - t[prev]))
+        idx = np.where(use_next, nxt, prev)
+    valid = idx >= 0
+    if n:
+        safe = np.clip(idx, 0, n - 1)
+        valid &= np.abs(base_t - t[safe]) <= tolerance
+    else:
+        safe = np.zeros(len(base_t), dtype=np.int64)
+    return safe, valid
+
+
+def _column(values, mask=None):
+    if values.dtype == object:
+        return pa.array(values, mask=mask, from_pandas=True)
+    return pa.array(values, mask=mask)
+
+
+def merge_sessions(paths, out_path, tolerance=0.01, direction="backward", names=None, offsets=None,
+                   chunk_rows=CHUNK_ROWS, progress=None) -> dict:
+    """
+    paths[0] を基準に、残りのセッションを as-of join した横長の表を out_path に書き出す
+    :param tolerance: 対応付けを許す時刻差（秒）
+    :param names: 列名の接頭辞（省略時は s0, s1, ...）
+    :param offsets: セッションごとに時刻へ足す秒（記録機器の時計のずれの補正）
+    :param progress: progress(書き出した行数) を呼ぶ
+    戻り値: 行数とセッションごとの一致率
+    """
+    if len(paths) < 2:
+        raise ValueError("2つ以上のセッションを指定してください")
+    if direction not in ("backward", "nearest"):
+        raise ValueError(f"未対応の direction です: {direction}")
+    names = list(names) if names else [f"s{i}" for i in range(len(paths))]
+    if len(names) != len(paths) or len(set(names)) != len(names):
+        raise ValueError("names はセッションと同じ数の重複しない名前にしてください")
+    explicit_offsets = bool(offsets)
+    offsets = list(offsets) if offsets else [0.0] * len(paths)
+    if len(offsets) != len(paths):
+        raise ValueError("offsets はセッションと同じ数にしてください")
+    sources = [_Source(p, n, o, chunk_rows) for p, n, o in zip(paths, names, offsets)]
+    base, others = sources[0], sources[1:]
+    # UNIX 秒と相対秒は比べられない（そのままでは一致率 0% になる）
+    bases = {src.time_base for src in sources}
+    if len(bases) > 1 and not explicit_offsets:
+        relative = [os.path.basename(src.path) for src in sources if src.time_base == "relative"]
+        raise ValueError(
+            "時計アンカーのないセッション（先頭行からの相対秒）と UNIX 秒のセッションは"
+            f"そのまま合わせられません: {', '.join(relative)}。offsets で時刻を補正してください"
+        )
+
+    meta = {"merge": {
+        "sources": [os.path.basename(p) for p in paths],
+        "names": names,
+        "offsets": offsets,
+        "tolerance": tolerance,
+        "direction": direction,
+        "time_bases": [src.time_base for src in sources],
+    }}
+    tmp = out_path + ".part"
+    writer = None
+    rows = 0
+    matched = [0] * len(others)
+    try:
+        while base.pull():
+            bt = base.t
+            for src in others:
+                src.fill_until(bt[0] - tolerance, bt[-1] + tolerance)
+            cols = {"timestamp": pa.array(bt)}
+            for c in base.columns:
+                cols[f"{base.prefix}_{c}"] = _column(base.values[c])
+            for k, src in enumerate(others):
+                if src.values is None:
+                    # 空のセッションは全行欠損
+                    for c in src.columns:
+                        cols[f"{src.prefix}_{c}"] = pa.nulls(len(bt), pa.float64())
+                    continue
+                idx, valid = asof_indices(bt, src.t, tolerance, direction)
+                matched[k] += int(valid.sum())
+                for c in src.columns:
+                    cols[f"{src.prefix}_{c}"] = _column(src.values[c][idx], ~valid)
+                # 以降の基準時刻は今の最終時刻以上なので、その直前の行より前は二度と使わない
+                src.drop_before(src.first_needed(bt[-1]))
+            table = pa.table(cols)
+            if writer is None:
+                schema = table.schema.with_metadata(
+                    {METADATA_KEY: json.dumps(meta, ensure_ascii=False).encode("utf-8")}
+                )
+                writer = pq.ParquetWriter(tmp, schema, **parquet_writer_options(schema))
+            else:
+                table = table.cast(writer.schema)
+            writer.write_table(table, row_group_size=ParquetLogger.row_group_size)
+            rows += table.num_rows
+            base.drop_before(len(bt))
+            if progress:
+                progress(rows)
+        if writer is None:
+            raise ValueError(f"基準セッションが空です: {paths[0]}")
+        writer.close()
+        writer = None
+        os.replace(tmp, out_path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return {
+        "rows": rows,
+        "match_rate": {src.prefix: (m / rows if rows else 0.0) for src, m in zip(others, matched)},
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="複数セッションを時刻で合わせて1つの表にする")
+    ap.add_argument("sessions", nargs="+", help="先頭が基準（時間軸）になるセッション")
+    ap.add_argument("-o", "--output", required=True, help="出力先（.parquet）")
+    ap.add_argument("--tolerance", type=float, default=0.01, help="対応付けを許す時刻差（秒）")
+    ap.add_argument("--direction", choices=["backward", "nearest"], default="backward")
+    ap.add_argument("--names", nargs="+", help="列名の接頭辞（セッションと同じ数）")
+    ap.add_argument("--offsets", nargs="+", type=float, help="セッションごとの時刻補正（秒）")
+    args = ap.parse_args(argv)
+    result = merge_sessions(
+        args.sessions, args.output, tolerance=args.tolerance, direction=args.direction,
+        names=args.names, offsets=args.offsets,
+        progress=lambda n: print(f"\r{n} 行", end="", flush=True),
+    )
+    print()
+    for name, rate in result["match_rate"].items():
+        print(f"{name}: 一致 {rate * 100:.1f}%")
+        if rate == 0.0:
+            print("  時間帯が重なっていません（--offsets / --tolerance を確認してください）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# analysis/ml_export.py
+"""
+学習用データセットの書き出し
+
+各セッションを一定間隔（rate_hz）の時間格子に再標本化し（軸は線形補間、ボタンは直前値を保持）、
+固定長の窓（window サンプル、stride ずつずらす）に切り出してシャード単位で保存する。
+
+- セッションはプロセスプールで並列に処理し、各プロセスは自分のシャードだけを書く
+- セッションは行グループ/チャンク単位で読み、保持するのは書きかけのシャード1つ分のみ
+- 出力: out_dir/shards/*.npz（axes: float32 [n, window, 軸数], buttons: uint8 [n, window, ボタン数],
+  start: 窓の開始（セッション先頭からの秒））と out_dir/manifest.json
+
+    python -m analysis.ml_export logs dataset --rate 100 --window 200 --stride 50
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from loggers.clock import to_epoch_seconds
+from loggers.metadata import read_metadata
+from .csv_ingest import csv_columns, iter_csv_frames
+from .session_io import list_sessions, unique_sessions, axis_columns, button_columns, dpad_columns
+
+CHUNK_ROWS = 65536
+MANIFEST_NAME = "manifest.json"
+
+
+def session_columns(path: str):
+    """ファイル全体を読まずに列名だけを取得する"""
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(path).names)
+    return csv_columns(path)
+
+
+def collect_columns(paths):
+    """全セッションの列の和集合（axisN / buttonN は番号順、dpad は固定順）"""
+    names = set()
+    for p in paths:
+        try:
+            names.update(session_columns(p))
+        except Exception:
+            continue
+    num = lambda c: int("".join(ch for ch in c if ch.isdigit()) or 0)
+    axes = sorted(axis_columns(names), key=num)
+    buttons = sorted(button_columns(names), key=num) + dpad_columns(names)
+    return axes, buttons
+
+
+def iter_chunks(path: str, columns, chunk_rows=CHUNK_ROWS):
+    """timestamp と指定列を DataFrame のチャンクで返す（ない列は含めない）"""
+    present = set(session_columns(path))
+    cols = ["timestamp"] + [c for c in columns if c in present]
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=chunk_rows, columns=cols):
+            yield batch.to_pandas()
+    else:
+        yield from iter_csv_frames(path, cols, chunk_rows)
+
+
+class Resampler:
+    """
+    チャンクで届くサンプルを一定間隔の格子に再標本化する
+    直前チャンクの最終行を持ち越すため、チャンクの境界でも補間が途切れない。
+    格子は「先頭時刻 + i × step」で求め、加算による誤差をためない。
+    """
+    def __init__(self, step: float):
+        self.step = step
+        self._origin = None
+        self._done = 0
+        self._prev = None
+
+    def push(self, t, axes, buttons):
+        if self._prev is not None:
+            pt, pa, pb = self._prev
+            t = np.concatenate([pt, t])
+            axes = np.concatenate([pa, axes])
+            buttons = np.concatenate([pb, buttons])
+        if len(t) == 0:
+            return None
+        self._prev = (t[-1:], axes[-1:], buttons[-1:])
+        if self._origin is None:
+            self._origin = t[0]
+        last = int(np.floor((t[-1] - self._origin) / self.step))
+        if last < self._done:
+            return None
+        grid = self._origin + np.arange(self._done, last + 1, dtype=np.float64) * self.step
+        self._done = last + 1
+        out_axes = np.empty((len(grid), axes.shape[1]), dtype=np.float32)
+        for j in range(axes.shape[1]):
+            out_axes[:, j] = np.interp(grid, t, axes[:, j])
+        idx = np.searchsorted(t, grid, side="right") - 1
+        np.clip(idx, 0, len(t) - 1, out=idx)
+        return grid - self._origin, out_axes, buttons[idx]
+
+
+class ShardWriter:
+    """窓をためてシャード（.npz、または .npy の組）に書き出す"""
+    def __init__(self, out_dir, prefix, shard_windows=4096, fmt="npz", compress=False):
+        self.dir = out_dir
+        self.prefix = prefix
+        self.shard_windows = shard_windows
+        self.fmt = fmt
+        self.compress = compress
+        self.shards = []
+        self._axes, self._buttons, self._start = [], [], []
+
+    def add(self, axes, buttons, start):
+        self._axes.append(axes)
+        self._buttons.append(buttons)
+        self._start.append(start)
+        if len(self._start) >= self.shard_windows:
+            self.flush()
+
+    def flush(self):
+        if not self._start:
+            return
+        arrays = {
+            "axes": np.stack(self._axes).astype(np.float32, copy=False),
+            "buttons": np.stack(self._buttons).astype(np.uint8, copy=False),
+            "start": np.asarray(self._start, dtype=np.float64),
+        }
+        name = f"{self.prefix}_{len(self.shards):04d}"
+        if self.fmt == "npy":
+            files = {}
+            for key, arr in arrays.items():
+                fname = f"{name}.{key}.npy"
+                np.save(os.path.join(self.dir, fname), arr)
+                files[key] = fname
+        else:
+            fname = f"{name}.npz"
+            (np.savez_compressed if self.compress else np.savez)(os.path.join(self.dir, fname), **arrays)
+            files = fname
+        self.shards.append({"files": files, "windows": len(self._start)})
+        self._axes, self._buttons, self._start = [], [], []
+
+
+def export_session(path, session_id, out_dir, axes_cols, button_cols, rate_hz=100.0, window=200,
+                   stride=None, shard_windows=4096, fmt="npz", compress=False):
+    """1セッションを再標本化・窓切り出しして書き出し、マニフェストの項目を返す"""
+    stride = stride or window
+    step = 1.0 / rate_hz
+    resampler = Resampler(step)
+    writer = ShardWriter(out_dir, f"s{session_id:05d}", shard_windows, fmt, compress)
+    na, nb = len(axes_cols), len(button_cols)
+    # 窓の切り出し用に、まだ窓の始点になりうる行だけを保持する
+    buf_t = np.zeros(0)
+    buf_a = np.zeros((0, na), dtype=np.float32)
+    buf_b = np.zeros((0, nb), dtype=np.uint8)
+    t0 = None
+    epoch_start = None
+    samples = 0
+    # stride > window のとき、次の窓の始点までに読み飛ばす行数
+    skip = 0
+    for chunk in iter_chunks(path, axes_cols + button_cols):
+        if chunk.empty:
+            continue
+        ts = chunk["timestamp"].to_numpy()
+        if t0 is None:
+            t0 = ts[0]
+            meta = read_metadata(path)
+            if ts.dtype.kind == "f" or meta.get("clock_info"):
+                epoch_start = float(to_epoch_seconds(ts[:1], meta)[0])
+        t = (ts - t0) / 1e9 if ts.dtype.kind in "iu" else (ts - t0).astype(np.float64)
+        # ない列は 0 で埋める（列の並びはデータセット全体で共通）
+        a = chunk.reindex(columns=axes_cols, fill_value=0.0).to_numpy(dtype=np.float32)
+        b = chunk.reindex(columns=button_cols, fill_value=0).to_numpy(dtype=np.uint8)
+        res = resampler.push(t, a, b)
+        if res is None:
+            continue
+        gt, ga, gb = res
+        samples += len(gt)
+        if skip:
+            drop = min(skip, len(gt))
+            skip -= drop
+            gt, ga, gb = gt[drop:], ga[drop:], gb[drop:]
+        buf_t = np.concatenate([buf_t, gt])
+        buf_a = np.concatenate([buf_a, ga])
+        buf_b = np.concatenate([buf_b, gb])
+        n_win = (len(buf_t) - window) // stride + 1 if len(buf_t) >= window else 0
+        for k in range(n_win):
+            s = k * stride
+            writer.add(buf_a[s:s + window], buf_b[s:s + window], buf_t[s])
+        if n_win:
+            keep = n_win * stride
+            skip = max(0, keep - len(buf_t))
+            buf_t, buf_a, buf_b = buf_t[keep:], buf_a[keep:], buf_b[keep:]
+    writer.flush()
+    return {
+        "session": os.path.basename(path),
+        "id": session_id,
+        "epoch_start": epoch_start,
+        "samples": samples,
+        "windows": sum(s["windows"] for s in writer.shards),
+        "shards": writer.shards,
+    }
+
+
+def _export_task(args):
+    path, kwargs = args
+    try:
+        return export_session(path, **kwargs)
+    except Exception as e:
+        return {"session": os.path.basename(path), "id": kwargs["session_id"], "error": str(e),
+                "windows": 0, "shards": []}
+
+
+def export_dataset(save_dir, out_dir, rate_hz=100.0, window=200, stride=None, shard_windows=4096,
+                   fmt="npz", compress=False, workers=None, sessions=None, progress=None):
+    """
+    save_dir の全セッション（または sessions のパス一覧）を書き出し、マニフェストを返す
+    :param progress: progress(完了数, 全体数) を呼ぶ
+    """
+    # 複数形式で保存したセッションは1回だけ書き出す（窓の重複を防ぐ）
+    paths = unique_sessions(list(sessions) if sessions is not None else list_sessions(save_dir))
+    shard_dir = os.path.join(out_dir, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    axes_cols, button_cols = collect_columns(paths)
+    common = dict(
+        out_dir=shard_dir, axes_cols=axes_cols, button_cols=button_cols, rate_hz=rate_hz,
+        window=window, stride=stride or window, shard_windows=shard_windows, fmt=fmt, compress=compress,
+    )
+    tasks = [(p, dict(common, session_id=i)) for i, p in enumerate(paths)]
+    entries = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for entry in pool.map(_export_task, tasks):
+            entries.append(entry)
+            if progress:
+                progress(len(entries), len(tasks))
+    manifest = {
+        "version": 1,
+        "rate_hz": rate_hz,
+        "window": window,
+        "stride": stride or window,
+        "format": fmt,
+        "axes": axes_cols,
+        "buttons": button_cols,
+        "shard_dir": "shards",
+        "windows": sum(e["windows"] for e in entries),
+        "sessions": entries,
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="学習用データセットの書き出し")
+    ap.add_argument("save_dir")
+    ap.add_argument("out_dir")
+    ap.add_argument("--rate", type=float, default=100.0, help="再標本化のレート（Hz）")
+    ap.add_argument("--window", type=int, default=200, help="窓の長さ（サンプル）")
+    ap.add_argument("--stride", type=int, help="窓をずらす量（省略時は window）")
+    ap.add_argument("--shard-windows", type=int, default=4096, help="1シャードあたりの窓数")
+    ap.add_argument("--format", choices=["npz", "npy"], default="npz")
+    ap.add_argument("--compress", action="store_true", help="npz を圧縮する")
+    ap.add_argument("--workers", type=int)
+    args = ap.parse_args(argv)
+    manifest = export_dataset(
+        args.save_dir, args.out_dir, rate_hz=args.rate, window=args.window, stride=args.stride,
+        shard_windows=args.shard_windows, fmt=args.format, compress=args.compress, workers=args.workers,
+        progress=lambda done, total: print(f"\r{done}/{total}", end="", flush=True),
+    )
+    print()
+    errors = [e for e in manifest["sessions"] if "error" in e]
+    print(f"{manifest['windows']} 窓 / {len(manifest['sessions'])} セッション（失敗 {len(errors)} 件）")
+    for e in errors:
+        print(f"  {e['session']}: {e['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# analysis/query.py
+"""
+save_dir 全体を1つのデータセットとして問い合わせる
+
+- ファイル名（filename_template）の日時と更新時刻でセッションを絞り込む
+- 列の選択と条件は pyarrow.dataset に渡し、Parquet の行グループ統計で読み飛ばす
+- 結果はバッチ単位で流すため、セッション数が多くてもメモリ使用量は一定
+- 集計は (合計・件数・最小・最大) の部分集計をバッチごとに作ってから結合する
+
+    python -m analysis.query logs --since 2025-01-01 --where "button0 == 1" --agg button0:count
+    python -m analysis.query logs --group-by session --agg axis0:mean axis0:max --bucket 60
+"""
+
+import argparse
+import datetime
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from loggers.clock import to_epoch_seconds
+from loggers.metadata import read_metadata
+from .csv_ingest import csv_file_format
+from .session_io import list_sessions, unique_sessions
+
+BATCH_ROWS = 65536
+AGG_FUNCS = ("sum", "count", "min", "max", "mean")
+# 単調時計と壁時計のずれ（ドリフト）を見込んだ押し下げ条件の余裕
+_DRIFT_SLACK_NS = 1_000_000_000
+_WHERE_RE = re.compile(r"^\s*(\w+)\s*(==|!=|>=|<=|>|<)\s*(\S+)\s*$")
+
+
+def _to_epoch(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time()).timestamp()
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class SessionInfo:
+    """問い合わせ対象のセッション（path, name, 開始/終了のおおよその UNIX 秒）"""
+    def __init__(self, path, started, ended):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.started = started
+        self.ended = ended
+
+
+class LogQuery:
+    """
+    save_dir のセッションログに対する問い合わせ
+    :param template: ファイル名の日時テンプレート（設定の filename_template）
+    :param fmt: "parquet" / "csv" に限定する（None なら両方）
+    """
+    def __init__(self, save_dir="logs", template="%Y%m%d_%H%M%S", fmt=None):
+        self.save_dir = save_dir
+        self.template = template
+        self.fmt = fmt
+
+    def sessions(self, start=None, end=None, name=None):
+        """期間（UNIX 秒 / datetime / ISO 文字列）とファイル名のパターンで絞ったセッション一覧"""
+        start, end = _to_epoch(start), _to_epoch(end)
+        name_re = re.compile(name) if name else None
+        paths = list_sessions(self.save_dir)
+        if self.fmt:
+            paths = [p for p in paths if os.path.splitext(p)[1].lower().lstrip(".") == self.fmt]
+        out = []
+        # 両形式で保存したセッションは1回だけ数える（Parquet を優先）
+        for path in unique_sessions(paths):
+            info = SessionInfo(path, None, os.stat(path).st_mtime)
+            if name_re and not name_re.search(info.name):
+                continue
+            try:
+                info.started = datetime.datetime.strptime(info.name, self.template).timestamp()
+            except ValueError:
+                pass
+            # 開始はファイル名、終了は更新時刻（保存完了時）で判定する
+            if end is not None and info.started is not None and info.started >= end:
+                continue
+            if start is not None and info.ended < start:
+                continue
+            out.append(info)
+        return out
+
+    def scan(self, columns=None, where=None, start=None, end=None, name=None, batch_rows=BATCH_ROWS):
+        """
+        条件に合う行を DataFrame のバッチで順に返す
+        - session 列（ファイル名の拡張子なし）を付け、timestamp は UNIX 秒に揃える
+        - where は pq.read_table の filters と同じ [(列, 演算子, 値), ...] 形式
+        """
+        start, end = _to_epoch(start), _to_epoch(end)
+        for info in self.sessions(start, end, name):
+            yield from self._scan_file(info, columns, where, start, end, batch_rows)
+
+    def _scan_file(self, info, columns, where, start, end, batch_rows):
+        # CSV は型推論をせず、csv_ingest と同じ列の型で読む
+        fmt = "parquet" if info.path.lower().endswith(".parquet") else csv_file_format(info.path)
+        dataset = ds.dataset(info.path, format=fmt)
+        names = dataset.schema.names
+        where = list(where or [])
+        # 条件の列がないセッションは一致しえない
+        if any(w[0] not in names for w in where):
+            return
+        if columns is None:
+            cols = list(names)
+        else:
+            cols = [c for c in columns if c in names]
+            if "timestamp" in names and "timestamp" not in cols:
+                cols.append("timestamp")
+        filters = where + self._time_filters(info.path, dataset.schema, start, end)
+        expr = pq.filters_to_expression(filters) if filters else None
+        meta = None
+        for batch in dataset.to_batches(columns=cols, filter=expr, batch_size=batch_rows):
+            if batch.num_rows == 0:
+                continue
+            df = batch.to_pandas()
+            if "timestamp" in df.columns:
+                if meta is None:
+                    meta = read_metadata(info.path)
+                df["timestamp"] = to_epoch_seconds(df["timestamp"].to_numpy(), meta)
+                if start is not None or end is not None:
+                    t = df["timestamp"].to_numpy()
+                    mask = np.ones(len(t), dtype=bool)
+                    if start is not None:
+                        mask &= t >= start
+                    if end is not None:
+                        mask &= t < end
+                    df = df[mask]
+                    if df.empty:
+                        continue
+            if columns is not None:
+                df = df.reindex(columns=[c for c in columns if c != "session"])
+            df.insert(0, "session", info.name)
+            yield df
+
+    def _time_filters(self, path, schema, start, end):
+        """期間を各ファイルの timestamp の単位に直して押し下げ条件にする"""
+        if (start is None and end is None) or "timestamp" not in schema.names:
+            return []
+        if pa.types.is_integer(schema.field("timestamp").type):
+            anchor = (read_metadata(path).get("clock_info") or {}).get("anchor")
+            if not anchor:
+                return []
+            base = int(anchor["mono_ns"]) - int(anchor["wall_ns"])
+            lo = None if start is None else base + int(start * 1e9) - _DRIFT_SLACK_NS
+            hi = None if end is None else base + int(end * 1e9) + _DRIFT_SLACK_NS
+        else:
+            lo, hi = start, end
+        filters = []
+        if lo is not None:
+            filters.append(("timestamp", ">=", lo))
+        if hi is not None:
+            filters.append(("timestamp", "<", hi))
+        return filters
+
+    def to_pandas(self, columns=None, where=None, start=None, end=None, name=None, limit=None):
+        """scan の結果を1つの DataFrame にまとめる（limit 行で打ち切り）"""
+        frames, n = [], 0
+        for df in self.scan(columns, where, start, end, name):
+            frames.append(df)
+            n += len(df)
+            if limit is not None and n >= limit:
+                break
+        if not frames:
+            return pd.DataFrame()
+        out = pd.concat(frames, ignore_index=True)
+        return out.head(limit) if limit is not None else out
+
+    def aggregate(self, aggs, group_by=("session",), bucket=None, where=None,
+                  start=None, end=None, name=None, workers=4):
+        """
+        グループごとの集計
+        :param aggs: {列: ["sum", "mean", ...]}（sum/count/min/max/mean）
+        :param group_by: グループ化する列（session や button0 など）
+        :param bucket: 指定すると window_start（bucket 秒単位の UNIX 秒）でもグループ化
+        セッションごとの部分集計をスレッドで並列に作り、最後に結合する。
+        """
+        aggs = {c: [f] if isinstance(f, str) else list(f) for c, f in aggs.items()}
+        for funcs in aggs.values():
+            for f in funcs:
+                if f not in AGG_FUNCS:
+                    raise ValueError(f"未対応の集計です: {f}")
+        keys = list(group_by or [])
+        if bucket:
+            keys.append("window_start")
+        columns = sorted(set(aggs) | {k for k in keys if k not in ("session", "window_start")} | {"timestamp"})
+        start, end = _to_epoch(start), _to_epoch(end)
+
+        def partial(info):
+            parts = []
+            for df in self._scan_file(info, columns, where, start, end, BATCH_ROWS):
+                if bucket:
+                    df["window_start"] = np.floor(df["timestamp"].to_numpy() / bucket) * bucket
+                parts.append(_partial_agg(df, keys, aggs))
+            return parts
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            partials = [p for parts in pool.map(partial, self.sessions(start, end, name)) for p in parts]
+        if not partials:
+            return pd.DataFrame()
+        return _combine(pd.concat(partials, ignore_index=True), keys, aggs)
+
+
+def _partial_agg(df, keys, aggs):
+    """バッチの部分集計（rows と 列__sum / __count / __min / __max）"""
+    g = df.groupby(keys, sort=False, dropna=False) if keys else df.groupby(np.zeros(len(df)), sort=False)
+    out = pd.DataFrame({"rows": g.size()})
+    for col, funcs in aggs.items():
+        if col not in df.columns:
+            continue
+        need = set()
+        for f in funcs:
+            need |= {"sum", "count"} if f == "mean" else {f}
+        for f in sorted(need):
+            out[f"{col}__{f}"] = getattr(g[col], f)()
+    return out.reset_index(drop=not keys)
+
+
+def _combine(parts, keys, aggs):
+    reduce = {"rows": "sum"}
+    for c in parts.columns:
+        if "__" in c:
+            reduce[c] = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}[c.rsplit("__", 1)[1]]
+    merged = parts.groupby(keys, sort=True, dropna=False).agg(reduce).reset_index() if keys else parts.agg(reduce).to_frame().T
+    out = merged[keys + ["rows"]].copy()
+    for col, funcs in aggs.items():
+        for f in funcs:
+            if f == "mean":
+                if f"{col}__sum" in merged:
+                    out[f"{col}_mean"] = merged[f"{col}__sum"] / merged[f"{col}__count"].replace(0, np.nan)
+            elif f"{col}__{f}" in merged:
+                out[f"{col}_{f}"] = merged[f"{col}__{f}"]
+    return out
+
+
+def parse_where(text: str):
+    """'button0 == 1' を (列, 演算子, 値) に変換する"""
+    m = _WHERE_RE.match(text)
+    if not m:
+        raise ValueError(f"条件の形式が不正です: {text!r}")
+    col, op, raw = m.groups()
+    try:
+        value = int(raw)
+    except ValueError:
+        value = float(raw)
+    return (col, op, value)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="save_dir 全体への問い合わせ")
+    ap.add_argument("save_dir", nargs="?", default="logs")
+    ap.add_argument("--template", default="%Y%m%d_%H%M%S", help="ファイル名の日時テンプレート")
+    ap.add_argument("--format", choices=["parquet", "csv"], help="対象の形式")
+    ap.add_argument("--since", help="開始日時（ISO 形式）")
+    ap.add_argument("--until", help="終了日時（ISO 形式）")
+    ap.add_argument("--name", help="セッション名の正規表現")
+    ap.add_argument("--columns", help="出力する列（カンマ区切り）")
+    ap.add_argument("--where", action="append", default=[], help='条件（例: "button0 == 1"）')
+    ap.add_argument("--agg", nargs="+", help="集計（例: button0:sum axis0:mean）")
+    ap.add_argument("--group-by", default="", help="グループ化する列（カンマ区切り）")
+    ap.add_argument("--bucket", type=float, help="時間窓（秒）でグループ化")
+    ap.add_argument("--limit", type=int, default=50, help="行の出力件数（集計時は無視）")
+    ap.add_argument("--out", help="CSV に保存（行の出力は全件をストリーミングで書く）")
+    args = ap.parse_args(argv)
+
+    q = LogQuery(args.save_dir, template=args.template, fmt=args.format)
+    where = [parse_where(w) for w in args.where]
+    if args.agg:
+        aggs = {}
+        for spec in args.agg:
+            col, _, func = spec.partition(":")
+            aggs.setdefault(col, []).append(func or "sum")
+        group_by = [c for c in args.group_by.split(",") if c]
+        df = q.aggregate(aggs, group_by=group_by, bucket=args.bucket, where=where,
+                         start=args.since, end=args.until, name=args.name)
+    else:
+        columns = args.columns.split(",") if args.columns else None
+        if args.out:
+            header = True
+            for df in q.scan(columns, where, args.since, args.until, args.name):
+                df.to_csv(args.out, mode="w" if header else "a", header=header, index=False)
+                header = False
+            return
+        df = q.to_pandas(columns, where, args.since, args.until, args.name, limit=args.limit)
+    if args.out:
+        df.to_csv(args.out, index=False)
+    else:
+        print(df.to_string(index=False) if len(df) else "該当なし")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# analysis/rollups.py
+"""
+セッション横断のロールアップ集計
+
+各セッションの横に書き出された <名前>.rollup.parquet（既定1秒窓）だけを読み、
+任意の粗さ（例: 60秒）の窓に再集計する。生ログは読まない。
+
+    python -m analysis.rollups logs --window 60 --out summary.csv
+"""
+
+import argparse
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from loggers.rollup import ROLLUP_SUFFIX
+
+
+def find_rollups(save_dir: str):
+    """save_dir 直下のロールアップファイルのパス一覧"""
+    try:
+        names = sorted(e.name for e in os.scandir(save_dir) if e.name.endswith(ROLLUP_SUFFIX))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(save_dir, n) for n in names]
+
+
+def load_rollups(save_dir: str, window=60.0, start=None, end=None, by_session=False) -> pd.DataFrame:
+    """
+    ロールアップを読み込み window 秒単位に再集計する
+    :param start/end: UNIX 秒（または datetime）で窓の範囲を絞る
+    :param by_session: True ならセッションごとに分けて集計
+    """
+    start = start.timestamp() if isinstance(start, datetime.datetime) else start
+    end = end.timestamp() if isinstance(end, datetime.datetime) else end
+    frames = []
+    for path in find_rollups(save_dir):
+        filters = []
+        if start is not None:
+            filters.append(("window_start", ">=", float(start)))
+        if end is not None:
+            filters.append(("window_start", "<", float(end)))
+        df = pq.read_table(path, filters=filters or None).to_pandas()
+        if df.empty:
+            continue
+        df["session"] = os.path.basename(path)[: -len(ROLLUP_SUFFIX)]
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame()
+    return merge_windows(pd.concat(frames, ignore_index=True), window, by_session=by_session)
+
+
+def merge_windows(df: pd.DataFrame, window: float, by_session=False) -> pd.DataFrame:
+    """細かい窓の集計を window 秒の窓へ結合する（合計・二乗和から平均/標準偏差を再計算）"""
+    df = df.copy()
+    df["window_start"] = np.floor(df["window_start"] / window) * window
+    keys = ["session", "window_start"] if by_session else ["window_start"]
+    axis_names = sorted({c[: -len("_sumsq")] for c in df.columns if c.endswith("_sumsq")})
+    aggs = {"samples": "sum", "active_s": "sum"}
+    for c in df.columns:
+        if c.endswith("_presses") or c.endswith("_sum") or c.endswith("_sumsq"):
+            aggs[c] = "sum"
+        elif c.endswith("_min"):
+            aggs[c] = "min"
+        elif c.endswith("_max"):
+            aggs[c] = "max"
+    out = df.groupby(keys, sort=True).agg(aggs).reset_index()
+    out["window_s"] = float(window)
+    n = out["samples"].to_numpy(dtype=np.float64)
+    for a in axis_names:
+        mean = out[f"{a}_sum"].to_numpy() / n
+        var = out[f"{a}_sumsq"].to_numpy() / n - mean ** 2
+        out[f"{a}_mean"] = mean
+        out[f"{a}_std"] = np.sqrt(np.maximum(var, 0.0))
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="セッション横断のロールアップ集計")
+    ap.add_argument("save_dir", nargs="?", default="logs")
+    ap.add_argument("--window", type=float, default=60.0, help="集計窓（秒）")
+    ap.add_argument("--by-session", action="store_true", help="セッションごとに集計")
+    ap.add_argument("--out", help="CSV に保存（省略時は標準出力）")
+    args = ap.parse_args(argv)
+    df = load_rollups(args.save_dir, window=args.window, by_session=args.by_session)
+    if args.out:
+        df.to_csv(args.out, index=False)
+    else:
+        print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
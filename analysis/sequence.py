@@ -0,0 +1,228 @@
+# analysis/sequence.py
+"""
+ボタン/方向入力のシーケンス（コマンド）検出
+
+1. セッションをイベント列（方向の切り替わり・ボタンの押下）に変換する。
+   方向は gui.stick_dir と同じ閾値をベクトル化して判定し、D-Pad 入力を優先する。
+2. 多数のパターンを Aho-Corasick オートマトン（遷移表に展開済み）で一度に照合し、
+   一致したものだけ時間条件（各間隔・全体の長さ）を確認する。
+
+    python -m analysis.sequence logs/20250101_120000.parquet "↓↘→+Btn1" --max-gap 0.25
+"""
+
+import argparse
+import re
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .session_io import read_session, axis_columns, button_columns, dpad_columns
+
+DIRECTIONS = ("↑", "↓", "←", "→", "↖", "↗", "↙", "↘")
+_TOKEN_RE = re.compile(r"Btn\d+|[↑↓←→↖↗↙↘]")
+
+
+def stick_dir_codes(x, y):
+    """
+    stick_dir のベクトル版。方向コード（0=なし、1..8 は DIRECTIONS の順 +1）を返す
+    判定順も stick_dir と同じ（先に成立した条件を採用）
+    """
+    x = np.asarray(x, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32)
+    ax, ay = np.abs(x), np.abs(y)
+    conds = [
+        (y < -0.7) & (ax < 0.5),
+        (y > 0.7) & (ax < 0.5),
+        (x < -0.7) & (ay < 0.5),
+        (x > 0.7) & (ay < 0.5),
+        (x < -0.5) & (y < -0.5),
+        (x > 0.5) & (y < -0.5),
+        (x < -0.5) & (y > 0.5),
+        (x > 0.5) & (y > 0.5),
+    ]
+    code = np.select(conds, np.arange(1, 9, dtype=np.int8), 0).astype(np.int8)
+    code[(ax < 0.4) & (ay < 0.4)] = 0
+    return code
+
+
+def dpad_codes(up, down, left, right):
+    """D-Pad 4ボタンから方向コードを作る（斜めを優先）"""
+    up, down, left, right = (np.asarray(v).astype(bool) for v in (up, down, left, right))
+    conds = [
+        up & left, up & right, down & left, down & right,
+        up & ~(left | right), down & ~(left | right), left & ~(up | down), right & ~(up | down),
+    ]
+    codes = np.array([5, 6, 7, 8, 1, 2, 3, 4], dtype=np.int8)
+    return np.select(conds, codes, 0).astype(np.int8)
+
+
+class EventStream:
+    """時刻順のイベント列（times: 秒, tokens: トークンID, samples: 元の行番号）"""
+    def __init__(self, times, tokens, samples, vocab):
+        self.times = times
+        self.tokens = tokens
+        self.samples = samples
+        self.vocab = vocab
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def labels(self):
+        return [self.vocab[t] for t in self.tokens]
+
+
+def build_vocab(n_buttons: int):
+    return list(DIRECTIONS) + [f"Btn{i + 1}" for i in range(n_buttons)]
+
+
+def event_stream(df: pd.DataFrame) -> EventStream:
+    """セッション DataFrame をイベント列に変換する"""
+    cols = list(df.columns)
+    t = df["timestamp"].to_numpy(dtype=np.float64)
+    axes = axis_columns(cols)
+    buttons = button_columns(cols)
+    dpad = dpad_columns(cols)
+    vocab = build_vocab(len(buttons))
+
+    # 方向: D-Pad が押されていればそちら、なければ左スティック
+    code = np.zeros(len(df), dtype=np.int8)
+    if len(axes) >= 2:
+        code = stick_dir_codes(df[axes[0]].to_numpy(), df[axes[1]].to_numpy())
+    if len(dpad) == 4:
+        dcode = dpad_codes(*(df[c].to_numpy() for c in dpad))
+        code = np.where(dcode > 0, dcode, code)
+    prev = np.concatenate([[0], code[:-1]])
+    dir_idx = np.flatnonzero((code != prev) & (code > 0))
+    dir_tok = code[dir_idx].astype(np.int32) - 1
+
+    # ボタン: 押下（立ち上がり）
+    idx_parts, tok_parts = [dir_idx], [dir_tok]
+    if buttons:
+        b = df[buttons].to_numpy(dtype=np.int8)
+        rise = np.diff(b, axis=0, prepend=np.zeros((1, b.shape[1]), dtype=np.int8)) > 0
+        rows, which = np.nonzero(rise)
+        idx_parts.append(rows)
+        tok_parts.append(which.astype(np.int32) + len(DIRECTIONS))
+    samples = np.concatenate(idx_parts)
+    tokens = np.concatenate(tok_parts)
+    # 同じ行では方向→ボタンの順（トークンIDの小さい順）
+    order = np.lexsort((tokens, samples))
+    samples = samples[order]
+    return EventStream(t[samples], tokens[order], samples, vocab)
+
+
+class Pattern:
+    """
+    検出パターン
+    - spec: "↓↘→+Btn1" や "↓ ↘ → Btn1" の形式（区切りの空白や + は無視）
+    - max_gap: 連続するイベント間の最大間隔（秒）
+    - max_span: 最初から最後までの最大時間（秒）
+    """
+    def __init__(self, spec: str, name=None, max_gap=0.25, max_span=1.0):
+        self.spec = spec
+        self.name = name or spec
+        self.labels = _TOKEN_RE.findall(spec)
+        if not self.labels:
+            raise ValueError(f"パターンが空です: {spec!r}")
+        self.max_gap = float(max_gap)
+        self.max_span = float(max_span)
+
+
+class SequenceMatcher:
+    """複数パターンの Aho-Corasick 照合器（遷移は密な表に展開して1ステップ1参照）"""
+    def __init__(self, patterns, n_buttons=32):
+        self.patterns = list(patterns)
+        need = max((int(l[3:]) for p in self.patterns for l in p.labels if l.startswith("Btn")), default=0)
+        self.vocab = build_vocab(max(n_buttons, need))
+        self._build()
+
+    def _build(self):
+        index = {label: i for i, label in enumerate(self.vocab)}
+        goto = [{}]
+        out = [[]]
+        for pid, p in enumerate(self.patterns):
+            s = 0
+            for label in p.labels:
+                tok = index[label]
+                nxt = goto[s].get(tok)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[s][tok] = nxt
+                    goto.append({})
+                    out.append([])
+                s = nxt
+            out[s].append(pid)
+        # 失敗リンクを BFS で求め、遷移表（DFA）に展開する
+        V = len(self.vocab)
+        delta = [[0] * V for _ in goto]
+        fail = [0] * len(goto)
+        q = deque()
+        for tok, s in goto[0].items():
+            delta[0][tok] = s
+            q.append(s)
+        while q:
+            r = q.popleft()
+            out[r] = out[r] + out[fail[r]]
+            for tok in range(V):
+                s = goto[r].get(tok)
+                if s is None:
+                    delta[r][tok] = delta[fail[r]][tok]
+                else:
+                    fail[s] = delta[fail[r]][tok]
+                    delta[r][tok] = s
+                    q.append(s)
+        self._delta = delta
+        self._out = out
+        self._index = index
+
+    def find(self, stream: EventStream) -> pd.DataFrame:
+        """イベント列から一致を探す（連続したイベントとして現れたもののみ）"""
+        # イベント列の語彙を照合器の語彙に合わせる
+        remap = np.array([self._index.get(v, -1) for v in stream.vocab], dtype=np.int64)
+        tokens = remap[stream.tokens].tolist() if len(stream) else []
+        times = stream.times.tolist()
+        delta, outs, pats = self._delta, self._out, self.patterns
+        found = []
+        s = 0
+        for i, tok in enumerate(tokens):
+            if tok < 0:
+                s = 0
+                continue
+            s = delta[s][tok]
+            hits = outs[s]
+            if not hits:
+                continue
+            for pid in hits:
+                p = pats[pid]
+                start = i - len(p.labels) + 1
+                if times[i] - times[start] > p.max_span:
+                    continue
+                if any(times[k + 1] - times[k] > p.max_gap for k in range(start, i)):
+                    continue
+                found.append((p.name, times[start], times[i], int(stream.samples[start]), int(stream.samples[i])))
+        return pd.DataFrame(found, columns=["pattern", "start", "end", "start_row", "end_row"])
+
+
+def find_sequences(source, patterns) -> pd.DataFrame:
+    """セッション（パスまたは DataFrame）からパターンを検出する"""
+    df = read_session(source) if isinstance(source, str) else source
+    stream = event_stream(df)
+    return SequenceMatcher(patterns, n_buttons=len(stream.vocab) - len(DIRECTIONS)).find(stream)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="入力シーケンスの検出")
+    ap.add_argument("session")
+    ap.add_argument("patterns", nargs="+", help='例: "↓↘→+Btn1"')
+    ap.add_argument("--max-gap", type=float, default=0.25)
+    ap.add_argument("--max-span", type=float, default=1.0)
+    args = ap.parse_args(argv)
+    pats = [Pattern(p, max_gap=args.max_gap, max_span=args.max_span) for p in args.patterns]
+    res = find_sequences(args.session, pats)
+    print(res.to_string(index=False) if len(res) else "一致なし")
+    print(res.groupby("pattern").size().to_string() if len(res) else "")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# analysis/session_io.py
+
+import os
+
+import pandas as pd
+
+from loggers.clock import to_epoch_seconds
+from loggers.companions import is_session_file
+from loggers.metadata import read_metadata
+from .csv_ingest import read_csv_fast
+
+
+def list_sessions(save_dir: str):
+    """save_dir 直下のセッションログのパス一覧（名前順）"""
+    try:
+        names = sorted(e.name for e in os.scandir(save_dir) if e.is_file() and is_session_file(e.name))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(save_dir, n) for n in names]
+
+
+def unique_sessions(paths):
+    """
+    同じセッションを複数形式で保存したもの（x.parquet と x.csv）を1つにまとめる
+    Parquet を優先し、順序は元の並びを保つ
+    """
+    chosen = {}
+    for p in paths:
+        stem, ext = os.path.splitext(p)
+        if stem not in chosen or ext.lower() == ".parquet":
+            chosen[stem] = p
+    keep = set(chosen.values())
+    return [p for p in paths if p in keep]
+
+
+def axis_columns(columns):
+    return [c for c in columns if c.startswith("axis")]
+
+
+def button_columns(columns):
+    """ボタン列（D-Pad 列を除く）"""
+    return [c for c in columns if c.startswith("button")]
+
+
+def dpad_columns(columns):
+    return [c for c in ("dpad_up", "dpad_down", "dpad_left", "dpad_right") if c in columns]
+
+
+def read_session(path: str, columns=None) -> pd.DataFrame:
+    """
+    セッションログを DataFrame で読む
+    - timestamp 列は UNIX 秒（float64）に揃える（int64 ns の新形式も旧形式も可）
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        df = pd.read_parquet(path, columns=columns)
+    elif ext == ".csv":
+        df = read_csv_fast(path, columns=columns)
+    else:
+        raise ValueError(f"未対応の形式です: {path}")
+    if "timestamp" in df.columns:
+        df["timestamp"] = to_epoch_seconds(df["timestamp"].to_numpy(), read_metadata(path))
+    return df
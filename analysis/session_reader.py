@@ -0,0 +1,160 @@
+# analysis/session_reader.py
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from loggers.companions import file_companion_path
+from loggers.clock import to_relative_seconds
+from .csv_ingest import read_csv_fast, read_csv_range
+
+INDEX_VERSION = 1
+
+
+class SessionReader:
+    """
+    セッションログをチャンク単位でランダムアクセスするリーダー
+    - 初回に timestamp 列だけを読んでインデックス（行→時刻、チャンク境界）を作り、
+      <ファイル名>.index.npz（x.parquet → x.parquet.index.npz）にキャッシュする
+      （同じセッションの Parquet と CSV で索引を取り合わないよう、拡張子ごとに分ける）
+    - Parquet は row group 単位、CSV は行オフセット索引からチャンクを読む
+    - 読んだチャンクは LRU で保持し、次のチャンクはバックグラウンドで先読みする
+    ファイル全体をメモリに載せないため、長時間セッションでもシークが軽い。
+    """
+    CSV_CHUNK_ROWS = 16384
+
+    def __init__(self, path, cache_chunks=4):
+        self.path = path
+        self.ext = os.path.splitext(path)[1].lower()
+        self._cache = OrderedDict()
+        self._cache_chunks = max(2, int(cache_chunks))
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._parquet = pq.ParquetFile(path) if self.ext == ".parquet" else None
+        self._load_index()
+        self.axis_columns = [c for c in self.columns if c.startswith("axis")]
+        self.button_columns = [c for c in self.columns if c.startswith("button") or c.startswith("dpad_")]
+
+    # インデックス
+    def _load_index(self):
+        st = os.stat(self.path)
+        cache = file_companion_path(self.path, ".index.npz")
+        try:
+            with np.load(cache, allow_pickle=False) as z:
+                if (int(z["version"]) == INDEX_VERSION and int(z["mtime_ns"]) == st.st_mtime_ns
+                        and int(z["size"]) == st.st_size):
+                    self.timestamps = z["timestamps"]
+                    self.chunk_starts = z["chunk_starts"]
+                    self.offsets = z["offsets"]
+                    self.columns = [str(c) for c in z["columns"]]
+                    self._finish_index()
+                    return
+        except Exception:
+            pass
+        if self._parquet is not None:
+            self._build_parquet_index()
+        else:
+            self._build_csv_index()
+        self._finish_index()
+        try:
+            np.savez(
+                cache,
+                version=INDEX_VERSION, mtime_ns=st.st_mtime_ns, size=st.st_size,
+                timestamps=self.timestamps, chunk_starts=self.chunk_starts,
+                offsets=self.offsets, columns=np.array(self.columns),
+            )
+        except OSError:
+            pass
+
+    def _build_parquet_index(self):
+        pf = self._parquet
+        self.columns = list(pf.schema_arrow.names)
+        self.timestamps = pf.read(columns=["timestamp"]).column(0).to_numpy()
+        sizes = [pf.metadata.row_group(i).num_rows for i in range(pf.num_row_groups)]
+        self.chunk_starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64) if sizes else np.zeros(0, np.int64)
+        self.offsets = np.zeros(0, dtype=np.int64)
+
+    def _build_csv_index(self):
+        offsets = []
+        with open(self.path, "rb") as f:
+            header = f.readline()
+            pos = len(header)
+            n = 0
+            for line in f:
+                if n % self.CSV_CHUNK_ROWS == 0:
+                    offsets.append(pos)
+                pos += len(line)
+                n += 1
+        self.columns = header.decode("utf-8").strip().split(",")
+        self.timestamps = read_csv_fast(self.path, columns=["timestamp"])["timestamp"].to_numpy()
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.chunk_starts = np.arange(len(offsets), dtype=np.int64) * self.CSV_CHUNK_ROWS
+
+    def _finish_index(self):
+        # 再生・シークは先頭からの相対秒で扱う（旧形式の float 秒と int64 ns の両対応）
+        self.times = to_relative_seconds(self.timestamps)
+        self.num_rows = len(self.timestamps)
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1]) if self.num_rows else 0.0
+
+    def index_at(self, t: float) -> int:
+        """相対時刻 t 以前で最も新しい行番号"""
+        if not self.num_rows:
+            return -1
+        i = int(np.searchsorted(self.times, t, side="right")) - 1
+        return min(max(i, 0), self.num_rows - 1)
+
+    # チャンク読み出し
+    def _read_chunk(self, c: int):
+        cols = self.axis_columns + self.button_columns
+        if self._parquet is not None:
+            df = self._parquet.read_row_group(c, columns=cols).to_pandas()
+        else:
+            end = int(self.offsets[c + 1]) if c + 1 < len(self.offsets) else None
+            df = read_csv_range(self.path, int(self.offsets[c]), end, self.columns, columns=cols)
+        axes = df[self.axis_columns].to_numpy(dtype=np.float32) if self.axis_columns else np.zeros((len(df), 0), np.float32)
+        buttons = df[self.button_columns].to_numpy(dtype=np.uint8) if self.button_columns else np.zeros((len(df), 0), np.uint8)
+        return axes, buttons
+
+    def _chunk(self, c: int):
+        with self._lock:
+            hit = self._cache.get(c)
+            if hit is not None:
+                self._cache.move_to_end(c)
+                return hit
+            fut = self._pending.get(c)
+        data = fut.result() if fut is not None else self._read_chunk(c)
+        with self._lock:
+            self._pending.pop(c, None)
+            self._cache[c] = data
+            self._cache.move_to_end(c)
+            while len(self._cache) > self._cache_chunks:
+                self._cache.popitem(last=False)
+        return data
+
+    def _prefetch(self, c: int):
+        if c >= len(self.chunk_starts):
+            return
+        with self._lock:
+            if c in self._cache or c in self._pending:
+                return
+            self._pending[c] = self._pool.submit(self._read_chunk, c)
+
+    def row(self, i: int):
+        """行番号 i の (相対時刻, axes, buttons) を返す"""
+        c = int(np.searchsorted(self.chunk_starts, i, side="right")) - 1
+        axes, buttons = self._chunk(c)
+        self._prefetch(c + 1)
+        j = i - int(self.chunk_starts[c])
+        return float(self.times[i]), axes[j].tolist(), buttons[j].tolist()
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._cache.clear()
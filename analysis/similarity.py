@@ -0,0 +1,235 @@
+# analysis/similarity.py
+"""
+セッション間の類似検索
+
+各セッションを固定長の特徴ベクトル（押下レート、スティック方向分布、
+押下時間の分位点など）に変換し、save_dir/.features.npz にキャッシュする。
+索引は追加・更新・削除されたファイルだけ差分で更新し、問い合わせは
+標準化したベクトルのコサイン類似度を NumPy で一括計算する。
+
+    python -m analysis.similarity logs logs/20250101_120000.parquet -k 5
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from loggers.rollup import axis_deflection
+from .session_io import read_session, list_sessions, unique_sessions, axis_columns, button_columns, dpad_columns
+from .sequence import stick_dir_codes, dpad_codes
+
+INDEX_NAME = ".features.npz"
+INDEX_VERSION = 2
+MAX_BUTTONS = 16
+MAX_AXES = 6
+HOLD_QUANTILES = (0.1, 0.5, 0.9)
+FEATURE_DIM = MAX_BUTTONS + 9 * 3 + len(HOLD_QUANTILES) + MAX_AXES * 2 + 1
+
+
+def _direction_hist(codes):
+    h = np.bincount(codes.astype(np.int64), minlength=9)[:9].astype(np.float32)
+    return h / max(1, len(codes))
+
+
+def extract_features(df) -> np.ndarray:
+    """セッション DataFrame から固定長の特徴ベクトル（float32, FEATURE_DIM）を作る"""
+    cols = list(df.columns)
+    t = df["timestamp"].to_numpy(dtype=np.float64)
+    n = len(t)
+    duration = max(1e-6, float(t[-1] - t[0])) if n > 1 else 1.0
+    axes = axis_columns(cols)
+    buttons = button_columns(cols)
+    dpad = dpad_columns(cols)
+    parts = []
+
+    # ボタンごとの押下レート（回/秒）と押下時間
+    rates = np.zeros(MAX_BUTTONS, dtype=np.float32)
+    holds = []
+    if buttons and n:
+        b = df[buttons].to_numpy(dtype=np.int8)
+        pad = np.zeros((1, b.shape[1]), dtype=np.int8)
+        d = np.diff(np.vstack([pad, b, pad]), axis=0)
+        t_ext = np.append(t, t[-1])
+        for j in range(min(b.shape[1], MAX_BUTTONS)):
+            starts = np.flatnonzero(d[:, j] == 1)
+            ends = np.flatnonzero(d[:, j] == -1)
+            rates[j] = len(starts) / duration
+            if len(starts):
+                holds.append(t_ext[ends] - t_ext[starts])
+    parts.append(rates)
+
+    # スティック（左・右）と D-Pad の方向分布
+    for ix, iy in ((0, 1), (2, 3)):
+        if len(axes) > iy and n:
+            parts.append(_direction_hist(stick_dir_codes(df[axes[ix]].to_numpy(), df[axes[iy]].to_numpy())))
+        else:
+            parts.append(np.zeros(9, dtype=np.float32))
+    if len(dpad) == 4 and n:
+        parts.append(_direction_hist(dpad_codes(*(df[c].to_numpy() for c in dpad))))
+    else:
+        parts.append(np.zeros(9, dtype=np.float32))
+
+    # 押下時間の分位点（秒）
+    if holds:
+        parts.append(np.quantile(np.concatenate(holds), HOLD_QUANTILES).astype(np.float32))
+    else:
+        parts.append(np.zeros(len(HOLD_QUANTILES), dtype=np.float32))
+
+    # 軸ごとの静止位置からの振れの平均と標準偏差
+    stats = np.zeros(MAX_AXES * 2, dtype=np.float32)
+    values = df[axes].to_numpy(dtype=np.float32) if axes else np.zeros((n, 0), dtype=np.float32)
+    deflection = axis_deflection(values)
+    if n:
+        for j in range(min(len(axes), MAX_AXES)):
+            stats[2 * j] = deflection[:, j].mean()
+            stats[2 * j + 1] = values[:, j].std()
+    parts.append(stats)
+
+    # いずれかの入力がある時間の割合（トリガーは静止位置 -1.0 を基準にする）
+    active = np.zeros(n, dtype=bool)
+    if buttons:
+        active |= df[buttons].to_numpy().any(axis=1)
+    if axes:
+        active |= (deflection > 0.2).any(axis=1)
+    parts.append(np.array([active.mean() if n else 0.0], dtype=np.float32))
+
+    return np.concatenate(parts).astype(np.float32)
+
+
+def session_features(path: str) -> np.ndarray:
+    return extract_features(read_session(path))
+
+
+class FeatureIndex:
+    """save_dir のセッション特徴ベクトルの索引（差分更新・最近傍検索）"""
+    def __init__(self, save_dir: str):
+        self.save_dir = save_dir
+        self.path = os.path.join(save_dir, INDEX_NAME)
+        self.names = []
+        self.mtimes = np.zeros(0, dtype=np.int64)
+        self.sizes = np.zeros(0, dtype=np.int64)
+        self.vectors = np.zeros((0, FEATURE_DIM), dtype=np.float32)
+        self._load()
+        self._prepare()
+
+    def _load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as z:
+                if int(z["version"]) != INDEX_VERSION or z["vectors"].shape[1] != FEATURE_DIM:
+                    return
+                self.names = [str(n) for n in z["names"]]
+                self.mtimes = z["mtimes"]
+                self.sizes = z["sizes"]
+                self.vectors = z["vectors"]
+        except Exception:
+            pass
+
+    def _save(self):
+        tmp = self.path + ".tmp.npz"
+        np.savez(
+            tmp, version=INDEX_VERSION, names=np.array(self.names, dtype=str),
+            mtimes=self.mtimes, sizes=self.sizes, vectors=self.vectors,
+        )
+        os.replace(tmp, self.path)
+
+    def _prepare(self):
+        # 列ごとに標準化してから正規化（コサイン類似度用）
+        v = self.vectors.astype(np.float32)
+        self._mean = v.mean(axis=0) if len(v) else np.zeros(FEATURE_DIM, np.float32)
+        std = v.std(axis=0) if len(v) else np.ones(FEATURE_DIM, np.float32)
+        self._std = np.where(std > 1e-9, std, 1.0).astype(np.float32)
+        self._unit = self._normalize(v)
+        self._pos = {n: i for i, n in enumerate(self.names)}
+        self._stems = np.array([os.path.splitext(n)[0] for n in self.names], dtype=str)
+
+    def _normalize(self, v):
+        z = (v - self._mean) / self._std
+        norm = np.linalg.norm(z, axis=-1, keepdims=True)
+        return z / np.where(norm > 0, norm, 1.0)
+
+    def update(self, workers=None) -> int:
+        """追加・更新・削除されたセッションだけ反映し、変更件数を返す"""
+        current = {}
+        # 両形式で保存したセッションは1件として索引する（Parquet を優先）
+        for p in unique_sessions(list_sessions(self.save_dir)):
+            st = os.stat(p)
+            current[os.path.basename(p)] = (st.st_mtime_ns, st.st_size)
+        keep = [i for i, n in enumerate(self.names)
+                if n in current and current[n] == (int(self.mtimes[i]), int(self.sizes[i]))]
+        known = {self.names[i] for i in keep}
+        todo = sorted(n for n in current if n not in known)
+        removed = len(self.names) - len(keep)
+        if not todo and not removed:
+            return 0
+
+        paths = [os.path.join(self.save_dir, n) for n in todo]
+        new_vecs, new_names = [], []
+        if paths:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for name, vec in zip(todo, pool.map(_safe_features, paths)):
+                    if vec is not None:
+                        new_names.append(name)
+                        new_vecs.append(vec)
+
+        self.names = [self.names[i] for i in keep] + new_names
+        self.mtimes = np.array([current[n][0] for n in self.names], dtype=np.int64)
+        self.sizes = np.array([current[n][1] for n in self.names], dtype=np.int64)
+        old = self.vectors[keep] if keep else np.zeros((0, FEATURE_DIM), np.float32)
+        self.vectors = np.vstack([old] + [v[None, :] for v in new_vecs]).astype(np.float32)
+        self._save()
+        self._prepare()
+        return len(new_names) + removed
+
+    def query(self, vector, k=5, exclude=None):
+        """
+        特徴ベクトルに近い順に (名前, 類似度) を最大 k 件返す
+        exclude はファイル名。拡張子違いの同じセッションも除く
+        """
+        if not self.names:
+            return []
+        q = self._normalize(np.asarray(vector, dtype=np.float32)[None, :])[0]
+        scores = self._unit @ q
+        if exclude is not None:
+            scores[self._stems == os.path.splitext(exclude)[0]] = -np.inf
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.names[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def similar_to(self, path: str, k=5):
+        """セッションに似たセッションを返す（索引済みならベクトルを再計算しない）"""
+        name = os.path.basename(path)
+        i = self._pos.get(name)
+        if i is None:
+            # 別形式のファイルで索引済みならそのベクトルを使う
+            same = np.flatnonzero(self._stems == os.path.splitext(name)[0])
+            i = int(same[0]) if len(same) else None
+        vec = self.vectors[i] if i is not None else session_features(path)
+        return self.query(vec, k=k, exclude=name)
+
+
+def _safe_features(path):
+    try:
+        return session_features(path)
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="似ているセッションを検索")
+    ap.add_argument("save_dir")
+    ap.add_argument("session", nargs="?", help="基準にするセッション（省略時は索引の更新のみ）")
+    ap.add_argument("-k", type=int, default=5)
+    args = ap.parse_args(argv)
+    index = FeatureIndex(args.save_dir)
+    changed = index.update()
+    print(f"索引: {len(index.names)} セッション（更新 {changed} 件）")
+    if args.session:
+        for name, score in index.similar_to(args.session, k=args.k):
+            print(f"{score:+.3f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# analysis/thumbnails.py
+"""
+セッション一覧のスパークライン用プロファイルの計算
+
+保存時に作られなかったセッション（以前のログ、トリガーのクリップ、変換した CSV など）を
+ファイルから読んで計算し、save_dir/.thumbnails.npz に追記する。
+GUI は表示した行の分だけ session_profile() をワーカープールで遅延実行する。
+
+    python -m analysis.thumbnails logs --workers 4
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from loggers.thumbnails import ThumbnailCache, profile_from_frame
+from .session_io import read_session, list_sessions
+
+
+def session_profile(path: str):
+    """セッションファイルから (presses, stick) を計算する"""
+    return profile_from_frame(read_session(path))
+
+
+def safe_session_profile(path: str):
+    """読めないファイルは None（ワーカープール用）"""
+    try:
+        return session_profile(path)
+    except Exception:
+        return None
+
+
+def update_thumbnails(save_dir: str, workers=None, progress=None) -> int:
+    """キャッシュにない・古いセッションだけ計算してキャッシュを更新し、計算した件数を返す"""
+    cache = ThumbnailCache(save_dir)
+    todo = []
+    for p in list_sessions(save_dir):
+        st = os.stat(p)
+        if cache.get(os.path.basename(p), st.st_mtime_ns, st.st_size) is None:
+            todo.append((p, st))
+    done = 0
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(safe_session_profile, [p for p, _ in todo])
+            for i, ((p, st), profile) in enumerate(zip(todo, results), 1):
+                if profile is not None:
+                    cache.put(os.path.basename(p), st.st_mtime_ns, st.st_size, profile)
+                    done += 1
+                if progress:
+                    progress(i, len(todo))
+    cache.save()
+    return done
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="セッション一覧のスパークラインを事前に計算")
+    ap.add_argument("save_dir", nargs="?", default="logs")
+    ap.add_argument("--workers", type=int)
+    args = ap.parse_args(argv)
+    n = update_thumbnails(
+        args.save_dir, workers=args.workers,
+        progress=lambda done, total: print(f"\r{done}/{total}", end="", flush=True),
+    )
+    print()
+    print(f"計算 {n} 件")
+
+
+if __name__ == "__main__":
+    main()
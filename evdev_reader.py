@@ -0,0 +1,466 @@
+import fcntl
+import json
+import os
+import select
+import struct
+import time
+
+# linux/input.h の struct input_event（timeval + type, code, value）
+EVENT = struct.Struct("llHHi")
+ABSINFO = struct.Struct("6i")
+EV_SYN, EV_KEY, EV_ABS = 0x00, 0x01, 0x03
+SYN_REPORT, SYN_DROPPED = 0, 3
+ABS_HAT0X, ABS_HAT0Y = 0x10, 0x11
+ABS_HATS = range(0x10, 0x18)
+BTN_MISC, BTN_JOYSTICK, BTN_GAMEPAD = 0x100, 0x120, 0x130
+KEY_MAX, ABS_MAX = 0x2FF, 0x3F
+CLOCK_MONOTONIC = 1
+
+
+def _ioc(direction, nr, size):
+    return (direction << 30) | (size << 16) | (ord("E") << 8) | nr
+
+
+def EVIOCGNAME(n):
+    return _ioc(2, 0x06, n)
+
+
+def EVIOCGBIT(ev, n):
+    return _ioc(2, 0x20 + ev, n)
+
+
+def EVIOCGABS(code):
+    return _ioc(2, 0x40 + code, ABSINFO.size)
+
+
+def EVIOCGKEY(n):
+    return _ioc(2, 0x18, n)
+
+
+EVIOCSCLOCKID = _ioc(1, 0xA0, 4)
+EVIOCGRAB = _ioc(1, 0x90, 4)
+
+
+def _bits(buf):
+    return [i for i in range(len(buf) * 8) if buf[i // 8] >> (i % 8) & 1]
+
+
+def _ioctl_buf(fd, request, size):
+    buf = bytearray(size)
+    fcntl.ioctl(fd, request, buf, True)
+    return buf
+
+
+class EvdevCaps:
+    """
+    デバイスの能力（軸の範囲・キー）と、InputReader と同じ列への対応付け
+    - 軸: ハット以外の ABS コード順
+    - ボタン: BTN_JOYSTICK 以降、続いて BTN_MISC〜BTN_JOYSTICK（SDL と同じ順）
+    - ハット0 は dpad_up/down/left/right としてボタンの後ろに付ける
+    """
+    def __init__(self, name, abs_info, keys):
+        self.name = name
+        self.abs_info = {int(c): (int(lo), int(hi)) for c, (lo, hi) in abs_info.items()}
+        self.axis_codes = sorted(c for c in self.abs_info if c not in ABS_HATS)
+        keys = sorted(int(k) for k in keys if int(k) >= BTN_MISC)
+        self.button_codes = [k for k in keys if k >= BTN_JOYSTICK] + [k for k in keys if k < BTN_JOYSTICK]
+        self.has_hat = ABS_HAT0X in self.abs_info and ABS_HAT0Y in self.abs_info
+
+    @classmethod
+    def from_fd(cls, fd):
+        name = _ioctl_buf(fd, EVIOCGNAME(256), 256).split(b"\0", 1)[0].decode("utf-8", "replace")
+        abs_codes = _bits(_ioctl_buf(fd, EVIOCGBIT(EV_ABS, ABS_MAX // 8 + 1), ABS_MAX // 8 + 1))
+        abs_info = {}
+        for code in abs_codes:
+            _, lo, hi, _, _, _ = ABSINFO.unpack(_ioctl_buf(fd, EVIOCGABS(code), ABSINFO.size))
+            abs_info[code] = (lo, hi)
+        keys = _bits(_ioctl_buf(fd, EVIOCGBIT(EV_KEY, KEY_MAX // 8 + 1), KEY_MAX // 8 + 1))
+        return cls(name, abs_info, keys)
+
+    def to_json(self) -> dict:
+        return {
+            "name": self.name,
+            "abs": {str(c): list(r) for c, r in self.abs_info.items()},
+            "keys": self.button_codes,
+        }
+
+    @classmethod
+    def from_json(cls, d):
+        return cls(d.get("name", ""), d["abs"], d["keys"])
+
+    def is_gamepad(self):
+        return bool(self.axis_codes) and any(k >= BTN_JOYSTICK for k in self.button_codes)
+
+    def headers(self):
+        headers = ["timestamp"]
+        headers += [f"axis{i}" for i in range(len(self.axis_codes))]
+        headers += [f"button{i}" for i in range(len(self.button_codes))]
+        if self.has_hat:
+            headers += ["dpad_up", "dpad_down", "dpad_left", "dpad_right"]
+        return headers
+
+
+class EvdevDecoder:
+    """
+    input_event のバイト列を状態に反映する
+    SYN_REPORT までの変更をまとめて確定し、確定時刻（カーネルのタイムスタンプ）を返す。
+    SYN_DROPPED 後は次の SYN_REPORT まで捨て、need_resync を立てる。
+    """
+    def __init__(self, caps: EvdevCaps):
+        self.caps = caps
+        self._axis_index = {c: i for i, c in enumerate(caps.axis_codes)}
+        self._button_index = {c: i for i, c in enumerate(caps.button_codes)}
+        self._scale = {}
+        for c in caps.axis_codes:
+            lo, hi = caps.abs_info[c]
+            self._scale[c] = (lo, 2.0 / (hi - lo) if hi > lo else 0.0)
+        self.axes = [0.0] * len(caps.axis_codes)
+        self.buttons = [0] * len(caps.button_codes)
+        self.hat = [0, 0]
+        self._work_axes = list(self.axes)
+        self._work_buttons = list(self.buttons)
+        self._work_hat = [0, 0]
+        self._dropping = False
+        self.need_resync = False
+        self.dropped = 0
+        self._tail = b""
+
+    def norm(self, code, value):
+        lo, k = self._scale[code]
+        return (value - lo) * k - 1.0 if k else 0.0
+
+    def feed(self, data: bytes):
+        """イベント列を反映し、確定した SYN_REPORT の時刻（ns）のリストを返す"""
+        if self._tail:
+            data = self._tail + data
+        n = len(data) - len(data) % EVENT.size
+        self._tail = data[n:]
+        reports = []
+        axis_index, button_index = self._axis_index, self._button_index
+        for sec, usec, etype, code, value in EVENT.iter_unpack(data[:n]):
+            if etype == EV_SYN:
+                if code == SYN_REPORT:
+                    if self._dropping:
+                        self._dropping = False
+                        self.need_resync = True
+                        continue
+                    self.axes = list(self._work_axes)
+                    self.buttons = list(self._work_buttons)
+                    self.hat = list(self._work_hat)
+                    reports.append(sec * 1_000_000_000 + usec * 1000)
+                elif code == SYN_DROPPED:
+                    self._dropping = True
+                    self.dropped += 1
+                continue
+            if self._dropping:
+                continue
+            if etype == EV_ABS:
+                i = axis_index.get(code)
+                if i is not None:
+                    self._work_axes[i] = self.norm(code, value)
+                elif code == ABS_HAT0X:
+                    self._work_hat[0] = value
+                elif code == ABS_HAT0Y:
+                    self._work_hat[1] = value
+            elif etype == EV_KEY:
+                i = button_index.get(code)
+                if i is not None:
+                    self._work_buttons[i] = 1 if value else 0
+        return reports
+
+    def set_state(self, axes, buttons, hat):
+        self.axes, self._work_axes = list(axes), list(axes)
+        self.buttons, self._work_buttons = list(buttons), list(buttons)
+        self.hat, self._work_hat = list(hat), list(hat)
+        self.need_resync = False
+
+    def snapshot(self):
+        buttons = list(self.buttons)
+        if self.caps.has_hat:
+            hx, hy = self.hat
+            buttons += [int(hy < 0), int(hy > 0), int(hx < 0), int(hx > 0)]
+        return list(self.axes), buttons
+
+
+def find_gamepad():
+    """/dev/input/event* から最初のゲームパッドを探す（開けないものは飛ばす）"""
+    try:
+        names = sorted(
+            (n for n in os.listdir("/dev/input") if n.startswith("event")),
+            key=lambda n: int(n[5:]) if n[5:].isdigit() else 0,
+        )
+    except OSError:
+        return None
+    for n in names:
+        path = os.path.join("/dev/input", n)
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError:
+            continue
+        try:
+            if EvdevCaps.from_fd(fd).is_gamepad():
+                return path
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    return None
+
+
+class EvdevReader:
+    """
+    Linux の evdev（/dev/input/event*）を直接読む入力バックエンド（InputReader 互換）
+    - ノンブロッキングでまとめて読み、カーネルのイベント時刻（CLOCK_MONOTONIC）を使う
+      （perf_counter_ns と同じ時計なので他のバックエンドと同じ単位で記録できる）
+    - timestamp は直前の読み取り以降に入力があればその最後の SYN_REPORT の時刻、
+      なければ読み取った時刻
+    - wait(timeout) は次のサンプルまで epoll で待ち、届いた入力はその場でデコードする（スリープの代わり）
+    - 時計を CLOCK_MONOTONIC に切り替えられなかったときはカーネルの時刻を使わず、読み取った時刻で記録する
+    - 抜かれるなどで読めなくなったら disconnected を立て、以降は最後の状態を返す
+    """
+    read_size = EVENT.size * 256
+
+    def __init__(self, device=None, grab=False, collect_events=False):
+        self.clock = time.perf_counter_ns
+        self.device = device or find_gamepad()
+        if not self.device:
+            raise RuntimeError("ゲームパッドが接続されていません")
+        self.fd = os.open(self.device, os.O_RDONLY | os.O_NONBLOCK)
+        self._poll = None
+        try:
+            # 切り替えられなければイベント時刻は CLOCK_REALTIME のままなので perf_counter_ns と混ぜない
+            try:
+                fcntl.ioctl(self.fd, EVIOCSCLOCKID, struct.pack("i", CLOCK_MONOTONIC))
+                self.kernel_clock = True
+            except OSError:
+                self.kernel_clock = False
+            self.disconnected = False
+            if grab:
+                fcntl.ioctl(self.fd, EVIOCGRAB, 1)
+            self.caps = EvdevCaps.from_fd(self.fd)
+            self.decoder = EvdevDecoder(self.caps)
+            self.collect_events = collect_events
+            self._poll = select.epoll() if hasattr(select, "epoll") else None
+            if self._poll is not None:
+                self._poll.register(self.fd, select.EPOLLIN)
+            self._last_ts = 0
+            # wait() の間にデコードした SYN_REPORT の時刻（次の read() で返す）
+            self._reports = []
+            self.last_events = []
+            self.last_pump_ns = 0
+            self.prev_pump_ns = 0
+            self._resync()
+        except Exception:
+            # 開けたデバイスを手放してから伝える
+            self.close()
+            raise
+
+    @property
+    def event_timestamps(self) -> bool:
+        """発生時刻（カーネルのイベント時刻）を遅延計測に使えるか"""
+        return self.kernel_clock
+
+    def close(self):
+        if self._poll is not None:
+            self._poll.close()
+            self._poll = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def _drain(self) -> bytes:
+        chunks = []
+        while True:
+            try:
+                chunk = os.read(self.fd, self.read_size)
+            except BlockingIOError:
+                break
+            except OSError:
+                # ENODEV など（デバイスが抜かれた）
+                self.disconnected = True
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if len(chunk) < self.read_size:
+                break
+        return b"".join(chunks)
+
+    def _resync(self):
+        """現在の状態を ioctl で取り直す（開始時と SYN_DROPPED の後）"""
+        caps = self.caps
+        keys = set(_bits(_ioctl_buf(self.fd, EVIOCGKEY(KEY_MAX // 8 + 1), KEY_MAX // 8 + 1)))
+        value = lambda code: ABSINFO.unpack(_ioctl_buf(self.fd, EVIOCGABS(code), ABSINFO.size))[0]
+        axes = [self.decoder.norm(c, value(c)) for c in caps.axis_codes]
+        buttons = [int(c in keys) for c in caps.button_codes]
+        hat = [value(ABS_HAT0X), value(ABS_HAT0Y)] if caps.has_hat else [0, 0]
+        self.decoder.set_state(axes, buttons, hat)
+
+    def read(self):
+        self.prev_pump_ns = self.last_pump_ns
+        reports, self._reports = self._reports, []
+        if not self.disconnected:
+            reports += self.decoder.feed(self._drain())
+        now = self.clock()
+        self.last_pump_ns = now
+        if self.decoder.need_resync and not self.disconnected:
+            try:
+                self._resync()
+            except OSError:
+                self.disconnected = True
+        if not self.kernel_clock:
+            # 別の時計の時刻は使わない（遅延計測にも渡さない）
+            reports = [now] * len(reports)
+            self.last_events = []
+        else:
+            self.last_events = reports if self.collect_events else []
+        ts = reports[-1] if reports else now
+        # 時刻は単調増加に保つ
+        ts = max(ts, self._last_ts + 1)
+        self._last_ts = ts
+        axes, buttons = self.decoder.snapshot()
+        return ts, axes, buttons
+
+    def _readable(self, timeout) -> bool:
+        """入力があるか timeout 秒経つまで待つ"""
+        if self._poll is not None:
+            return bool(self._poll.poll(timeout))
+        return bool(select.select([self.fd], [], [], timeout)[0])
+
+    def wait(self, timeout):
+        """
+        次のサンプルの時刻（timeout 秒後）まで待ち、入力があったかを返す
+        待つ間に届いた入力はその場でデコードし（カーネルのバッファをあふれさせない）、次の read() で返す。
+        入力が来ても早くは戻らないため、サンプリング間隔は他のバックエンドと同じになる。
+        """
+        if self.disconnected:
+            return False
+        deadline = self.clock() + int(timeout * 1e9)
+        got = False
+        while not self.disconnected:
+            remaining = (deadline - self.clock()) / 1e9
+            if remaining <= 0 or not self._readable(remaining):
+                break
+            self._reports += self.decoder.feed(self._drain())
+            got = True
+        return got
+
+    def get_headers(self):
+        return self.caps.headers()
+
+
+class EvdevDumpReader:
+    """
+    record_dump で保存したイベント列を再生する（実機なしでの検証用、EvdevReader 互換）
+    - realtime=False: read() ごとに SYN_REPORT 1つぶん進める（決定的）
+    - realtime=True: 記録時の間隔どおりにイベントを出す
+    - 最後まで出し切った後の read() で disconnected を立てる（LoggerWorker は切断と同じく記録を終える）
+    """
+    def __init__(self, path, realtime=False, collect_events=False):
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            data = f.read()
+        self.caps = EvdevCaps.from_json(header["caps"])
+        self.decoder = EvdevDecoder(self.caps)
+        self.realtime = realtime
+        self.collect_events = collect_events
+        self.clock = time.perf_counter_ns
+        n = len(data) - len(data) % EVENT.size
+        self._events = [data[i:i + EVENT.size] for i in range(0, n, EVENT.size)]
+        self._pos = 0
+        self._start_ns = None
+        self._first_ns = None
+        self._last_ts = 0
+        self.disconnected = False
+        self.last_events = []
+        self.last_pump_ns = 0
+        self.prev_pump_ns = 0
+
+    @staticmethod
+    def _event_ns(raw):
+        sec, usec, _, _, _ = EVENT.unpack(raw)
+        return sec * 1_000_000_000 + usec * 1000
+
+    def finished(self):
+        return self._pos >= len(self._events)
+
+    def close(self):
+        pass
+
+    def _take(self):
+        events = self._events
+        if self.realtime:
+            now = self.clock()
+            if self._start_ns is None:
+                self._start_ns = now
+                self._first_ns = self._event_ns(events[0]) if events else 0
+            limit = self._first_ns + (now - self._start_ns)
+            end = self._pos
+            while end < len(events) and self._event_ns(events[end]) <= limit:
+                end += 1
+        else:
+            end = self._pos
+            while end < len(events):
+                _, _, etype, code, _ = EVENT.unpack(events[end])
+                end += 1
+                if etype == EV_SYN and code == SYN_REPORT:
+                    break
+        chunk = b"".join(events[self._pos:end])
+        self._pos = end
+        return chunk
+
+    def read(self):
+        if self.finished():
+            self.disconnected = True
+        self.prev_pump_ns = self.last_pump_ns
+        reports = self.decoder.feed(self._take())
+        if self.realtime:
+            now = self.clock()
+        else:
+            now = reports[-1] if reports else self._last_ts + 1
+        self.last_pump_ns = now
+        if self.decoder.need_resync:
+            # 記録からは状態を取り直せないので、そのまま続ける
+            self.decoder.need_resync = False
+        self.last_events = reports if self.collect_events else []
+        ts = max(reports[-1] if reports else now, self._last_ts + 1)
+        self._last_ts = ts
+        axes, buttons = self.decoder.snapshot()
+        return ts, axes, buttons
+
+    def wait(self, timeout):
+        if not self.realtime:
+            return True
+        time.sleep(timeout)
+        return True
+
+    def get_headers(self):
+        return self.caps.headers()
+
+
+def record_dump(path, device=None, seconds=10.0):
+    """
+    デバイスのイベント列をそのまま保存する（1行目に能力の JSON、続けて input_event の生バイト列）
+    EvdevDumpReader で再生できる。
+    """
+    reader = EvdevReader(device)
+    try:
+        end = time.monotonic() + seconds
+        with open(path, "wb") as f:
+            f.write(json.dumps({"caps": reader.caps.to_json(), "device": reader.device}).encode("utf-8") + b"\n")
+            while time.monotonic() < end:
+                if reader._readable(min(0.1, max(0.0, end - time.monotonic()))):
+                    f.write(reader._drain())
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="evdev のイベント列を記録する")
+    ap.add_argument("out")
+    ap.add_argument("--device")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    args = ap.parse_args()
+    record_dump(args.out, args.device, args.seconds)
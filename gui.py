@@ -1,65 +1,116 @@
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QPushButton, QVBoxLayout, QLabel, QFileDialog,
     QDialog, QFormLayout, QHBoxLayout, QLineEdit, QComboBox,
-    QDoubleSpinBox, QListWidget, QListWidgetItem, QTabWidget, QToolBar,
+    QDoubleSpinBox, QTabWidget, QToolBar,
     QStatusBar, QSystemTrayIcon, QMenu, QStyle, QSplitter, QFrame,
     QSizePolicy, QSpacerItem, QAbstractItemView, QTableView, QHeaderView, QMessageBox,
-    QGroupBox, QRadioButton, QSlider, QButtonGroup
+    QGroupBox, QRadioButton, QSlider, QButtonGroup, QSpinBox, QCheckBox, QListView,
+    QStyledItemDelegate, QStyleOptionViewItem
+)
+from PySide6.QtCore import (
+    QThread, Signal, QTimer, Qt, QSize, QAbstractTableModel, QAbstractListModel, QModelIndex,
+    QRect, QRectF, QPointF, QEvent, QFileSystemWatcher
+)
+from PySide6.QtGui import (
+    QIcon, QGuiApplication, QAction, QShortcut, QKeySequence, QPainter, QColor, QPen, QBrush, QPolygonF
 )
-from PySide6.QtCore import QThread, Signal, QTimer, Qt, QSize, QAbstractTableModel, QModelIndex
-from PySide6.QtGui import QIcon, QGuiApplication, QAction, QShortcut, QKeySequence
 
 import time
 import os
 import json
+import bisect
+import numpy as np
 import pandas as pd
 import datetime
 import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 from loggers.logger_worker import LoggerWorker
+from loggers.companions import is_session_file
+from loggers.live_state import LatestState, SampleRing
+from loggers.save_queue import SaveQueue
+from loggers.thumbnails import ThumbnailCache
+from analysis.thumbnails import safe_session_profile
+from analysis.session_reader import SessionReader
+from analysis.csv_ingest import read_csv_fast
 
 # PySide6用ラッパースレッド
+# ワーカーが毎サンプル送る定期ステータスの接頭辞（これ以外は一度きりの通知）
+PERIODIC_STATUS = "記録中"
+
+
 class LoggerWorkerThread(QThread):
     status = Signal(str)
-    update = Signal(object, object)  # axes, buttons
 
-    def __init__(self, filepath, interval=0.01, format="parquet"):
+    def __init__(self, filepath, interval=0.01, format="parquet", export_metrics=False, profile=False,
+                 timeline_seconds=10.0, backend="pygame", latency_mode=False, adaptive=None,
+                 save_queue=None, rollup_window=1.0, telemetry=None, reader_options=None, trigger=None,
+                 realtime=None):
         super().__init__()
-        self.worker = LoggerWorker(filepath, interval, format=format)
+        self.worker = LoggerWorker(
+            filepath, interval, format=format, export_metrics=export_metrics, profile=profile,
+            backend=backend, latency_mode=latency_mode, adaptive=adaptive, save_queue=save_queue,
+            rollup_window=rollup_window, telemetry=telemetry, reader_options=reader_options,
+            trigger=trigger, realtime=realtime,
+        )
+        # 入力表示は共有スロットを GUI 側がポーリング（サンプル毎のシグナルなし）
+        self.latest = LatestState()
+        # タイムライン表示用のリング（表示秒数ぶん＋余裕、最大100万サンプル）
+        if adaptive is not None:
+            interval = min(interval, float(adaptive.get("active_interval", interval)))
+        capacity = min(1_000_000, int(timeline_seconds / max(interval, 0.001) * 1.5) + 64)
+        self.ring = SampleRing(capacity)
         self._running = False
 
     def run(self):
         self._running = True
-        last_update = 0.0
         last_status = 0.0
 
         def status_callback(msg):
             nonlocal last_status
+            # 記録中の定期ステータスは約2Hzで送信（切断・停止などの通知は間引かない）
+            if not msg.startswith(PERIODIC_STATUS):
+                self.status.emit(msg)
+                return
             now = time.time()
-            # ステータスは約2Hzで送信
             if now - last_status >= 0.5:
                 self.status.emit(msg)
                 last_status = now
 
-        def update_callback(axes, buttons):
-            nonlocal last_update
-            now = time.time()
-            # 入力更新は約30Hzで送信
-            if now - last_update >= (1.0 / 30.0):
-                self.update.emit(axes, buttons)
-                last_update = now
-
         def sleep_func(interval):
             # 最低1msはスリープ
             self.msleep(max(1, int(interval * 1000)))
 
+        publish = self.latest.publish
+        append = self.ring.append
+
+        def update_callback(axes, buttons):
+            publish(axes, buttons)
+            append(axes, buttons)
+
         self.worker.running = True
         self.worker.run(status_callback, update_callback, sleep_func)
         self._running = False
 
+    def fire_trigger(self):
+        self.worker.fire_trigger()
+
+    def set_gui_attached(self, attached: bool):
+        # 非表示中は入力表示・ステータスへの受け渡しを止める（記録は継続）
+        self.worker.gui_attached = attached
+
     def stop(self):
         self.worker.stop()
 
+# ディスプレイのリフレッシュレート（取得できなければ60Hz）
+def display_max_refresh():
+    try:
+        hz = QGuiApplication.primaryScreen().refreshRate()
+    except Exception:
+        hz = 0.0
+    return hz if hz and hz > 0 else 60.0
+
 # 設定の読み書きヘルパー
 CONFIG_PATH = "config.json"
 
@@ -77,6 +128,260 @@ def save_config(cfg):
     except Exception:
         pass
 
+# スティックの8方向判定
+def stick_dir(x, y):
+    if abs(x) < 0.4 and abs(y) < 0.4:
+        return None
+    dirs = [
+        ("↑",    y < -0.7 and abs(x) < 0.5),
+        ("↓",    y >  0.7 and abs(x) < 0.5),
+        ("←",    x < -0.7 and abs(y) < 0.5),
+        ("→",    x >  0.7 and abs(y) < 0.5),
+        ("↖",    x < -0.5 and y < -0.5),
+        ("↗",    x >  0.5 and y < -0.5),
+        ("↙",    x < -0.5 and y >  0.5),
+        ("↘",    x >  0.5 and y >  0.5),
+    ]
+    for label, cond in dirs:
+        if cond:
+            return label
+    return None
+
+def active_key_labels(axes, buttons):
+    """入力状態から表示用のキーラベル一覧を作る"""
+    active_keys = []
+
+    # 左スティック（axes[0], axes[1]）8方向判定
+    if len(axes) >= 2:
+        dir_l = stick_dir(axes[0], axes[1])
+        if dir_l:
+            active_keys.append(f"左スティック:{dir_l}")
+
+    # 右スティック（axes[2], axes[3]）8方向判定
+    if len(axes) >= 4:
+        dir_r = stick_dir(axes[2], axes[3])
+        if dir_r:
+            active_keys.append(f"右スティック:{dir_r}")
+
+    # D-Pad（buttons配列末尾4つ: up, down, left, right）＋斜め判定
+    if len(buttons) >= 4:
+        up, down, left, right = buttons[-4], buttons[-3], buttons[-2], buttons[-1]
+        # 斜め判定
+        if up and left:
+            active_keys.append("D-Pad:↖")
+        if up and right:
+            active_keys.append("D-Pad:↗")
+        if down and left:
+            active_keys.append("D-Pad:↙")
+        if down and right:
+            active_keys.append("D-Pad:↘")
+        # 単方向
+        if up and not (left or right):
+            active_keys.append("D-Pad:↑")
+        if down and not (left or right):
+            active_keys.append("D-Pad:↓")
+        if left and not (up or down):
+            active_keys.append("D-Pad:←")
+        if right and not (up or down):
+            active_keys.append("D-Pad:→")
+
+    # ボタン入力（ボタン数に応じて動的ラベル）
+    for i, pressed in enumerate(buttons):
+        if pressed and i < 12:
+            active_keys.append(f"Btn{i+1}")
+    return active_keys
+
+# QPainter で描画する仮想コントローラ
+class ControllerWidget(QWidget):
+    """
+    スティック位置・トリガーバー・ボタンランプを直接描画するウィジェット
+    - set_state() で要素ごとに前回描画との差分を取り、変化した矩形だけ update()
+    - 描画時間が予算を続けて超えたらアンチエイリアスを切って負荷を下げ、
+      十分に余裕がある状態が続いたら戻す（リサイズや初回描画の1回だけでは切り替えない）
+    """
+    FRAME_BUDGET = 0.002  # 秒
+    # 何フレーム続けて予算を超えたら画質を下げるか
+    DEGRADE_AFTER = 5
+    # 平均が予算のこの割合を下回る状態が何フレーム続いたら画質を戻すか
+    RESTORE_RATIO = 0.3
+    RESTORE_AFTER = 120
+    MAX_LAMPS = 12
+
+    BG = QColor(30, 33, 36)
+    FG = QColor(176, 190, 197)
+    ACTIVE = QColor(229, 115, 115)
+    IDLE = QColor(55, 60, 66)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(480, 160)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self._axes = ()
+        self._buttons = ()
+        self._drawn = {}
+        self._rects = {}
+        self._antialias = True
+        self.last_paint_cost = 0.0
+        # 描画時間の移動平均と、予算超過/余裕の連続回数
+        self.avg_paint_cost = 0.0
+        self._over_count = 0
+        self._under_count = 0
+
+    def resizeEvent(self, event):
+        self._layout()
+        self._drawn.clear()
+        super().resizeEvent(event)
+
+    def _layout(self):
+        w, h = self.width(), self.height()
+        m = 12
+        s = max(40, min(h - 2 * m, int(w * 0.22)))
+        top = (h - s) // 2
+        x = m
+        rects = {}
+        rects["ls"] = QRect(x, top, s, s)
+        x += s + m
+        rects["rs"] = QRect(x, top, s, s)
+        x += s + m
+        bar_w = max(10, s // 6)
+        rects["lt"] = QRect(x, top, bar_w, s)
+        x += bar_w + m // 2
+        rects["rt"] = QRect(x, top, bar_w, s)
+        x += bar_w + m
+        d = max(30, int(s * 0.8))
+        rects["dpad"] = QRect(x, top + (s - d) // 2, d, d)
+        x += d + m
+        # ボタンランプは 4列 x 3行
+        cols, rows = 4, 3
+        cell = max(12, min((w - x - m) // cols, s // rows))
+        for i in range(self.MAX_LAMPS):
+            r, c = divmod(i, cols)
+            rects[i] = QRect(x + c * cell, top + r * cell, cell, cell)
+        self._rects = rects
+
+    def _element_states(self, axes, buttons):
+        """要素ごとの描画状態（ピクセル単位で量子化）"""
+        rects = self._rects
+        states = {}
+        for key, ix, iy in (("ls", 0, 1), ("rs", 2, 3)):
+            r = rects[key].width() / 2 - 6
+            if len(axes) > iy:
+                states[key] = (int(axes[ix] * r), int(axes[iy] * r))
+            else:
+                states[key] = None
+        for key, ia in (("lt", 4), ("rt", 5)):
+            if len(axes) > ia:
+                states[key] = int((axes[ia] + 1.0) * 0.5 * rects[key].height())
+            else:
+                states[key] = None
+        states["dpad"] = tuple(bool(b) for b in buttons[-4:]) if len(buttons) >= 4 else None
+        for i in range(self.MAX_LAMPS):
+            states[i] = (bool(buttons[i]) if i < len(buttons) else None)
+        return states
+
+    def set_state(self, axes, buttons):
+        self._axes = axes
+        self._buttons = buttons
+        if not self._rects:
+            self._layout()
+        states = self._element_states(axes, buttons)
+        drawn = self._drawn
+        for key, st in states.items():
+            if drawn.get(key, ()) != st:
+                drawn[key] = st
+                self.update(self._rects[key])
+
+    def paintEvent(self, event):
+        t0 = time.perf_counter()
+        if not self._rects:
+            self._layout()
+        p = QPainter(self)
+        p.setRenderHint(QPainter.Antialiasing, self._antialias)
+        region = event.region()
+        p.fillRect(event.rect(), self.BG)
+        states = self._element_states(self._axes, self._buttons)
+        for key, rect in self._rects.items():
+            if not region.intersects(rect):
+                continue
+            st = states.get(key)
+            if key in ("ls", "rs"):
+                self._draw_stick(p, rect, st)
+            elif key in ("lt", "rt"):
+                self._draw_trigger(p, rect, st)
+            elif key == "dpad":
+                self._draw_dpad(p, rect, st)
+            else:
+                self._draw_lamp(p, rect, key, st)
+        p.end()
+        self.last_paint_cost = cost = time.perf_counter() - t0
+        self.avg_paint_cost += (cost - self.avg_paint_cost) * 0.1
+        # 予算超過が続く環境では画質より更新レートを優先
+        if self._antialias:
+            self._over_count = self._over_count + 1 if cost > self.FRAME_BUDGET else 0
+            if self._over_count >= self.DEGRADE_AFTER:
+                self._antialias = False
+                self._over_count = 0
+                self._under_count = 0
+        else:
+            # アンチエイリアスなしでも余裕が大きい状態が続けば戻す
+            if self.avg_paint_cost < self.FRAME_BUDGET * self.RESTORE_RATIO:
+                self._under_count += 1
+            else:
+                self._under_count = 0
+            if self._under_count >= self.RESTORE_AFTER:
+                self._antialias = True
+                self._under_count = 0
+                self.update()
+
+    def _draw_stick(self, p, rect, st):
+        p.setPen(QPen(self.FG, 1))
+        p.setBrush(Qt.NoBrush)
+        inner = rect.adjusted(2, 2, -2, -2)
+        p.drawEllipse(inner)
+        c = QPointF(rect.center())
+        p.drawLine(QPointF(inner.left(), c.y()), QPointF(inner.right(), c.y()))
+        p.drawLine(QPointF(c.x(), inner.top()), QPointF(c.x(), inner.bottom()))
+        if st is None:
+            return
+        dx, dy = st
+        active = abs(dx) > 2 or abs(dy) > 2
+        p.setPen(Qt.NoPen)
+        p.setBrush(QBrush(self.ACTIVE if active else self.FG))
+        p.drawEllipse(QPointF(c.x() + dx, c.y() + dy), 6, 6)
+
+    def _draw_trigger(self, p, rect, st):
+        p.setPen(QPen(self.FG, 1))
+        p.setBrush(QBrush(self.IDLE))
+        p.drawRect(rect.adjusted(0, 0, -1, -1))
+        if st:
+            fill = QRect(rect.left(), rect.bottom() - st + 1, rect.width(), st)
+            p.fillRect(fill, self.ACTIVE)
+
+    def _draw_dpad(self, p, rect, st):
+        t = rect.width() / 3.0
+        x, y = rect.left(), rect.top()
+        cells = (
+            QRectF(x + t, y, t, t),          # up
+            QRectF(x + t, y + 2 * t, t, t),  # down
+            QRectF(x, y + t, t, t),          # left
+            QRectF(x + 2 * t, y + t, t, t),  # right
+        )
+        p.setPen(QPen(self.FG, 1))
+        for i, cell in enumerate(cells):
+            on = bool(st and st[i])
+            p.setBrush(QBrush(self.ACTIVE if on else self.IDLE))
+            p.drawRect(cell)
+
+    def _draw_lamp(self, p, rect, index, st):
+        if st is None:
+            return
+        r = rect.adjusted(3, 3, -3, -3)
+        p.setPen(QPen(self.FG, 1))
+        p.setBrush(QBrush(self.ACTIVE if st else self.IDLE))
+        p.drawEllipse(r)
+        p.setPen(QPen(QColor(255, 255, 255) if st else self.FG, 1))
+        p.drawText(r, Qt.AlignCenter, str(index + 1))
+
 # 入力キー表示用ビュー（改良）
 class InputDisplayView(QWidget):
     def __init__(self, parent=None):
@@ -87,82 +392,209 @@ class InputDisplayView(QWidget):
         title.setStyleSheet("font-size:14px; font-weight:600;")
         root.addWidget(title)
 
+        self.controller = ControllerWidget()
+        root.addWidget(self.controller, 1)
+
         self.label = QLabel("")
         self.label.setStyleSheet(
-            "font-size:28px; color:#E57373; font-weight:700;"
+            "font-size:20px; color:#E57373; font-weight:700;"
             "padding:8px; border-radius:8px; background:rgba(255,255,255,0.05);"
         )
-        self.label.setWordWrap(True)
-        self.label.setAlignment(Qt.AlignLeft | Qt.AlignTop)
-        root.addWidget(self.label, 1)
+        self.label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        root.addWidget(self.label)
 
-        self.axes_label = QLabel("Axes: []")
-        self.axes_label.setStyleSheet("color:#B0BEC5;")
-        root.addWidget(self.axes_label)
+        # 最後に描画した状態（差分更新用）
+        self._last_axes = None
+        self._last_buttons = None
+        self._last_text = ""
 
     def update_view(self, axes, buttons):
-        active_keys = []
+        # 前回描画と同じ入力なら何もしない
+        if axes == self._last_axes and buttons == self._last_buttons:
+            return
+        self._last_axes = axes
+        self._last_buttons = buttons
+
+        self.controller.set_state(axes, buttons)
+        text = "  ".join(active_key_labels(axes, buttons))
+        if text != self._last_text:
+            self._last_text = text
+            self.label.setText(text)
+
+# 直近 N 秒の入力タイムライン（軸ごとの min/max 帯＋ボタンラスタ）
+class TimelinePlot(QWidget):
+    """
+    SampleRing の直近区間を列ごとに min/max 間引きして描画する
+    - 列数は幅で決まるため、サンプリングレートに関係なく描画コストは一定
+    - 間引き結果のバッファは幅が変わったときだけ確保し直す
+    """
+    BG = QColor(30, 33, 36)
+    GRID = QColor(55, 60, 66)
+    AXIS = QColor(94, 156, 255)
+    BUTTON = QColor(229, 115, 115)
+    MAX_COLS = 400
+    BUTTON_ROW = 5
+
+    def __init__(self, seconds=10.0, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(160)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.seconds = float(seconds)
+        self._ring = None
+        self._last_count = -1
+        self._shape = None
+        self._cols = 0
+
+    def set_ring(self, ring):
+        self._ring = ring
+        self._last_count = -1
+        self._shape = None
+        self.update()
+
+    def set_seconds(self, seconds):
+        self.seconds = max(1.0, float(seconds))
+        self.update()
+
+    def refresh(self):
+        """新しいサンプルがあるときだけ再描画を要求"""
+        ring = self._ring
+        if ring is None or ring.count == self._last_count:
+            return
+        self._last_count = ring.count
+        self.update()
 
-        # 左スティック（axes[0], axes[1]）8方向判定
-        def stick_dir(x, y):
-            if abs(x) < 0.4 and abs(y) < 0.4:
-                return None
-            dirs = [
-                ("↑",    y < -0.7 and abs(x) < 0.5),
-                ("↓",    y >  0.7 and abs(x) < 0.5),
-                ("←",    x < -0.7 and abs(y) < 0.5),
-                ("→",    x >  0.7 and abs(y) < 0.5),
-                ("↖",    x < -0.5 and y < -0.5),
-                ("↗",    x >  0.5 and y < -0.5),
-                ("↙",    x < -0.5 and y >  0.5),
-                ("↘",    x >  0.5 and y >  0.5),
-            ]
-            for label, cond in dirs:
-                if cond:
-                    return label
-            return None
+    def _ensure_buffers(self, cols, n_axes, n_buttons):
+        shape = (cols, n_axes, n_buttons)
+        if shape == self._shape:
+            return
+        self._shape = shape
+        self._amin = np.empty((cols, n_axes), dtype=np.float32)
+        self._amax = np.empty((cols, n_axes), dtype=np.float32)
+        self._bmax = np.empty((cols, n_buttons), dtype=np.uint8)
+        self._tcol = np.empty(cols, dtype=np.float64)
+        self._xs = np.empty(cols, dtype=np.float64)
+
+    def _decimate(self, t, axes, buttons, cols):
+        """等サンプル数のバケットに分けて min/max を取る（戻り値は有効列数）"""
+        n = len(t)
+        bucket = max(1, -(-n // cols))
+        m = n // bucket
+        if m == 0:
+            return 0
+        start = n - m * bucket
+        a = axes[start:].reshape(m, bucket, axes.shape[1])
+        np.min(a, axis=1, out=self._amin[:m])
+        np.max(a, axis=1, out=self._amax[:m])
+        b = buttons[start:].reshape(m, bucket, buttons.shape[1])
+        np.max(b, axis=1, out=self._bmax[:m])
+        np.copyto(self._tcol[:m], t[start + bucket - 1::bucket])
+        return m
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        p.fillRect(self.rect(), self.BG)
+        ring = self._ring
+        data = ring.window(self.seconds) if ring is not None else None
+        if data is None:
+            p.setPen(QPen(self.GRID, 1))
+            p.drawText(self.rect(), Qt.AlignCenter, "記録中の入力がここに表示されます")
+            p.end()
+            return
+        t, axes, buttons = data
+        w, h = self.width(), self.height()
+        cols = max(1, min(self.MAX_COLS, w))
+        n_axes, n_buttons = axes.shape[1], buttons.shape[1]
+        self._ensure_buffers(cols, n_axes, n_buttons)
+        m = self._decimate(t, axes, buttons, cols)
+        if m == 0:
+            p.end()
+            return
+
+        # 時刻 → x 座標（右端が現在）
+        xs = self._xs[:m]
+        np.subtract(self._tcol[:m], ring.now() - self.seconds, out=xs)
+        np.multiply(xs, w / self.seconds, out=xs)
+
+        raster_h = n_buttons * self.BUTTON_ROW
+        lane_h = max(8.0, (h - raster_h - 4) / max(1, n_axes))
+        col_w = max(1.0, w / cols)
+
+        # 軸ごとの min/max 帯
+        p.setRenderHint(QPainter.Antialiasing, False)
+        p.setPen(Qt.NoPen)
+        p.setBrush(QBrush(self.AXIS))
+        xl = xs.tolist()
+        for j in range(n_axes):
+            top = j * lane_h
+            mid = top + lane_h / 2
+            half = lane_h / 2 - 1
+            p.fillRect(QRectF(0, mid, w, 1), self.GRID)
+            lo = self._amin[:m, j].tolist()
+            hi = self._amax[:m, j].tolist()
+            for x, a0, a1 in zip(xl, lo, hi):
+                y0 = mid - a1 * half
+                p.drawRect(QRectF(x - col_w, y0, col_w, max(1.0, (a1 - a0) * half)))
+
+        # ボタンラスタ（押下区間を連続列ごとにまとめて描画）
+        base = h - raster_h
+        for b in range(n_buttons):
+            y = base + b * self.BUTTON_ROW
+            pressed = np.flatnonzero(self._bmax[:m, b])
+            if not len(pressed):
+                continue
+            run_start = prev = int(pressed[0])
+            for c in pressed[1:].tolist() + [None]:
+                if c is not None and c == prev + 1:
+                    prev = c
+                    continue
+                x0 = xl[run_start] - col_w
+                x1 = xl[prev]
+                p.fillRect(QRectF(x0, y, max(1.0, x1 - x0), self.BUTTON_ROW - 1), self.BUTTON)
+                if c is not None:
+                    run_start = prev = c
+        p.end()
+
+# パフォーマンス表示パネル
+class PerformancePanel(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._metrics = None
+        root = QHBoxLayout(self)
+        root.setContentsMargins(0, 0, 0, 0)
+        self.label = QLabel("Hz: -")
+        self.label.setStyleSheet("color:#B0BEC5; font-family:monospace;")
+        self.export_btn = QPushButton("JSONL保存")
+        self.export_btn.setEnabled(False)
+        self.export_btn.clicked.connect(self._export)
+        root.addWidget(self.label, 1)
+        root.addWidget(self.export_btn)
 
-        if len(axes) >= 2:
-            dir_l = stick_dir(axes[0], axes[1])
-            if dir_l:
-                active_keys.append(f"左スティック:{dir_l}")
-
-        # 右スティック（axes[2], axes[3]）8方向判定
-        if len(axes) >= 4:
-            dir_r = stick_dir(axes[2], axes[3])
-            if dir_r:
-                active_keys.append(f"右スティック:{dir_r}")
-
-        # D-Pad（buttons配列末尾4つ: up, down, left, right）＋斜め判定
-        if len(buttons) >= 4:
-            up, down, left, right = buttons[-4], buttons[-3], buttons[-2], buttons[-1]
-            # 斜め判定
-            if up and left:
-                active_keys.append("D-Pad:↖")
-            if up and right:
-                active_keys.append("D-Pad:↗")
-            if down and left:
-                active_keys.append("D-Pad:↙")
-            if down and right:
-                active_keys.append("D-Pad:↘")
-            # 単方向
-            if up and not (left or right):
-                active_keys.append("D-Pad:↑")
-            if down and not (left or right):
-                active_keys.append("D-Pad:↓")
-            if left and not (up or down):
-                active_keys.append("D-Pad:←")
-            if right and not (up or down):
-                active_keys.append("D-Pad:→")
-
-        # ボタン入力（ボタン数に応じて動的ラベル）
-        for i, pressed in enumerate(buttons):
-            if pressed and i < 12:
-                active_keys.append(f"Btn{i+1}")
-
-        text = "  ".join(active_keys) if active_keys else ""
-        self.label.setText(text)
-        self.axes_label.setText(f"Axes: {[round(a,3) for a in axes]}")
+    def set_metrics(self, metrics):
+        self._metrics = metrics
+        self.export_btn.setEnabled(metrics is not None)
+
+    def refresh(self):
+        if self._metrics is None:
+            return
+        s = self._metrics.snapshot()
+        self.label.setText(
+            f"Hz: {s['achieved_hz']:.1f}  "
+            f"read p99: {s['read']['p99_ms']:.2f}ms  "
+            f"log p99: {s['log']['p99_ms']:.2f}ms  "
+            f"cb p99: {s['callback']['p99_ms']:.2f}ms  "
+            f"遅延: {s['late_ticks']}  ドロップ: {s['dropped_ticks']}  "
+            f"バッファ: {s['buffer_depth']}  書込: {s['bytes_written']}B"
+        )
+
+    def _export(self):
+        if self._metrics is None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "メトリクスを保存", "metrics.jsonl", "JSON Lines (*.jsonl)")
+        if path:
+            try:
+                self._metrics.export_jsonl(path)
+            except Exception as e:
+                QMessageBox.warning(self, "保存失敗", f"保存に失敗しました:\n{e}")
 
 # 設定ダイアログ
 class SettingsDialog(QDialog):
@@ -477,6 +909,11 @@ class SettingsPanel(QWidget):
         (self.radio_parquet if fmt == "parquet" else self.radio_csv).setChecked(True)
         f_l.addWidget(self.radio_parquet)
         f_l.addWidget(self.radio_csv)
+        # もう一方の形式も同じ記録から同時に保存
+        self.chk_both = QCheckBox("両方の形式で保存")
+        self.chk_both.setChecked(bool(self._cfg.get("extra_formats")))
+        f_l.addSpacing(12)
+        f_l.addWidget(self.chk_both)
         f_l.addStretch(1)
         gb_format.setLayout(f_l)
         root.addWidget(gb_format)
@@ -532,6 +969,18 @@ class SettingsPanel(QWidget):
         gb_sample.setLayout(s_l)
         root.addWidget(gb_sample)
 
+        # 表示更新レート（ディスプレイのリフレッシュレートまで）
+        gb_refresh = QGroupBox("表示更新レート")
+        r_l = QHBoxLayout()
+        self.spin_refresh = QSpinBox()
+        self.spin_refresh.setRange(10, max(10, int(display_max_refresh())))
+        self.spin_refresh.setSuffix(" Hz")
+        self.spin_refresh.setValue(int(self._cfg.get("display_refresh_hz", 30)))
+        r_l.addWidget(self.spin_refresh)
+        r_l.addStretch(1)
+        gb_refresh.setLayout(r_l)
+        root.addWidget(gb_refresh)
+
         # ボタン
         btns = QHBoxLayout()
         self.btn_apply = QPushButton("適用")
@@ -607,9 +1056,12 @@ class SettingsPanel(QWidget):
     def _apply(self):
         cfg = load_config()
         cfg["log_format"] = "parquet" if self.radio_parquet.isChecked() else "csv"
+        cfg["extra_formats"] = ([("csv" if cfg["log_format"] == "parquet" else "parquet")]
+                                if self.chk_both.isChecked() else [])
         cfg["save_dir"] = self.edit_dir.text().strip() or "logs"
         cfg["filename_template"] = self.edit_tmpl.text().strip() or "%Y%m%d_%H%M%S"
         cfg["sample_interval"] = float(self.spin_sec.value())
+        cfg["display_refresh_hz"] = int(self.spin_refresh.value())
         try:
             os.makedirs(cfg["save_dir"], exist_ok=True)
         except Exception:
@@ -621,9 +1073,11 @@ class SettingsPanel(QWidget):
         cfg = load_config()
         self.radio_parquet.setChecked(cfg.get("log_format", "parquet") == "parquet")
         self.radio_csv.setChecked(cfg.get("log_format", "parquet") == "csv")
+        self.chk_both.setChecked(bool(cfg.get("extra_formats")))
         self.edit_dir.setText(cfg.get("save_dir", "logs"))
         self.edit_tmpl.setText(cfg.get("filename_template", "%Y%m%d_%H%M%S"))
         self.spin_sec.setValue(float(cfg.get("sample_interval", 0.02)))
+        self.spin_refresh.setValue(int(cfg.get("display_refresh_hz", 30)))
         self._update_preview()
         self._update_dir_status()
         self._update_hz()
@@ -631,23 +1085,359 @@ class SettingsPanel(QWidget):
     def _defaults(self):
         self.radio_parquet.setChecked(True)
         self.radio_csv.setChecked(False)
+        self.chk_both.setChecked(False)
         self.edit_dir.setText("logs")
         self.edit_tmpl.setText("%Y%m%d_%H%M%S")
         self.spin_sec.setValue(0.02)
+        self.spin_refresh.setValue(30)
         self._update_preview()
         self._update_dir_status()
         self._update_hz()
 
+# セッション再生（インデックス付きシーク）
+class ReplayPanel(QWidget):
+    SPEEDS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._path = None
+        self._reader = None
+        self._pos = 0.0
+        self._clock = 0.0
+        self._last_row = -1
+        # 非表示にしたときに再生中だったか
+        self._resume = False
+
+        root = QVBoxLayout(self)
+        self.info = QLabel("再生: -")
+        self.info.setStyleSheet("color:#B0BEC5;")
+        root.addWidget(self.info)
+        self.view = InputDisplayView()
+        root.addWidget(self.view, 1)
+
+        ctl = QHBoxLayout()
+        self.play_btn = QPushButton("再生")
+        self.speed_box = QComboBox()
+        self.speed_box.addItems([f"{sp:g}x" for sp in self.SPEEDS])
+        self.speed_box.setCurrentIndex(self.SPEEDS.index(1.0))
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setRange(0, 0)
+        self.time_label = QLabel("0.00 / 0.00 秒")
+        self.time_label.setStyleSheet("color:#B0BEC5; font-family:monospace;")
+        ctl.addWidget(self.play_btn)
+        ctl.addWidget(self.speed_box)
+        ctl.addWidget(self.slider, 1)
+        ctl.addWidget(self.time_label)
+        root.addLayout(ctl)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(16)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+        self.play_btn.clicked.connect(self.toggle_play)
+        self.slider.sliderMoved.connect(self._on_seek)
+        self.slider.sliderPressed.connect(lambda: self._on_seek(self.slider.value()))
+
+    def set_path(self, path):
+        self.pause()
+        if self._reader:
+            self._reader.close()
+        self._reader = None
+        self._path = path
+        self._pos = 0.0
+        self._last_row = -1
+        self.slider.setRange(0, 0)
+        self.info.setText(f"再生: {os.path.basename(path)}" if path else "再生: -")
+        # インデックス作成は再生タブが表示されたときに行う
+        if path and self.isVisible():
+            self._ensure_reader()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._ensure_reader()
+
+    def hideEvent(self, event):
+        self.pause()
+        super().hideEvent(event)
+
+    def _ensure_reader(self):
+        if self._reader is not None or not self._path or not os.path.exists(self._path):
+            return self._reader is not None
+        try:
+            self._reader = SessionReader(self._path)
+        except Exception as e:
+            self.info.setText(f"再生不可: {os.path.basename(self._path)} ({e})")
+            return False
+        self.slider.setRange(0, int(self._reader.duration * 1000))
+        self.info.setText(f"再生: {os.path.basename(self._path)} ({self._reader.num_rows} 行)")
+        self._render()
+        return True
+
+    def _speed(self):
+        return self.SPEEDS[max(0, self.speed_box.currentIndex())]
+
+    def toggle_play(self):
+        if self.timer.isActive():
+            self.pause()
+            return
+        if not self._ensure_reader():
+            return
+        if self._pos >= self._reader.duration:
+            self._pos = 0.0
+        self._clock = time.perf_counter()
+        self.timer.start()
+        self.play_btn.setText("一時停止")
+
+    def pause(self):
+        self.timer.stop()
+        self.play_btn.setText("再生")
+
+    def set_background(self, hidden: bool):
+        """ウィンドウの非表示中は再生を止め、再表示で続きから再生する"""
+        if hidden:
+            self._resume = self.timer.isActive()
+            self.pause()
+        elif self._resume:
+            self._resume = False
+            self.toggle_play()
+
+    def _tick(self):
+        now = time.perf_counter()
+        self._pos += (now - self._clock) * self._speed()
+        self._clock = now
+        if self._pos >= self._reader.duration:
+            self._pos = self._reader.duration
+            self.pause()
+        self._render()
+
+    def _on_seek(self, ms: int):
+        if not self._ensure_reader():
+            return
+        self._pos = ms / 1000.0
+        self._clock = time.perf_counter()
+        self._render()
+
+    def _render(self):
+        reader = self._reader
+        if reader is None or not reader.num_rows:
+            return
+        i = reader.index_at(self._pos)
+        if i != self._last_row:
+            self._last_row = i
+            _, axes, buttons = reader.row(i)
+            self.view.update_view(axes, buttons)
+        if not self.slider.isSliderDown():
+            self.slider.blockSignals(True)
+            self.slider.setValue(int(self._pos * 1000))
+            self.slider.blockSignals(False)
+        self.time_label.setText(f"{self._pos:.2f} / {reader.duration:.2f} 秒")
+
+def scan_sessions(d: str) -> dict:
+    """ディレクトリ直下のセッションログ {名前: (mtime_ns, size)}"""
+    out = {}
+    with os.scandir(d) as it:
+        for e in it:
+            if is_session_file(e.name) and e.is_file():
+                st = e.stat()
+                out[e.name] = (st.st_mtime_ns, st.st_size)
+    return out
+
+class SessionListModel(QAbstractListModel):
+    """
+    セッション一覧のモデル（名前の降順＝新しいものが上）
+    apply() に走査結果を渡すと、追加・削除・更新の差分だけをビューへ通知する
+    """
+    PathRole = Qt.UserRole + 1
+    # (presses, stick) またはまだない場合 None
+    ThumbRole = Qt.UserRole + 2
+    # これより多い変更はまとめてリセットする（初回読み込みなど）
+    RESET_THRESHOLD = 500
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._dir = "logs"
+        # 内部は昇順で持ち、行番号は末尾から数える
+        self._names = []
+        self._stats = {}
+        # スパークラインのキャッシュと、ないときの計算依頼先（パネルが設定する）
+        self.thumbs = None
+        self.request_thumb = None
+
+    def set_directory(self, d: str):
+        self.beginResetModel()
+        self._dir = d
+        self._names = []
+        self._stats = {}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def name_at(self, row: int) -> str:
+        return self._names[len(self._names) - 1 - row]
+
+    def row_of(self, name: str) -> int:
+        i = bisect.bisect_left(self._names, name)
+        if i < len(self._names) and self._names[i] == name:
+            return len(self._names) - 1 - i
+        return -1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.name_at(index.row())
+        if role == Qt.DisplayRole:
+            return name
+        if role == self.PathRole:
+            return os.path.join(self._dir, name)
+        if role == Qt.ToolTipRole:
+            mtime_ns, size = self._stats.get(name, (0, 0))
+            ts = datetime.datetime.fromtimestamp(mtime_ns / 1e9)
+            return f"{size / 1024:.1f} KB  {ts:%Y-%m-%d %H:%M:%S}"
+        if role == self.ThumbRole:
+            if self.thumbs is None:
+                return None
+            mtime_ns, size = self._stats.get(name, (0, 0))
+            profile = self.thumbs.get(name, mtime_ns, size)
+            # 描画された行の分だけ計算を依頼する（一覧全体は読まない）
+            if profile is None and self.request_thumb is not None:
+                self.request_thumb(name, mtime_ns, size)
+            return profile
+        return None
+
+    def thumbs_changed(self, names=None):
+        """スパークラインの再描画（names 省略時は全行）"""
+        if not self._names:
+            return
+        if names is None:
+            self.dataChanged.emit(self.index(0), self.index(len(self._names) - 1), [self.ThumbRole])
+            return
+        for name in names:
+            row = self.row_of(name)
+            if row >= 0:
+                idx = self.index(row)
+                self.dataChanged.emit(idx, idx, [self.ThumbRole])
+
+    def apply(self, entries: dict):
+        """走査結果を反映し、(追加, 削除, 更新) の名前リストを返す"""
+        old = self._stats
+        removed = [n for n in old if n not in entries]
+        added = [n for n in entries if n not in old]
+        changed = [n for n in entries if n in old and entries[n] != old[n]]
+        if len(added) + len(removed) > self.RESET_THRESHOLD:
+            self.beginResetModel()
+            self._names = sorted(entries)
+            self._stats = dict(entries)
+            self.endResetModel()
+            return added, removed, []
+        names = self._names
+        for name in removed:
+            i = bisect.bisect_left(names, name)
+            row = len(names) - 1 - i
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del names[i]
+            del old[name]
+            self.endRemoveRows()
+        for name in sorted(added):
+            i = bisect.bisect_left(names, name)
+            row = len(names) - i
+            self.beginInsertRows(QModelIndex(), row, row)
+            names.insert(i, name)
+            old[name] = entries[name]
+            self.endInsertRows()
+        for name in changed:
+            old[name] = entries[name]
+            idx = self.index(self.row_of(name))
+            self.dataChanged.emit(idx, idx)
+        return added, removed, changed
+
+class SparklineDelegate(QStyledItemDelegate):
+    """セッション名の右に活動量のスパークライン（押下数の棒 + スティックの線）を描く"""
+    WIDTH = 96
+    PRESS = QColor(229, 115, 115)
+    STICK = QColor(94, 156, 255)
+    EMPTY = QColor(55, 60, 66)
+
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        style = opt.widget.style()
+        rect = opt.rect
+        w = min(self.WIDTH, rect.width() // 2)
+        spark = QRectF(rect.right() - w - 3, rect.top() + 3, w, rect.height() - 6)
+        # 背景（選択色）は行全体、文字はスパークラインの手前まで
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, opt, painter, opt.widget)
+        opt.rect = rect.adjusted(0, 0, -(w + 6), 0)
+        style.drawControl(QStyle.CE_ItemViewItem, opt, painter, opt.widget)
+
+        profile = index.data(SessionListModel.ThumbRole)
+        painter.save()
+        if profile is None:
+            painter.fillRect(QRectF(spark.left(), spark.center().y(), spark.width(), 1), self.EMPTY)
+        else:
+            presses, stick = profile
+            n = len(presses)
+            bw = spark.width() / n
+            h = spark.height()
+            top = max(1, int(presses.max()))
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self.PRESS)
+            for i in np.flatnonzero(presses):
+                bh = max(1.0, h * float(presses[i]) / top)
+                painter.drawRect(QRectF(spark.left() + i * bw, spark.bottom() - bh, max(1.0, bw - 1), bh))
+            painter.setRenderHint(QPainter.Antialiasing, True)
+            painter.setPen(QPen(self.STICK, 1.2))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawPolyline(QPolygonF([
+                QPointF(spark.left() + (i + 0.5) * bw, spark.bottom() - h * float(v) / 255.0)
+                for i, v in enumerate(stick)
+            ]))
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        s = super().sizeHint(option, index)
+        return QSize(s.width() + self.WIDTH + 6, max(s.height(), 22))
+
 class SessionListPanel(QWidget):
+    # スパークラインの計算待ちの上限（超えたら古い依頼から取り消し、再描画時に依頼し直す）
+    MAX_THUMB_JOBS = 64
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self._max_preview_rows = 1000
 
-        # 左: ファイル一覧 + 操作
-        self.list = QListWidget()
+        # 左: ファイル一覧 + 操作（モデルで差分更新、表示は見えている行だけ）
+        self.model = SessionListModel(self)
+        self.list = QListView()
+        self.list.setModel(self.model)
+        self.list.setUniformItemSizes(True)
+        self.list.setLayoutMode(QListView.Batched)
+        self.list.setBatchSize(200)
         self.list.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.list.itemActivated.connect(self.open_item)
-        self.list.itemSelectionChanged.connect(self._on_selection_changed)
+        self.list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.list.setItemDelegate(SparklineDelegate(self.list))
+        self.list.activated.connect(self._on_activated)
+        self.list.selectionModel().currentChanged.connect(self._on_selection_changed)
+
+        # ディレクトリの変更を監視し、少し待ってからまとめて再走査する
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._schedule_rescan)
+        self._rescan_timer = QTimer(self)
+        self._rescan_timer.setSingleShot(True)
+        self._rescan_timer.setInterval(200)
+        self._rescan_timer.timeout.connect(self.reload)
+        self._rescan_pending = False
+        self._background = False
+
+        # スパークライン: キャッシュになければ表示した行の分だけワーカープールで計算する
+        self.thumbs = None
+        self._thumb_pool = None
+        self._thumb_jobs = {}
+        self._thumb_failed = set()
+        self._thumb_timer = QTimer(self)
+        self._thumb_timer.setInterval(250)
+        self._thumb_timer.timeout.connect(self._collect_thumbs)
+        self.model.request_thumb = self._request_thumb
 
         left_box = QWidget()
         left_v = QVBoxLayout(left_box)
@@ -680,7 +1470,11 @@ class SessionListPanel(QWidget):
         self.table.verticalHeader().setVisible(True)
         self._df_model = DataFrameModel(pd.DataFrame())
         self.table.setModel(self._df_model)
-        right_v.addWidget(self.table, 1)
+        self.replay = ReplayPanel()
+        self.right_tabs = QTabWidget()
+        self.right_tabs.addTab(self.table, "テーブル")
+        self.right_tabs.addTab(self.replay, "再生")
+        right_v.addWidget(self.right_tabs, 1)
 
         # スプリッタで左右に配置
         split = QSplitter()
@@ -699,34 +1493,145 @@ class SessionListPanel(QWidget):
         self.delete_btn.clicked.connect(self.delete_selected)
 
     def set_directory(self, path: str):
+        if getattr(self, "_dir", None) == path and self.model.rowCount():
+            self.reload()
+            return
         self._dir = path
+        watched = self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        self._cancel_thumbs()
+        self.model.set_directory(path)
+        try:
+            os.makedirs(path, exist_ok=True)
+            self.watcher.addPath(path)
+        except Exception:
+            pass
+        self.thumbs = ThumbnailCache(path)
+        self.model.thumbs = self.thumbs
         self.reload()
+        # 初期選択で即プレビュー
+        if self.model.rowCount() > 0:
+            self.list.setCurrentIndex(self.model.index(0))
+
+    def _schedule_rescan(self, _path=None):
+        if self._background:
+            # 非表示中は走査せず、再表示時にまとめて行う
+            self._rescan_pending = True
+            return
+        self._rescan_timer.start()
+
+    def set_background(self, hidden: bool):
+        """ウィンドウの非表示中はタイマー（再走査・スパークラインの回収・再生）を止める"""
+        if hidden == self._background:
+            return
+        self._background = hidden
+        if hidden:
+            if self._rescan_timer.isActive():
+                self._rescan_timer.stop()
+                self._rescan_pending = True
+            self._thumb_timer.stop()
+        else:
+            if self._rescan_pending:
+                self._rescan_pending = False
+                self._rescan_timer.start()
+            if self._thumb_jobs:
+                self._thumb_timer.start()
+        self.replay.set_background(hidden)
 
     def reload(self):
-        self.list.clear()
+        """ディレクトリを走査して差分だけを一覧に反映する"""
         d = getattr(self, "_dir", "logs")
         try:
-            os.makedirs(d, exist_ok=True)
-            files = [f for f in os.listdir(d) if f.lower().endswith((".parquet", ".csv"))]
-            files.sort(reverse=True)
-            for f in files:
-                item = QListWidgetItem(f)
-                self.list.addItem(item)
-            # 初期選択で即プレビュー
-            if self.list.count() > 0:
-                self.list.setCurrentRow(0)
-        except Exception:
-            pass
+            entries = scan_sessions(d)
+        except OSError:
+            entries = {}
+        current = self._current_path()
+        _, _, changed = self.model.apply(entries)
+        if current and not self.list.currentIndex().isValid():
+            # まとめてリセットした場合は選択が外れるので、同じファイルを選び直す
+            row = self.model.row_of(os.path.basename(current))
+            if row >= 0:
+                self.list.setCurrentIndex(self.model.index(row))
+            else:
+                self._on_selection_changed()
+        # 保存キューがキャッシュに書いたプロファイルを取り込む
+        if self.thumbs is not None and self.thumbs.reload():
+            self.model.thumbs_changed()
+        # 表示中のファイルが書き換わったらプレビューを読み直す
+        if current and os.path.basename(current) in changed:
+            self._on_selection_changed()
+
+    def _request_thumb(self, name, mtime_ns, size):
+        job = self._thumb_jobs.get(name)
+        if (job is not None and job[1:] == (mtime_ns, size)) or (name, mtime_ns, size) in self._thumb_failed:
+            return
+        if self._thumb_pool is None:
+            # fork だと記録・保存・配信のスレッドが動いている Qt プロセスを複製するため spawn で起動する
+            self._thumb_pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+        path = os.path.join(self._dir, name)
+        self._thumb_jobs[name] = (self._thumb_pool.submit(safe_session_profile, path), mtime_ns, size)
+        # スクロールで見えなくなった行の依頼がたまらないよう、未着手の古いものから取り消す
+        if len(self._thumb_jobs) > self.MAX_THUMB_JOBS:
+            for old in list(self._thumb_jobs):
+                if len(self._thumb_jobs) <= self.MAX_THUMB_JOBS:
+                    break
+                if self._thumb_jobs[old][0].cancel():
+                    del self._thumb_jobs[old]
+        if not self._thumb_timer.isActive() and not self._background:
+            self._thumb_timer.start()
+
+    def _collect_thumbs(self):
+        ready = []
+        for name in [n for n, job in self._thumb_jobs.items() if job[0].done()]:
+            future, mtime_ns, size = self._thumb_jobs.pop(name)
+            try:
+                profile = None if future.cancelled() else future.result()
+            except Exception:
+                profile = None
+            if profile is None:
+                self._thumb_failed.add((name, mtime_ns, size))
+            else:
+                self.thumbs.put(name, mtime_ns, size, profile)
+                ready.append(name)
+        if ready:
+            self.model.thumbs_changed(ready)
+        if not self._thumb_jobs:
+            self._thumb_timer.stop()
+            self._save_thumbs()
+
+    def _save_thumbs(self):
+        if self.thumbs is not None and self.thumbs.dirty:
+            try:
+                self.thumbs.save()
+            except OSError:
+                pass
+
+    def _cancel_thumbs(self):
+        for future, _, _ in self._thumb_jobs.values():
+            future.cancel()
+        self._thumb_jobs.clear()
+        self._thumb_failed.clear()
+        self._thumb_timer.stop()
+        self._save_thumbs()
+
+    def shutdown(self):
+        """終了時: 計算待ちを取り消し、計算済みのプロファイルを保存する"""
+        self._cancel_thumbs()
+        if self._thumb_pool is not None:
+            self._thumb_pool.shutdown(wait=False, cancel_futures=True)
+            self._thumb_pool = None
 
     def _current_path(self):
-        d = getattr(self, "_dir", "logs")
-        item = self.list.currentItem()
-        if not item:
+        idx = self.list.currentIndex()
+        if not idx.isValid():
             return None
-        return os.path.join(d, item.text())
+        return idx.data(SessionListModel.PathRole)
 
-    def _on_selection_changed(self):
-        self._load_preview(self._current_path())
+    def _on_selection_changed(self, *_):
+        path = self._current_path()
+        self._load_preview(path)
+        self.replay.set_path(path)
 
     def _load_preview(self, path: str | None):
         if not path or not os.path.exists(path):
@@ -736,7 +1641,7 @@ class SessionListPanel(QWidget):
         try:
             ext = os.path.splitext(path)[1].lower()
             if ext == ".csv":
-                df = pd.read_csv(path, nrows=self._max_preview_rows)
+                df = read_csv_fast(path, nrows=self._max_preview_rows)
             elif ext == ".parquet":
                 df = pd.read_parquet(path)
                 if len(df) > self._max_preview_rows:
@@ -760,9 +1665,9 @@ class SessionListPanel(QWidget):
             os.system(f'xdg-open "{os.path.abspath(d)}"')
 
     def _open_selected_external(self):
-        item = self.list.currentItem()
-        if item:
-            self.open_item(item)
+        path = self._current_path()
+        if path:
+            self.open_path(path)
 
     def delete_selected(self):
         path = self._current_path()
@@ -777,19 +1682,25 @@ class SessionListPanel(QWidget):
             QMessageBox.No,
         )
         if reply == QMessageBox.Yes:
+            # 再生中のファイルハンドルを先に閉じる
+            self.replay.set_path(None)
             try:
                 os.remove(path)
             except Exception as e:
                 QMessageBox.warning(self, "削除失敗", f"削除に失敗しました:\n{e}")
                 return
-            # リストとプレビューを更新
+            # リストとプレビューを更新（監視による再走査を待たずに反映）
             self.reload()
-            self._df_model.setDataFrame(pd.DataFrame())
-            self.preview_info.setText("プレビュー: -")
+            if self._current_path() is None:
+                self._df_model.setDataFrame(pd.DataFrame())
+                self.preview_info.setText("プレビュー: -")
 
-    def open_item(self, item: QListWidgetItem):
-        d = getattr(self, "_dir", "logs")
-        path = os.path.join(d, item.text())
+    def _on_activated(self, index):
+        path = index.data(SessionListModel.PathRole)
+        if path:
+            self.open_path(path)
+
+    def open_path(self, path: str):
         if os.path.exists(path):
             if sys.platform.startswith("win"):
                 os.startfile(os.path.abspath(path))
@@ -925,10 +1836,15 @@ class MainWindow(QMainWindow):
         self.action_start = QAction(style.standardIcon(QStyle.SP_MediaPlay), "記録開始", self)
         self.action_stop = QAction(style.standardIcon(QStyle.SP_MediaStop), "記録停止", self)
         self.action_stop.setEnabled(False)
+        # トリガー記録中に手動でクリップを切り出す（F9）
+        self.action_trigger = QAction(style.standardIcon(QStyle.SP_DialogApplyButton), "トリガー", self)
+        self.action_trigger.setShortcut(QKeySequence("F9"))
+        self.action_trigger.setEnabled(False)
         self.action_settings = QAction(style.standardIcon(QStyle.SP_FileDialogDetailedView), "設定", self)
 
         self.toolbar.addAction(self.action_start)
         self.toolbar.addAction(self.action_stop)
+        self.toolbar.addAction(self.action_trigger)
         self.toolbar.addSeparator()
         # ツールボタンの表示とスタイル識別子
         self.toolbar.setToolButtonStyle(Qt.ToolButtonTextBesideIcon)
@@ -975,9 +1891,15 @@ class MainWindow(QMainWindow):
         live_tab = QWidget()
         live_layout = QVBoxLayout(live_tab)
         self.status_label = QLabel("待機中")
+        self.perf_panel = PerformancePanel()
         self.input_display = InputDisplayView()
-        live_layout.addWidget(self.status_label)
+        status_row = QHBoxLayout()
+        status_row.addWidget(self.status_label)
+        status_row.addWidget(self.perf_panel, 1)
+        live_layout.addLayout(status_row)
         live_layout.addWidget(self.input_display, 1)
+        self.timeline = TimelinePlot(float(self.config.get("timeline_seconds", 10)))
+        live_layout.addWidget(self.timeline)
         self.tabs.addTab(live_tab, "Controller入力")
 
         # Logファイルタブ
@@ -1009,8 +1931,17 @@ class MainWindow(QMainWindow):
         self.statusbar = QStatusBar()
         self.setStatusBar(self.statusbar)
         self.status_info = QLabel("Ready")
+        self.save_info = QLabel("")
+        self.save_info.setStyleSheet("color:#B0BEC5;")
+        self.statusbar.addPermanentWidget(self.save_info)
         self.statusbar.addPermanentWidget(self.status_info)
 
+        # 保存キュー（停止後の保存はバックグラウンドで行い、すぐ次の記録を開始できる）
+        self.save_queue = SaveQueue()
+        self.save_timer = QTimer(self)
+        self.save_timer.setInterval(250)
+        self.save_timer.timeout.connect(self._on_save_timer)
+
         # システムトレイ
         self.tray = None
         if QSystemTrayIcon.isSystemTrayAvailable():
@@ -1040,7 +1971,8 @@ class MainWindow(QMainWindow):
 
         # イベント接続
         self.action_start.triggered.connect(self.start_logging)
-        self.action_stop.triggered.connect(self.stop_logging)
+        self.action_stop.triggered.connect(lambda: self.stop_logging())
+        self.action_trigger.triggered.connect(self.fire_trigger)
         self.action_settings.triggered.connect(lambda: self._navigate(2))
         self.save_dir_btn.clicked.connect(self.choose_save_dir)
         # 設定はインライン編集に変更
@@ -1054,14 +1986,17 @@ class MainWindow(QMainWindow):
         except Exception:
             pass
 
-        # UI更新タイマーと最新値バッファ
-        self.latest_axes = []
-        self.latest_buttons = []
+        # UI更新タイマーと最新値（入力はワーカーの共有スロットをポーリング）
+        self._last_seq = 0
         self.latest_status = "待機中"
+        self._worker_notice = None
+        self._perf_refresh_at = 0.0
+        self._timeline_refresh_at = 0.0
+        # 最小化/トレイ格納中は表示更新をすべて止める
+        self._background = False
         self.ui_timer = QTimer(self)
-        self.ui_timer.setInterval(33)  # 約30Hz
-        self.ui_timer.setTimerType(Qt.TimerType.CoarseTimer)
         self.ui_timer.timeout.connect(self.on_ui_timer)
+        self._apply_refresh_rate()
 
         # 終了時のリソースクリーンアップ
         try:
@@ -1173,7 +2108,7 @@ class MainWindow(QMainWindow):
             QLineEdit {
                 background:#2A2D31; color:#FFFFFF; border:1px solid #3A3F44; border-radius:6px; padding:6px;
             }
-            QListWidget {
+            QListView {
                 background:#1E2124; color:#FFFFFF; border:1px solid #2E3338; border-radius:6px;
             }
             QTabBar::tab {
@@ -1207,6 +2142,7 @@ class MainWindow(QMainWindow):
             self.format_label.setText(f"記録方式: {self.config.get('log_format','parquet')}")
             self.sessions_panel.set_directory(self.config.get("save_dir", "logs"))
             self._update_settings_summary()
+            self._apply_refresh_rate()
 
     def _on_settings_saved(self, cfg: dict):
         # 保存された設定を反映
@@ -1214,6 +2150,15 @@ class MainWindow(QMainWindow):
         self.format_label.setText(f"記録方式: {self.config.get('log_format','parquet')}")
         self.sessions_panel.set_directory(self.config.get("save_dir", "logs"))
         self._update_settings_summary()
+        self._apply_refresh_rate()
+
+    def _apply_refresh_rate(self):
+        # 表示更新レート（既定30Hz、上限はディスプレイのリフレッシュレート）
+        hz = float(self.config.get("display_refresh_hz", 30))
+        hz = max(1.0, min(hz, display_max_refresh()))
+        self.ui_timer.setInterval(max(1, int(round(1000.0 / hz))))
+        # 60Hz を超える場合は粗いタイマーだと間隔がぶれるため高精度タイマーを使う
+        self.ui_timer.setTimerType(Qt.TimerType.PreciseTimer if hz > 60 else Qt.TimerType.CoarseTimer)
 
     def _update_settings_summary(self):
         # 設定タブは詳細編集UIだが、簡易サマリは保持（ステータス更新用）
@@ -1252,47 +2197,224 @@ class MainWindow(QMainWindow):
             pass
         filepath = os.path.join(save_dir, filename)
         interval = float(self.config.get("sample_interval", 0.02))
-        self.worker = LoggerWorkerThread(filepath, interval=interval, format=selected_format)
-        # 高頻度シグナルはバッファに保存し、UIはタイマーで更新
+        formats = [selected_format] + [
+            f for f in self.config.get("extra_formats", []) if f != selected_format
+        ]
+        self.worker = LoggerWorkerThread(
+            filepath, interval=interval, format=formats,
+            export_metrics=bool(self.config.get("metrics_export", False)),
+            profile=bool(self.config.get("profile_capture", False)),
+            timeline_seconds=float(self.config.get("timeline_seconds", 10)),
+            backend=self.config.get("input_backend", "pygame"),
+            latency_mode=bool(self.config.get("latency_mode", False)),
+            adaptive=self._adaptive_options(),
+            save_queue=self.save_queue,
+            rollup_window=float(self.config.get("rollup_window", 1.0)),
+            telemetry=self._telemetry_options(),
+            reader_options=self._reader_options(),
+            trigger=self._trigger_options(),
+            realtime=self._realtime_options(),
+        )
+        self.timeline.set_seconds(float(self.config.get("timeline_seconds", 10)))
+        self.timeline.set_ring(self.worker.ring)
+        self.perf_panel.set_metrics(self.worker.worker.metrics)
+        # ステータスはバッファに保存し、入力表示はタイマーで共有スロットを参照
         self.worker.status.connect(self.on_worker_status)
-        self.worker.update.connect(self.on_worker_update)
+        # 切断などでワーカーが自分で終わったときも待機状態に戻す
+        thread = self.worker
+        thread.finished.connect(lambda: self._on_worker_finished(thread))
+        self._worker_notice = None
+        self._last_seq = 0
+        self.worker.set_gui_attached(not self._background)
         self.worker.start()
-        # UIタイマー開始（約30Hz）
+        # UIタイマー開始（非表示中は再表示時に開始）
         self.latest_status = "記録開始"
-        self.ui_timer.start()
+        if not self._background:
+            self.ui_timer.start()
         self.action_start.setEnabled(False)
         self.action_stop.setEnabled(True)
+        self.action_trigger.setEnabled(bool(self.config.get("trigger_mode", False)))
         self.status_label.setText("記録開始")
         self.status_info.setText(os.path.basename(filepath))
 
-    def stop_logging(self):
+    def _adaptive_options(self):
+        # 適応サンプリング設定（無効なら None）
+        cfg = self.config
+        if not cfg.get("adaptive_rate", False):
+            return None
+        return {
+            "idle_interval": float(cfg.get("adaptive_idle_interval", 0.05)),
+            "active_interval": float(cfg.get("adaptive_active_interval", 0.001)),
+            "idle_after": float(cfg.get("adaptive_idle_after", 1.0)),
+        }
+
+    def _realtime_options(self):
+        # リアルタイムプロファイル設定（無効なら None）
+        cfg = self.config
+        if not cfg.get("realtime_capture", False):
+            return None
+        cpu = cfg.get("realtime_cpu")
+        return {
+            "gc_mode": cfg.get("realtime_gc", "controlled"),
+            "collect_interval": float(cfg.get("realtime_gc_interval", 1.0)),
+            "cpu": int(cpu) if cpu is not None and cpu != "" else None,
+            "priority": cfg.get("realtime_priority", "nice"),
+        }
+
+    def _trigger_options(self):
+        # トリガー記録設定（無効なら None で全体を記録）
+        cfg = self.config
+        if not cfg.get("trigger_mode", False):
+            return None
+        return {
+            "pre_seconds": float(cfg.get("trigger_pre_seconds", 5.0)),
+            "post_seconds": float(cfg.get("trigger_post_seconds", 5.0)),
+            "max_clip_seconds": float(cfg.get("trigger_max_clip_seconds", 120.0)),
+            "triggers": cfg.get("triggers", []),
+        }
+
+    def fire_trigger(self):
+        if self.worker:
+            self.worker.fire_trigger()
+
+    def _reader_options(self):
+        # 入力バックエンド固有の設定
+        cfg = self.config
+        if cfg.get("input_backend", "pygame") == "evdev":
+            return {
+                "device": cfg.get("evdev_device") or None,
+                "grab": bool(cfg.get("evdev_grab", False)),
+            }
+        if cfg.get("input_backend", "pygame") == "evdev-dump":
+            return {
+                "path": cfg.get("evdev_dump_path", ""),
+                "realtime": bool(cfg.get("evdev_dump_realtime", True)),
+            }
+        return None
+
+    def _telemetry_options(self):
+        # ライブ配信設定（無効なら None）
+        cfg = self.config
+        if not cfg.get("telemetry_enabled", False):
+            return None
+        return {
+            "address": cfg.get("telemetry_address", "tcp:127.0.0.1:8765"),
+            "flush_interval": float(cfg.get("telemetry_flush_interval", 0.02)),
+            "policy": cfg.get("telemetry_policy", "coalesce"),
+        }
+
+    def stop_logging(self, status="停止中"):
         # UIタイマー停止
         self.ui_timer.stop()
         if self.worker:
+            # ループ終了とデバイス解放まで待つ（保存は保存キューで継続）
             self.worker.stop()
             self.worker.wait()
             self.worker = None
+            if not self._background:
+                self.save_timer.start()
+                self._on_save_timer()
         self.action_start.setEnabled(True)
         self.action_stop.setEnabled(False)
-        self.latest_status = "停止中"
-        self.status_label.setText("停止中")
-
-    # ワーカーの最新入力をバッファ
-    def on_worker_update(self, axes, buttons):
-        self.latest_axes = list(axes)
-        self.latest_buttons = list(buttons)
+        self.action_trigger.setEnabled(False)
+        self.latest_status = status
+        self.status_label.setText(status)
+
+    def _on_worker_finished(self, thread):
+        """停止操作なしにワーカーが終わった（切断・開始の失敗など）ときの後始末"""
+        if self.worker is not thread:
+            # 停止操作で終わった（stop_logging で後始末済み）
+            return
+        self.stop_logging(self._worker_notice or "停止中")
+
+    # 表示状態の切り替え（最小化・トレイ格納・再表示）
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            self._set_background(self.isMinimized() or not self.isVisible())
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._set_background(True)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._set_background(self.isMinimized())
+
+    def _set_background(self, hidden: bool):
+        """
+        非表示中はタイマー・ワーカーからの受け渡し・文字列整形を止める
+        再表示時は最新の状態を取り直して表示を同期する
+        """
+        if hidden == self._background:
+            return
+        self._background = hidden
+        if self.worker:
+            self.worker.set_gui_attached(not hidden)
+        self.sessions_panel.set_background(hidden)
+        if hidden:
+            self.ui_timer.stop()
+            self.save_timer.stop()
+            return
+        if self.worker:
+            self._last_seq = 0
+            self._timeline_refresh_at = 0.0
+            self._perf_refresh_at = 0.0
+            self.latest_status = "記録中..."
+            self.ui_timer.start()
+            self.on_ui_timer()
+        if self.save_queue.active_jobs() or self.save_info.text().startswith("保存中"):
+            self.save_timer.start()
+            self._on_save_timer()
+        else:
+            self.perf_panel.refresh()
 
     # ワーカーのステータス文字列をバッファ
     def on_worker_status(self, msg):
         self.latest_status = msg
+        if not msg.startswith(PERIODIC_STATUS) and msg != "記録停止":
+            # 切断などの通知は停止後も表示する
+            self._worker_notice = msg
 
-    # UIタイマーで表示更新（約30Hz）
+    # UIタイマーで表示更新（表示更新レートに従う）
     def on_ui_timer(self):
-        try:
-            self.input_display.update_view(self.latest_axes, self.latest_buttons)
-        except Exception:
-            pass
-        self.status_label.setText(self.latest_status)
+        worker = self.worker
+        if worker is not None:
+            seq, axes, buttons = worker.latest.read()
+            if seq != self._last_seq:
+                self._last_seq = seq
+                try:
+                    self.input_display.update_view(axes, buttons)
+                except Exception:
+                    pass
+        if self.status_label.text() != self.latest_status:
+            self.status_label.setText(self.latest_status)
+        now = time.monotonic()
+        # タイムラインは約20Hzで十分
+        if now >= self._timeline_refresh_at:
+            self._timeline_refresh_at = now + 0.05
+            self.timeline.refresh()
+        # パフォーマンス表示は約2Hzで十分
+        if now >= self._perf_refresh_at:
+            self._perf_refresh_at = now + 0.5
+            self.perf_panel.refresh()
+
+    # 保存キューの進捗表示
+    def _on_save_timer(self):
+        active = self.save_queue.active_jobs()
+        if active:
+            texts = [f"{j.name} {int(j.progress * 100)}%" for j in active]
+            self.save_info.setText("保存中: " + ", ".join(texts))
+            return
+        self.save_timer.stop()
+        failed = [j for j in self.save_queue.jobs() if j.state == "error" and not j.notified]
+        for j in failed:
+            j.notified = True
+            QMessageBox.warning(self, "保存失敗", f"{j.name} の保存に失敗しました:\n{j.error}")
+        self.save_info.setText("保存完了" if not failed else "保存失敗あり")
+        # 保存ジョブが終わってから最終値（書き込みバイト数を含む）を反映
+        self.perf_panel.refresh()
+        self.sessions_panel.reload()
 
     # トレイ
     def _start_from_tray(self):
@@ -1316,6 +2438,15 @@ class MainWindow(QMainWindow):
                 pass
             self.worker.wait()
             self.worker = None
+        # 保存待ちのセッションを書き終えてから終了する
+        try:
+            self.save_queue.wait()
+        except Exception:
+            pass
+        try:
+            self.sessions_panel.shutdown()
+        except Exception:
+            pass
 
     def _quit_app(self):
         self._force_quit = True
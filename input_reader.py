@@ -4,7 +4,7 @@ import time
 
 
 class InputReader:
-    def __init__(self):
+    def __init__(self, collect_events=False):
         # ワーカースレッド側で実ウィンドウを作らない（Qtと競合しフリーズの原因）
         try:
             if os.name == "nt":
@@ -17,6 +17,16 @@ class InputReader:
             raise RuntimeError("ゲームパッドが接続されていません")
         self.joystick = pygame.joystick.Joystick(0)
         self.joystick.init()
+        # 遅延計測モード: イベントキューから入力イベントの発生時刻を集める
+        self.collect_events = collect_events
+        self._joy_events = (
+            pygame.JOYAXISMOTION, pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION,
+        )
+        # pygame のイベントは SDL のタイムスタンプを持たない（遅延はポンプ間隔から推定する）
+        self.event_timestamps = False
+        self.last_events = []
+        self.last_pump_ns = 0
+        self.prev_pump_ns = 0
 
     def close(self):
         """ジョイスティックとpygame.joystickのリソース解放"""
@@ -28,9 +38,12 @@ class InputReader:
         pygame.quit()
 
     def read(self):
-        """1フレーム分の入力を取得"""
-        pygame.event.pump()
-        timestamp = time.time()
+        """1フレーム分の入力を取得（timestamp は perf_counter_ns の int64 ナノ秒）"""
+        if self.collect_events:
+            self._collect_events()
+        else:
+            pygame.event.pump()
+        timestamp = time.perf_counter_ns()
         axes = [self.joystick.get_axis(i) for i in range(self.joystick.get_numaxes())]
         buttons = [self.joystick.get_button(i) for i in range(self.joystick.get_numbuttons())]
         # D-Pad（十字キー）をbuttons配列に追加
@@ -40,6 +53,16 @@ class InputReader:
             buttons += [int(hat[1] == 1), int(hat[1] == -1), int(hat[0] == -1), int(hat[0] == 1)]
         return timestamp, axes, buttons
 
+    def _collect_events(self):
+        """
+        イベントを取り出し、入力イベントの数だけ発生時刻 None（不明）を並べる
+        発生時刻は LatencyEstimator が前回〜今回のポンプの中点で推定する
+        """
+        self.prev_pump_ns = self.last_pump_ns
+        events = pygame.event.get()
+        self.last_pump_ns = time.perf_counter_ns()
+        self.last_events = [None for ev in events if ev.type in self._joy_events]
+
     def get_headers(self):
         """CSVヘッダを返す"""
         headers = ["timestamp"]
@@ -0,0 +1,42 @@
+# loggers/adaptive_rate.py
+
+
+class AdaptiveRate:
+    """
+    入力の変化に応じてサンプリング間隔を切り替える
+    - 軸（不感帯を超える変化）かボタンが動いた瞬間に active_interval へ
+    - idle_after 秒変化がなければ idle_interval へ戻す
+    """
+    def __init__(self, idle_interval=0.05, active_interval=0.001, idle_after=1.0, deadband=0.02):
+        self.idle_interval = float(idle_interval)
+        self.active_interval = max(0.001, float(active_interval))
+        self.idle_after_ns = int(idle_after * 1e9)
+        self.deadband = float(deadband)
+        self.interval = self.idle_interval
+        self._last_axes = None
+        self._last_buttons = None
+        self._last_change_ns = 0
+
+    @property
+    def rate_hz(self) -> float:
+        return 1.0 / self.interval
+
+    def _changed(self, axes, buttons) -> bool:
+        if buttons != self._last_buttons or self._last_axes is None:
+            return True
+        db = self.deadband
+        for a, b in zip(axes, self._last_axes):
+            if a - b > db or b - a > db:
+                return True
+        return False
+
+    def update(self, timestamp_ns: int, axes, buttons) -> float:
+        """最新サンプルを渡し、次のサンプルまでの間隔（秒）を返す"""
+        if self._changed(axes, buttons):
+            self._last_axes = axes
+            self._last_buttons = buttons
+            self._last_change_ns = timestamp_ns
+            self.interval = self.active_interval
+        elif timestamp_ns - self._last_change_ns >= self.idle_after_ns:
+            self.interval = self.idle_interval
+        return self.interval
@@ -9,15 +9,27 @@ class BaseLogger:
     - データ保持
     - データ追加
     - DataFrame 変換
+    - メタデータ（時計アンカーなど）の保持
     """
+    default_filename = "log"
+
     def __init__(self, log_dir="logs", filename=None):
         self.log_dir = log_dir
         self.filename = filename
         os.makedirs(self.log_dir, exist_ok=True)
         self.records = []
+        self.metadata = {}
+
+    @property
+    def filepath(self) -> str:
+        return os.path.join(self.log_dir, self.filename or self.default_filename)
 
     def log(self, data: dict):
         self.records.append(data)
 
+    def pending_count(self) -> int:
+        """未保存のレコード数"""
+        return len(self.records)
+
     def _to_dataframe(self) -> pd.DataFrame:
         return pd.DataFrame(self.records)
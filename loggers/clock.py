@@ -0,0 +1,82 @@
+# loggers/clock.py
+
+import time
+
+import numpy as np
+
+
+class SessionClock:
+    """
+    セッション用の単調増加時計（time.perf_counter_ns 基準、int64 ナノ秒）
+    - 開始時に壁時計との対応（アンカー）を記録
+    - 一定間隔で壁時計とのずれ（ドリフト）を記録し、メタデータとして保存する
+    NTP などで壁時計が補正されてもサンプル間隔は影響を受けない。
+    """
+    def __init__(self, drift_interval=60.0):
+        self.now_ns = time.perf_counter_ns
+        self.drift_interval_ns = int(drift_interval * 1e9)
+        self.anchor = self._pair()
+        self.drift = []
+        self._next_drift_ns = self.anchor["mono_ns"] + self.drift_interval_ns
+
+    def _pair(self) -> dict:
+        # 壁時計の読み取りを前後の単調時計で挟み、中点を対応点とする
+        m0 = self.now_ns()
+        wall = time.time_ns()
+        m1 = self.now_ns()
+        return {"mono_ns": (m0 + m1) // 2, "wall_ns": wall, "uncertainty_ns": m1 - m0}
+
+    def maybe_record_drift(self, mono_ns: int):
+        """キャプチャループから毎周呼ぶ（通常は整数比較1回のみ）"""
+        if mono_ns < self._next_drift_ns:
+            return
+        self._next_drift_ns = mono_ns + self.drift_interval_ns
+        self.record_drift()
+
+    def record_drift(self):
+        p = self._pair()
+        expected = self.anchor["wall_ns"] + (p["mono_ns"] - self.anchor["mono_ns"])
+        p["drift_ns"] = p["wall_ns"] - expected
+        self.drift.append(p)
+
+    def metadata(self) -> dict:
+        return {
+            "clock": "perf_counter_ns",
+            "timestamp_unit": "ns",
+            "anchor": dict(self.anchor),
+            "drift": list(self.drift),
+        }
+
+
+def to_epoch_seconds(timestamps, metadata=None):
+    """
+    timestamp 列を UNIX 秒（float64）に変換する
+    - 旧形式（float 秒）はそのまま返す
+    - 新形式（int64 ns）はアンカーとドリフト記録で壁時計に対応付ける
+    """
+    ts = np.asarray(timestamps)
+    if not np.issubdtype(ts.dtype, np.integer):
+        return ts.astype(np.float64, copy=False)
+    clock = (metadata or {}).get("clock_info") or {}
+    anchor = clock.get("anchor")
+    if not anchor:
+        # アンカーがなければ先頭を 0 秒とする相対時刻
+        return (ts - ts[0]) / 1e9 if len(ts) else ts.astype(np.float64)
+    rel = (ts - int(anchor["mono_ns"])).astype(np.float64)
+    drift = clock.get("drift") or []
+    if drift:
+        # ドリフトは記録点の間を線形補間（アンカー時点は 0）
+        xs = [0.0] + [float(d["mono_ns"] - anchor["mono_ns"]) for d in drift]
+        ys = [0.0] + [float(d["drift_ns"]) for d in drift]
+        rel = rel + np.interp(rel, xs, ys)
+    return (int(anchor["wall_ns"]) + rel) / 1e9
+
+
+def to_relative_seconds(timestamps):
+    """先頭サンプルからの経過秒（float64）"""
+    ts = np.asarray(timestamps)
+    if not len(ts):
+        return np.zeros(0)
+    if np.issubdtype(ts.dtype, np.integer):
+        return (ts - ts[0]) / 1e9
+    return (ts - ts[0]).astype(np.float64)
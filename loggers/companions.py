@@ -0,0 +1,39 @@
+# loggers/companions.py
+
+import os
+
+# セッションログ本体の拡張子
+SESSION_EXTS = (".parquet", ".csv")
+
+# セッションの横に書き出す付随ファイル（一覧には表示しない）
+COMPANION_SUFFIXES = (
+    ".metrics.jsonl",
+    ".phases.csv",
+    ".folded",
+    ".index.npz",
+    ".meta.json",
+    ".rollup.parquet",
+)
+
+
+def companion_path(session_path: str, suffix: str) -> str:
+    """
+    セッションログと同じ場所・同じ名前で拡張子だけ異なるパスを返す
+    セッション単位の付随ファイル（ロールアップ、メトリクスなど）用。複数形式で保存したときは
+    同じ名前を共有するため、メインの形式のファイルからだけ書くこと。
+    """
+    return os.path.splitext(session_path)[0] + suffix
+
+
+def file_companion_path(session_path: str, suffix: str) -> str:
+    """
+    ファイル単位の付随ファイルのパス（拡張子を残す: x.csv → x.csv.index.npz）
+    再生用の索引など、同じセッションの Parquet と CSV で中身が異なるもの用
+    """
+    return session_path + suffix
+
+
+def is_session_file(name: str) -> bool:
+    """付随ファイルを除いたセッションログかどうか"""
+    lower = name.lower()
+    return lower.endswith(SESSION_EXTS) and not lower.endswith(COMPANION_SUFFIXES)
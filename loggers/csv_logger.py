@@ -1,15 +1,32 @@
 import os
 import pandas as pd
 from .base_logger import BaseLogger
+from .metadata import write_sidecar
 
 class CSVLogger(BaseLogger):
     """
     CSV形式でログを保存するロガークラス
     """
+    default_filename = "log.csv"
+    # 進捗報告の単位（行数）
+    chunk_rows = 65536
+
     def __init__(self, log_dir="logs", filename="log.csv", **kwargs):
         super().__init__(log_dir=log_dir, filename=filename, **kwargs)
 
-    def save(self):
-        df = self._to_dataframe()
-        filepath = os.path.join(self.log_dir, self.filename or "log.csv")
-        df.to_csv(filepath, index=False)
\ No newline at end of file
+    def save(self, progress=None, df=None):
+        report = progress or (lambda fraction: None)
+        if df is None:
+            df = self._to_dataframe()
+        report(0.2)
+        # 一時ファイルにチャンク単位で書き、完了後に置き換える
+        tmp = self.filepath + ".part"
+        n = len(df)
+        step = self.chunk_rows
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            for start in range(0, max(n, 1), step):
+                df.iloc[start:start + step].to_csv(f, index=False, header=(start == 0))
+                report(0.2 + 0.8 * min(n, start + step) / max(n, 1))
+        os.replace(tmp, self.filepath)
+        if self.metadata:
+            write_sidecar(self.filepath, self.metadata)
@@ -0,0 +1,122 @@
+# loggers/latency.py
+
+import random
+import time
+
+import numpy as np
+
+
+class LatencyEstimator:
+    """
+    入力イベント発生 → サンプル記録までの遅延を推定する
+    - 入力源がイベントの発生時刻を返せば（evdev のカーネル時刻など）それを使う
+    - なければ前回ポンプ〜今回ポンプの間で一様に発生したとみなし、中点で推定する
+      （pygame のイベントは SDL のタイムスタンプを持たないため、pygame では常にこちら）
+    遅延は「発生→timestamp 付与」と「発生→ログ追加完了」の2種類を記録する。
+    :param event_timestamps: 入力源が発生時刻を返せるか（reader.event_timestamps）
+    """
+    def __init__(self, capacity=200000, event_timestamps=True):
+        self.capacity = int(capacity)
+        self.event_timestamps = event_timestamps
+        self.to_stamp = []
+        self.to_log = []
+        self.exact = 0
+        self.estimated = 0
+
+    def observe(self, stamp_ns: int, logged_ns: int, events, pump_ns: int, prev_pump_ns: int):
+        """events は発生時刻（ns、不明なら None）のリスト"""
+        if not events or len(self.to_stamp) >= self.capacity:
+            return
+        for event_ns in events:
+            if event_ns is None:
+                if not prev_pump_ns:
+                    continue
+                event_ns = (prev_pump_ns + pump_ns) // 2
+                self.estimated += 1
+            else:
+                self.exact += 1
+            self.to_stamp.append(stamp_ns - event_ns)
+            self.to_log.append(logged_ns - event_ns)
+
+    @staticmethod
+    def _percentiles(values) -> dict:
+        if not values:
+            return {}
+        ms = np.asarray(values, dtype=np.float64) / 1e6
+        p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+        return {
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(p50),
+            "p90_ms": float(p90),
+            "p99_ms": float(p99),
+            "max_ms": float(ms.max()),
+        }
+
+    def method(self) -> str:
+        """遅延の求め方: "event_timestamp"（発生時刻から）/ "pump_midpoint"（推定）/ "mixed" """
+        if not self.event_timestamps or not self.exact:
+            return "pump_midpoint"
+        return "mixed" if self.estimated else "event_timestamp"
+
+    def summary(self) -> dict:
+        return {
+            "count": len(self.to_stamp),
+            "method": self.method(),
+            "exact": self.exact,
+            "estimated": self.estimated,
+            "event_to_stamp": self._percentiles(self.to_stamp),
+            "event_to_log": self._percentiles(self.to_log),
+        }
+
+
+class SyntheticInputSource:
+    """
+    実機なしで遅延計測を検証するための合成入力源（InputReader 互換）
+    - toggle_interval ごとに button0 を反転させ、発生時刻を正確に知っている
+    - report_delay はドライバ/OS 側の遅延を模擬（この時間が経つまで観測されない）
+    - with_timestamps=False で SDL タイムスタンプがない環境を模擬
+    """
+    def __init__(self, n_axes=4, n_buttons=12, toggle_interval=0.05, report_delay=0.002,
+                 with_timestamps=True, jitter=0.5, seed=0):
+        self.clock = time.perf_counter_ns
+        self.n_axes = n_axes
+        self.n_buttons = n_buttons
+        self.toggle_ns = int(toggle_interval * 1e9)
+        self.report_delay_ns = int(report_delay * 1e9)
+        self.with_timestamps = with_timestamps
+        self.event_timestamps = with_timestamps
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._axes = [0.0] * n_axes
+        self._buttons = [0] * n_buttons
+        self._next_event_ns = self.clock() + self.toggle_ns
+        self.last_events = []
+        self.last_pump_ns = 0
+        self.prev_pump_ns = 0
+        # 真の遅延（検証用）
+        self.true_events = []
+
+    def close(self):
+        pass
+
+    def read(self):
+        now = self.clock()
+        self.prev_pump_ns = self.last_pump_ns
+        self.last_pump_ns = now
+        events = []
+        while self._next_event_ns + self.report_delay_ns <= now:
+            t_ev = self._next_event_ns
+            self._buttons[0] ^= 1
+            self._axes[0] = 1.0 if self._buttons[0] else 0.0
+            events.append(t_ev if self.with_timestamps else None)
+            self.true_events.append(t_ev)
+            step = self.toggle_ns * (1.0 + self.jitter * (self._rng.random() - 0.5))
+            self._next_event_ns += int(step)
+        self.last_events = events
+        return now, list(self._axes), list(self._buttons)
+
+    def get_headers(self):
+        headers = ["timestamp"]
+        headers += [f"axis{i}" for i in range(self.n_axes)]
+        headers += [f"button{i}" for i in range(self.n_buttons)]
+        return headers
@@ -0,0 +1,104 @@
+# loggers/live_state.py
+
+import time
+
+import numpy as np
+
+
+class LatestState:
+    """
+    ワーカースレッド → GUI の最新入力スロット
+    - publish() は (seq, axes, buttons) のタプルを1回代入するだけ（コピーなし）
+    - GUI は read() でポーリングし、seq が変わったときだけ描画する
+    - 書き込みはワーカースレッドのみを想定（タプル代入は GIL 下でアトミック）
+    """
+    __slots__ = ("_slot",)
+
+    def __init__(self):
+        self._slot = (0, (), ())
+
+    def publish(self, axes, buttons):
+        self._slot = (self._slot[0] + 1, axes, buttons)
+
+    def read(self):
+        """(seq, axes, buttons) を返す"""
+        return self._slot
+
+
+class SampleRing:
+    """
+    ライブ表示用の固定長サンプルリング（numpy で事前確保）
+    - append() はワーカースレッドから呼ぶ。最初の1回だけ配列を確保し、以降は代入のみ
+    - window() は GUI スレッドから呼ぶ。直近 N 秒分を読み出し用バッファへ時系列順に
+      コピーしてビューを返す（フレーム毎の再確保なし）
+    """
+    def __init__(self, capacity):
+        self.capacity = max(16, int(capacity))
+        self.count = 0
+        self.t = None
+        self.axes = None
+        self.buttons = None
+        self._clock = time.perf_counter
+
+    def _allocate(self, n_axes, n_buttons):
+        cap = self.capacity
+        self._arange = np.arange(cap, dtype=np.int64)
+        self._idx = np.empty(cap, dtype=np.int64)
+        self._t_out = np.empty(cap, dtype=np.float64)
+        self._axes_out = np.empty((cap, n_axes), dtype=np.float32)
+        self._buttons_out = np.empty((cap, n_buttons), dtype=np.uint8)
+        self.axes = np.zeros((cap, n_axes), dtype=np.float32)
+        self.buttons = np.zeros((cap, n_buttons), dtype=np.uint8)
+        # t は最後に代入し、読み出し側の準備完了判定に使う
+        self.t = np.zeros(cap, dtype=np.float64)
+
+    def append(self, axes, buttons):
+        if self.t is None:
+            self._allocate(len(axes), len(buttons))
+        i = self.count % self.capacity
+        self.t[i] = self._clock()
+        self.axes[i] = axes
+        self.buttons[i] = buttons
+        self.count += 1
+
+    @property
+    def n_axes(self) -> int:
+        return 0 if self.axes is None else self.axes.shape[1]
+
+    @property
+    def n_buttons(self) -> int:
+        return 0 if self.buttons is None else self.buttons.shape[1]
+
+    def now(self) -> float:
+        return self._clock()
+
+    def window(self, seconds: float):
+        """直近 seconds 秒の (t, axes, buttons) を時系列順のビューで返す"""
+        if self.t is None:
+            return None
+        count = self.count
+        cap = self.capacity
+        avail = min(count, cap)
+        if avail == 0:
+            return None
+        t = self.t
+        cutoff = t[(count - 1) % cap] - seconds
+        # 論理インデックス上で二分探索（リングは時系列順）
+        lo, hi = count - avail, count - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if t[mid % cap] < cutoff:
+                lo = mid + 1
+            else:
+                hi = mid
+        k = count - lo
+        idx = self._idx[:k]
+        np.add(self._arange[:k], lo, out=idx)
+        np.remainder(idx, cap, out=idx)
+        t_out = self._t_out[:k]
+        axes_out = self._axes_out[:k]
+        buttons_out = self._buttons_out[:k]
+        np.take(t, idx, out=t_out)
+        np.take(self.axes, idx, axis=0, out=axes_out)
+        np.take(self.buttons, idx, axis=0, out=buttons_out)
+        return t_out, axes_out, buttons_out
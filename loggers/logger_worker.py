@@ -4,42 +4,281 @@ from input_reader import InputReader
 from loggers.main_logger import MainLogger
 from loggers.csv_logger import CSVLogger
 from loggers.parquet_logger import ParquetLogger
+from loggers.metrics import WorkerMetrics
+from loggers.profiler import CaptureProfiler
+from loggers.companions import companion_path
+from loggers.clock import SessionClock
+from loggers.latency import LatencyEstimator, SyntheticInputSource
+from loggers.adaptive_rate import AdaptiveRate
+from loggers.rollup import RollupAccumulator, ROLLUP_SUFFIX
+from loggers.telemetry import TelemetryPublisher
+from loggers.trigger import TriggerRecorder, build_triggers
+from loggers.save_queue import SaveQueue
+from loggers.thumbnails import store_profile, profile_from_frame
+from loggers.realtime import RealtimeGuard
+
+# 入力バックエンド
+READER_BACKENDS = {
+    "pygame": InputReader,
+    "synthetic": SyntheticInputSource,
+}
+try:
+    from evdev_reader import EvdevReader, EvdevDumpReader
+    READER_BACKENDS["evdev"] = EvdevReader
+    # record_dump で保存したイベント列の再生（実機なしでの検証用、reader_options={"path": ...}）
+    READER_BACKENDS["evdev-dump"] = EvdevDumpReader
+except ImportError:
+    # Linux 以外（fcntl がない環境）では使えない
+    pass
 
 class LoggerWorker:
-    def __init__(self, filepath, interval=0.01, format="parquet"):
+    def __init__(self, filepath, interval=0.01, format="parquet", export_metrics=False, profile=False,
+                 backend="pygame", latency_mode=False, adaptive=None, save_queue=None,
+                 rollup_window=1.0, telemetry=None, reader_options=None, trigger=None, realtime=None):
         self.filepath = filepath
         self.interval = interval
         self.format = format
+        self.export_metrics = export_metrics
+        self.backend = backend
+        # バックエンド固有の引数（evdev の device など）
+        self.reader_options = reader_options or {}
+        self.latency_mode = latency_mode
+        # 適応サンプリング（AdaptiveRate の引数 dict、None で固定間隔）
+        self.adaptive = adaptive
+        # 保存キュー（指定時は保存をバックグラウンドに任せて run() はすぐ戻る）
+        self.save_queue = save_queue
+        self.save_job = None
+        # 集計窓（秒）。0 以下でロールアップを作らない
+        self.rollup_window = rollup_window
+        # ライブ配信（TelemetryPublisher の引数 dict、None で配信しない）
+        self.telemetry = telemetry
+        # トリガー記録（pre_seconds / post_seconds / triggers などの dict、None で全記録）
+        self.trigger = trigger
+        self.recorder = None
+        # GUI が表示中か（False の間はステータス/入力表示のコールバックと文字列整形を行わない）
+        self.gui_attached = True
+        # リアルタイムプロファイル（RealtimeGuard の引数 dict、None で無効）
+        self.realtime = realtime
         self.running = False
+        self.metrics = WorkerMetrics()
+        # プロファイルはオプトイン（無効時はループ内の None 判定のみ）
+        self.profiler = CaptureProfiler() if profile else None
 
     def run(self, status_callback=None, update_callback=None, sleep_func=None):
-        reader = InputReader()
+        reader = self._create_reader()
         filename = os.path.basename(self.filepath)
+        log_dir = os.path.dirname(self.filepath) or "logs"
         logger_class_map = {
             "csv": CSVLogger,
             "parquet": ParquetLogger,
         }
-        logger_cls = logger_class_map.get(self.format)
-        logger = MainLogger(logger_cls, log_dir="logs", filename=filename)
+        # format は単一形式、またはリスト/カンマ区切りで複数形式（先頭がメイン）
+        formats = self.format if isinstance(self.format, (list, tuple)) else str(self.format).split(",")
+        logger_classes = [logger_class_map[f.strip()] for f in formats if f.strip() in logger_class_map]
+        logger = MainLogger(logger_classes or [ParquetLogger], log_dir=log_dir, filename=filename)
         headers = reader.get_headers()
+        adaptive = AdaptiveRate(**self.adaptive) if self.adaptive is not None else None
+        interval = self.interval
+        if adaptive is not None:
+            # 各行にその行を取得したときの実効レート（直前の行からの実測間隔）を付ける
+            # 要求した間隔はスリープの分解能とループの処理時間の分だけ長くなるため使わない
+            headers = headers + ["rate_hz"]
+            interval = adaptive.interval
+        metrics = self.metrics
+        metrics.reset(interval)
+        profiler = self.profiler
+        if profiler:
+            profiler.start()
+        # サンプルは単調時計で刻み、壁時計との対応はメタデータに残す
+        session_clock = SessionClock()
+        latency = (
+            LatencyEstimator(event_timestamps=getattr(reader, "event_timestamps", True))
+            if self.latency_mode else None
+        )
+        rollup = None
+        if self.rollup_window and self.rollup_window > 0 and self.trigger is None:
+            anchor = session_clock.anchor
+            rollup = RollupAccumulator(
+                headers, window=self.rollup_window, offset_ns=anchor["wall_ns"] - anchor["mono_ns"],
+            )
+        publisher = None
+        if self.telemetry is not None:
+            try:
+                publisher = TelemetryPublisher(headers=reader.get_headers(), **self.telemetry)
+                publisher.start()
+            except (OSError, ValueError) as e:
+                # 配信できなくても記録は続ける
+                publisher = None
+                if status_callback:
+                    status_callback(f"配信を開始できません: {e}")
+        guard = RealtimeGuard(**self.realtime) if self.realtime is not None else None
+        recorder = None
+        clip_queue = None
+        if self.trigger is not None:
+            # トリガー記録: 全体のログは作らず、発火前後のクリップだけを保存する
+            opts = dict(self.trigger)
+            clip_queue = self.save_queue or SaveQueue()
+            recorder = TriggerRecorder(
+                logger_classes or [ParquetLogger], log_dir, filename,
+                build_triggers(opts.pop("triggers", []), headers), clip_queue,
+                metadata_func=lambda: self._clip_metadata(session_clock, guard, latency, publisher), **opts,
+            )
+        self.recorder = recorder
+        # バッファ深さはトリガー記録ではリング（と書き出し中のクリップ）の行数
+        pending_count = recorder.pending_count if recorder is not None else logger.pending_count
+        # 入力を待てるバックエンド（evdev）は、スリープの代わりに次の周期まで入力を読みながら待つ
+        wait = getattr(reader, "wait", None)
+        clock = time.perf_counter
+        prev_timestamp = None
         self.running = True
-        while self.running:
-            timestamp, axes, buttons = reader.read()
-            values = [timestamp] + list(axes) + list(buttons)
-            data = {h: v for h, v in zip(headers, values)}
-            logger.log(data)
-            if status_callback:
-                status_callback(f"記録中... {time.time():.2f}")
-            if update_callback:
-                update_callback(axes, buttons)
-            if sleep_func:
-                sleep_func(self.interval)
+        try:
+            # GC の停止・優先度の変更は必ず finally で戻す（GUI を含むプロセス全体に効くため）
+            if guard is not None:
+                guard.enter()
+            while self.running:
+                t0 = clock()
+                metrics.tick(t0)
+                timestamp, axes, buttons = reader.read()
+                t1 = clock()
+                if getattr(reader, "disconnected", False):
+                    # デバイスが抜かれたらそこまでを保存して終える
+                    if status_callback:
+                        status_callback("コントローラーが切断されました")
+                    break
+                session_clock.maybe_record_drift(timestamp)
+                values = [timestamp] + list(axes) + list(buttons)
+                if adaptive is not None:
+                    dt = timestamp - prev_timestamp if prev_timestamp is not None else 0
+                    # 先頭行（と時刻が進んでいない行）は要求値で代用する
+                    values.append(1e9 / dt if dt > 0 else 1.0 / interval)
+                    prev_timestamp = timestamp
+                data = {h: v for h, v in zip(headers, values)}
+                tp = clock()
+                if recorder is not None:
+                    recorder.add(timestamp, axes, buttons, data)
+                else:
+                    logger.log(data)
+                t2 = clock()
+                if rollup is not None:
+                    rollup.add(timestamp, axes, buttons)
+                if publisher is not None:
+                    publisher.publish(timestamp, axes, buttons)
+                if latency is not None:
+                    latency.observe(
+                        timestamp, time.perf_counter_ns(), reader.last_events,
+                        reader.last_pump_ns, reader.prev_pump_ns,
+                    )
+                if self.gui_attached:
+                    if status_callback:
+                        status_callback(f"記録中... {time.time():.2f}")
+                    if update_callback:
+                        update_callback(axes, buttons)
+                t3 = clock()
+                metrics.record(t1 - t0, t2 - tp, t3 - t2, pending_count())
+                if adaptive is not None:
+                    interval = adaptive.update(timestamp, axes, buttons)
+                    metrics.interval = interval
+                if guard is not None:
+                    # GC はスリープ直前の決まった位置でのみ回収する
+                    guard.idle(clock())
+                if wait is not None:
+                    wait(interval)
+                elif sleep_func:
+                    sleep_func(interval)
+                else:
+                    time.sleep(interval)
+                if profiler is not None:
+                    profiler.phases.record(t1 - t0, tp - t1, t2 - tp, t3 - t2, clock() - t3)
+        finally:
+            # 例外で抜けても後始末と保存は必ず行う
+            self.running = False
+            if guard is not None:
+                guard.exit()
+                logger.set_metadata("realtime", guard.report())
+            if profiler:
+                profiler.stop()
+            session_clock.record_drift()
+            logger.set_metadata("clock_info", session_clock.metadata())
+            if latency is not None:
+                logger.set_metadata("latency", latency.summary())
+            if recorder is not None:
+                recorder.close()
+            if publisher is not None:
+                publisher.close()
+                logger.set_metadata("telemetry", publisher.stats())
+            try:
+                reader.close()
+            except OSError:
+                pass
+
+            def finalize(progress=None):
+                if recorder is None:
+                    df = logger.save(progress)
+                    # 一覧のスパークライン用プロファイル（保存に使った DataFrame の列から作る）
+                    try:
+                        store_profile(logger.filepaths, profile_from_frame(df))
+                    except (OSError, ValueError):
+                        pass
+                elif clip_queue is not self.save_queue:
+                    clip_queue.wait()
+                if rollup is not None:
+                    try:
+                        rollup.write(companion_path(logger.filepath, ROLLUP_SUFFIX))
+                    except OSError:
+                        pass
+                for path in (logger.filepaths if recorder is None else recorder.clips):
+                    try:
+                        metrics.bytes_written += os.path.getsize(path)
+                    except OSError:
+                        pass
+                # 付随ファイルはセッションの横（トリガー記録では全体のログがないため各クリップの横）に置く
+                companions = [logger.filepath] if recorder is None else recorder.clips
+                for path in companions:
+                    if profiler:
+                        try:
+                            profiler.save(path)
+                        except OSError:
+                            pass
+                    if self.export_metrics:
+                        try:
+                            metrics.export_jsonl(companion_path(path, ".metrics.jsonl"))
+                        except OSError:
+                            pass
+
+            if self.save_queue is not None:
+                self.save_job = self.save_queue.submit(os.path.basename(logger.filepath), finalize)
             else:
-                time.sleep(self.interval)
-        logger.save()
-        reader.close()
-        if status_callback:
-            status_callback("記録停止")
+                finalize()
+            if status_callback:
+                status_callback("記録停止")
+
+    @staticmethod
+    def _clip_metadata(session_clock, guard, latency, publisher):
+        """
+        トリガー記録のクリップに付けるメタデータ
+        メインのロガーは保存しないため、記録終了時に付ける情報もクリップの確定時点の値で載せる
+        """
+        meta = {"clock_info": session_clock.metadata()}
+        if guard is not None:
+            meta["realtime"] = guard.report()
+        if latency is not None:
+            meta["latency"] = latency.summary()
+        if publisher is not None:
+            meta["telemetry"] = publisher.stats()
+        return meta
+
+    def _create_reader(self):
+        reader_cls = READER_BACKENDS.get(self.backend, InputReader)
+        if reader_cls is InputReader:
+            return InputReader(collect_events=self.latency_mode)
+        if reader_cls in (READER_BACKENDS.get("evdev"), READER_BACKENDS.get("evdev-dump")):
+            return reader_cls(collect_events=self.latency_mode, **self.reader_options)
+        return reader_cls(**self.reader_options)
+
+    def fire_trigger(self, name="hotkey"):
+        """外部ホットキーなどからトリガーを発火する（トリガー記録中のみ有効）"""
+        if self.recorder is not None:
+            self.recorder.fire(name)
 
     def stop(self):
-        self.running = False
\ No newline at end of file
+        self.running = False
@@ -1,22 +1,87 @@
 # loggers/main_logger.py
 
+import os
+import threading
+
 class MainLogger:
     """
     ログデータを記録し、指定形式で保存するためのクラス
     - 使用する形式は設定から変更可能
+    - 複数のロガークラスを渡すと1回の記録を各形式へファンアウトする
     - log() でデータを追加
     - save() でファイルに保存
     """
     def __init__(self, logger_class, log_dir="logs", **kwargs):
         """
-        :param logger_class: 使用するロガークラス（ParquetLogger や CSVLogger）
+        :param logger_class: 使用するロガークラス（ParquetLogger や CSVLogger）またはそのリスト
         :param log_dir: 保存先ディレクトリ
         :param kwargs: ロガークラスの初期化パラメータ
         """
-        self.logger = logger_class(log_dir=log_dir, **kwargs)
+        classes = list(logger_class) if isinstance(logger_class, (list, tuple)) else [logger_class]
+        filename = kwargs.pop("filename", None)
+        self.loggers = []
+        for i, cls in enumerate(classes):
+            name = filename
+            if name and i > 0:
+                # 2つ目以降は拡張子だけ各形式のものに差し替える
+                name = os.path.splitext(name)[0] + os.path.splitext(cls.default_filename)[1]
+            if name:
+                self.loggers.append(cls(log_dir=log_dir, filename=name, **kwargs))
+            else:
+                self.loggers.append(cls(log_dir=log_dir, **kwargs))
+        self.logger = self.loggers[0]
+        # レコードとメタデータは全ロガーで共有（記録スレッドの追加コストは1回の append のみ）
+        for extra in self.loggers[1:]:
+            extra.records = self.logger.records
+            extra.metadata = self.logger.metadata
 
     def log(self, data: dict):
         self.logger.log(data)
 
-    def save(self):
-        self.logger.save()
+    def pending_count(self) -> int:
+        return self.logger.pending_count()
+
+    @property
+    def filepath(self) -> str:
+        return self.logger.filepath
+
+    @property
+    def filepaths(self):
+        return [lg.filepath for lg in self.loggers]
+
+    def set_metadata(self, key: str, value):
+        """保存時にファイルへ埋め込むメタデータを設定"""
+        self.logger.metadata[key] = value
+
+    def save(self, progress=None):
+        """保存し、保存に使った DataFrame を返す（保存後の集計などで作り直さないため）"""
+        # DataFrame 変換は1回だけ行う
+        df = self.logger._to_dataframe()
+        if len(self.loggers) == 1:
+            self.logger.save(progress, df=df)
+            return df
+        # 各形式の書き込みはそれぞれのスレッドで並行実行
+        fractions = [0.0] * len(self.loggers)
+        errors = []
+
+        def run(i, lg):
+            def report(fraction):
+                fractions[i] = fraction
+                if progress:
+                    progress(sum(fractions) / len(fractions))
+            try:
+                lg.save(report, df=df)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=run, args=(i, lg), name=f"save-{type(lg).__name__}")
+            for i, lg in enumerate(self.loggers)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+        return df
@@ -0,0 +1,32 @@
+# loggers/metadata.py
+
+import json
+import os
+
+from .companions import companion_path
+
+# Parquet のスキーマメタデータのキー（CSV はサイドカー JSON に保存）
+METADATA_KEY = b"controller_logger"
+CSV_METADATA_SUFFIX = ".meta.json"
+
+
+def read_metadata(path: str) -> dict:
+    """セッションログに保存されたメタデータを返す（なければ空の dict）"""
+    try:
+        if path.lower().endswith(".parquet"):
+            import pyarrow.parquet as pq
+            meta = pq.read_schema(path).metadata or {}
+            raw = meta.get(METADATA_KEY)
+            return json.loads(raw) if raw else {}
+        sidecar = companion_path(path, CSV_METADATA_SUFFIX)
+        if os.path.exists(sidecar):
+            with open(sidecar, "r", encoding="utf-8") as f:
+                return json.load(f)
+    except Exception:
+        pass
+    return {}
+
+
+def write_sidecar(path: str, metadata: dict):
+    with open(companion_path(path, CSV_METADATA_SUFFIX), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,157 @@
+# loggers/metrics.py
+
+import json
+import time
+from bisect import bisect_left
+from collections import deque
+
+
+class LatencyHistogram:
+    """
+    固定バケットの軽量ヒストグラム（秒単位で記録）
+    - add() はバケット探索と加算のみ（割り当てなし）
+    - パーセンタイルはバケット上限で近似
+    """
+    # バケット上限（秒）。最後のバケットは上限なし
+    BOUNDS = (
+        50e-6, 100e-6, 250e-6, 500e-6,
+        1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3, 100e-3, 250e-3,
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect_left(self.BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """q (0-100) パーセンタイルの近似値（秒）"""
+        if not self.count:
+            return 0.0
+        target = self.count * q / 100.0
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                return self.BOUNDS[i] if i < len(self.BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.mean() * 1000.0,
+            "p50_ms": self.percentile(50) * 1000.0,
+            "p99_ms": self.percentile(99) * 1000.0,
+            "max_ms": self.max * 1000.0,
+            "buckets": list(self.counts),
+        }
+
+
+class WorkerMetrics:
+    """
+    LoggerWorker のホットパス計測用メトリクス
+    - 読み取り/ログ追加/コールバックの所要時間ヒストグラム
+    - 実効Hz、遅延ティック数、ドロップティック数
+    - バッファ深さ、書き込みバイト数
+    ワーカースレッドが書き込み、GUI は snapshot() で読み出す。
+    """
+    def __init__(self, history_size=3600, snapshot_interval=1.0):
+        self.read_latency = LatencyHistogram()
+        self.log_latency = LatencyHistogram()
+        self.callback_latency = LatencyHistogram()
+        self.snapshot_interval = snapshot_interval
+        self.history = deque(maxlen=history_size)
+        self.interval = 0.0
+        self.reset()
+
+    def reset(self, interval=None):
+        if interval is not None:
+            self.interval = float(interval)
+        self.read_latency.reset()
+        self.log_latency.reset()
+        self.callback_latency.reset()
+        self.history.clear()
+        self.ticks = 0
+        self.late_ticks = 0
+        self.dropped_ticks = 0
+        self.buffer_depth = 0
+        self.bytes_written = 0
+        self.achieved_hz = 0.0
+        self.started_at = time.time()
+        self._last_tick = None
+        self._window_start = None
+        self._window_ticks = 0
+        self._last_snapshot = None
+
+    def tick(self, now: float):
+        """ループ1周の開始時に呼ぶ（now は time.perf_counter()）"""
+        self.ticks += 1
+        last = self._last_tick
+        self._last_tick = now
+        if last is None:
+            self._window_start = now
+            self._last_snapshot = now
+            return
+        # 周期が設定間隔の1.5倍を超えたら遅延、2倍以上なら取りこぼし分をドロップとして数える
+        period = now - last
+        interval = self.interval
+        if interval > 0 and period > interval * 1.5:
+            self.late_ticks += 1
+            missed = int(period / interval) - 1
+            if missed > 0:
+                self.dropped_ticks += missed
+        self._window_ticks += 1
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.achieved_hz = self._window_ticks / elapsed
+            self._window_start = now
+            self._window_ticks = 0
+        if now - self._last_snapshot >= self.snapshot_interval:
+            self._last_snapshot = now
+            self.history.append(self.snapshot())
+
+    def record(self, read_dt: float, log_dt: float, callback_dt: float, buffer_depth: int):
+        """1周分の計測値を記録"""
+        self.read_latency.add(read_dt)
+        self.log_latency.add(log_dt)
+        self.callback_latency.add(callback_dt)
+        self.buffer_depth = buffer_depth
+
+    def snapshot(self) -> dict:
+        return {
+            "time": time.time(),
+            "uptime": time.time() - self.started_at,
+            "interval": self.interval,
+            "ticks": self.ticks,
+            "achieved_hz": self.achieved_hz,
+            "late_ticks": self.late_ticks,
+            "dropped_ticks": self.dropped_ticks,
+            "buffer_depth": self.buffer_depth,
+            "bytes_written": self.bytes_written,
+            "read": self.read_latency.to_dict(),
+            "log": self.log_latency.to_dict(),
+            "callback": self.callback_latency.to_dict(),
+        }
+
+    def to_json_line(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False)
+
+    def export_jsonl(self, path: str):
+        """履歴スナップショット＋現在値を JSON Lines で書き出す"""
+        with open(path, "w", encoding="utf-8") as f:
+            for snap in list(self.history):
+                f.write(json.dumps(snap, ensure_ascii=False) + "\n")
+            f.write(self.to_json_line() + "\n")
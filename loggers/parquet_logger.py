@@ -1,15 +1,51 @@
 import os
+import json
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from .base_logger import BaseLogger
+from .metadata import METADATA_KEY
+
+
+def parquet_writer_options(schema) -> dict:
+    """ParquetWriter の符号化オプション（記録時と変換時で共通）"""
+    options = {}
+    if "timestamp" in schema.names and pa.types.is_integer(schema.field("timestamp").type):
+        # 単調増加の整数タイムスタンプは差分符号化で小さくなる
+        options["use_dictionary"] = [c for c in schema.names if c != "timestamp"]
+        options["column_encoding"] = {"timestamp": "DELTA_BINARY_PACKED"}
+    return options
+
 
 class ParquetLogger(BaseLogger):
     """
     Parquet形式でログを保存するロガークラス
     """
+    default_filename = "log.parquet"
+    # 再生時のシーク単位になるため row group は小さめに分割する
+    row_group_size = 65536
+
     def __init__(self, log_dir="logs", filename="log.parquet", **kwargs):
         super().__init__(log_dir=log_dir, filename=filename, **kwargs)
 
-    def save(self):
-        df = self._to_dataframe()
-        filepath = os.path.join(self.log_dir, self.filename or "log.parquet")
-        df.to_parquet(filepath, index=False)
\ No newline at end of file
+    def save(self, progress=None, df=None):
+        report = progress or (lambda fraction: None)
+        if df is None:
+            df = self._to_dataframe()
+        report(0.2)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.metadata:
+            meta = dict(table.schema.metadata or {})
+            meta[METADATA_KEY] = json.dumps(self.metadata, ensure_ascii=False).encode("utf-8")
+            table = table.replace_schema_metadata(meta)
+        options = parquet_writer_options(table.schema)
+        report(0.3)
+        # 一時ファイルに row group 単位で書き、完了後に置き換える
+        tmp = self.filepath + ".part"
+        n = table.num_rows
+        step = self.row_group_size
+        with pq.ParquetWriter(tmp, table.schema, **options) as writer:
+            for start in range(0, max(n, 1), step):
+                writer.write_table(table.slice(start, step), row_group_size=step)
+                report(0.3 + 0.7 * min(n, start + step) / max(n, 1))
+        os.replace(tmp, self.filepath)
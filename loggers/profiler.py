@@ -0,0 +1,130 @@
+# loggers/profiler.py
+
+import os
+import sys
+import threading
+from array import array
+
+from .companions import companion_path
+
+PHASES = ("read", "pack", "log", "emit", "sleep")
+
+
+class PhaseRing:
+    """
+    キャプチャループのフェーズ別所要時間（秒）を保持する事前確保リングバッファ
+    - record() は既存領域への代入のみ（割り当てなし）
+    - 容量を超えると古い周回から上書き
+    """
+    def __init__(self, capacity=65536):
+        self.capacity = int(capacity)
+        self.width = len(PHASES)
+        self.data = array("d", bytes(8 * self.capacity * self.width))
+        self.count = 0
+
+    def record(self, read, pack, log, emit, sleep):
+        base = (self.count % self.capacity) * self.width
+        d = self.data
+        d[base] = read
+        d[base + 1] = pack
+        d[base + 2] = log
+        d[base + 3] = emit
+        d[base + 4] = sleep
+        self.count += 1
+
+    def rows(self):
+        """古い順に (read, pack, log, emit, sleep) を返す"""
+        n = min(self.count, self.capacity)
+        start = self.count - n
+        w = self.width
+        for i in range(start, self.count):
+            base = (i % self.capacity) * w
+            yield tuple(self.data[base:base + w])
+
+    def summary(self) -> dict:
+        n = min(self.count, self.capacity)
+        out = {}
+        for p, name in enumerate(PHASES):
+            vals = [self.data[(i % self.capacity) * self.width + p] for i in range(self.count - n, self.count)]
+            out[name] = {
+                "mean_ms": (sum(vals) / n * 1000.0) if n else 0.0,
+                "max_ms": (max(vals) * 1000.0) if n else 0.0,
+            }
+        return out
+
+    def export_csv(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(",".join(f"{p}_ms" for p in PHASES) + "\n")
+            for row in self.rows():
+                f.write(",".join(f"{v * 1000.0:.4f}" for v in row) + "\n")
+
+
+class StackSampler:
+    """
+    指定スレッドのスタックを定期サンプリングし、flamegraph.pl 互換の
+    collapsed 形式（"f1;f2;f3 count"）で書き出す
+    """
+    def __init__(self, thread_id: int, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+
+    def write_folded(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for key, n in sorted(self.counts.items()):
+                f.write(f"{key} {n}\n")
+
+
+class CaptureProfiler:
+    """フェーズ計測とスタックサンプリングをまとめたプロファイラ（オプトイン）"""
+    def __init__(self, capacity=65536, sample_interval=0.005):
+        self.phases = PhaseRing(capacity)
+        self.sample_interval = sample_interval
+        self.sampler = None
+
+    def start(self):
+        """計測対象スレッド上で呼ぶ"""
+        self.sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        self.sampler.start()
+
+    def stop(self):
+        if self.sampler:
+            self.sampler.stop()
+
+    def save(self, session_path: str):
+        """セッションログと同じ場所に <名前>.phases.csv / <名前>.folded を保存"""
+        self.phases.export_csv(companion_path(session_path, ".phases.csv"))
+        if self.sampler:
+            self.sampler.write_folded(companion_path(session_path, ".folded"))
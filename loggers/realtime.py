@@ -0,0 +1,185 @@
+# loggers/realtime.py
+
+import gc
+import os
+import sys
+import threading
+import time
+
+
+class RealtimeGuard:
+    """
+    キャプチャスレッドの「リアルタイム」プロファイル（オプトイン）
+    - GC: 開始時点のオブジェクトを gc.freeze() で永続世代へ移し、自動 GC を止める。
+      代わりにループの待ち時間（スリープ直前）で collect_interval ごとに回収する。
+      第0世代の閾値を超えたら第0世代、第1/第2世代の閾値も超えていればその世代まで回収する
+      （自動 GC と同じ昇格の規則。第0世代だけでは古い世代に循環ゴミがたまり続ける）。
+      gc="off" は記録終了まで回収しない。GC の有効/無効はプロセス全体に効く点に注意。
+    - CPU 固定: 呼び出したスレッドを cpu 番号に固定する（Linux: sched_setaffinity、Windows: SetThreadAffinityMask）
+    - 優先度: "nice"（nice 値を下げる）/ "fifo"（SCHED_FIFO、Linux）/ "high"（Windows のスレッド優先度）
+      権限がなければ何もせず、その結果を記録する
+    enter()/exit() はキャプチャスレッド自身から呼ぶこと。exit() は何度呼んでもよい
+    （enter() の途中で失敗した場合も含め、try/finally から必ず呼ぶ）。
+    """
+    def __init__(self, gc_mode="controlled", collect_interval=1.0, cpu=None, priority="nice",
+                 nice=-10, fifo_priority=10):
+        self.gc_mode = gc_mode
+        self.collect_interval = collect_interval
+        self.cpu = cpu
+        self.priority = priority
+        self.nice = nice
+        self.fifo_priority = fifo_priority
+        self._gc_was_enabled = True
+        self._next_collect = 0.0
+        self.stats = {
+            "gc_mode": gc_mode,
+            "gc_frozen_objects": 0,
+            "gc_controlled_collections": 0,
+            # 世代ごとの回収回数（第0/第1/第2世代まで）
+            "gc_collections_by_gen": [0, 0, 0],
+            "gc_collected_objects": 0,
+            "gc_collect_ms_total": 0.0,
+            "gc_collect_ms_max": 0.0,
+            # 自動 GC であれば走っていたはずの回数（第0世代の閾値超え）
+            "gc_deferred": 0,
+            # 他のスレッドなどから走った GC の回数
+            "gc_other_collections": 0,
+            "affinity": None,
+            "priority": None,
+        }
+        self._in_controlled = False
+        self._gc_entered = False
+        # exit() で元に戻すための CPU 固定・優先度の変更前の値
+        self._undo = []
+
+    # ---- 開始 / 終了 ----
+
+    def enter(self):
+        if self.gc_mode in ("controlled", "off"):
+            self._gc_was_enabled = gc.isenabled()
+            self._gc_entered = True
+            gc.collect()
+            if hasattr(gc, "freeze"):
+                gc.freeze()
+                self.stats["gc_frozen_objects"] = gc.get_freeze_count()
+            gc.disable()
+            gc.callbacks.append(self._on_gc)
+            self._next_collect = time.perf_counter() + self.collect_interval
+        if self.cpu is not None:
+            self.stats["affinity"] = self._set_affinity(int(self.cpu))
+        if self.priority and self.priority != "none":
+            self.stats["priority"] = self._raise_priority()
+
+    def exit(self):
+        if self._gc_entered:
+            self._gc_entered = False
+            try:
+                gc.callbacks.remove(self._on_gc)
+            except ValueError:
+                pass
+            if hasattr(gc, "unfreeze"):
+                gc.unfreeze()
+            if self._gc_was_enabled:
+                gc.enable()
+        # CPU 固定・優先度は変更と逆の順に戻す
+        while self._undo:
+            undo = self._undo.pop()
+            try:
+                undo()
+            except (OSError, ValueError):
+                pass
+
+    def idle(self, now: float):
+        """ループの待ち時間の直前に呼ぶ（回収はここでのみ行う）"""
+        if self.gc_mode != "controlled" or now < self._next_collect:
+            return
+        self._next_collect = now + self.collect_interval
+        threshold = gc.get_threshold()
+        count = gc.get_count()
+        if count[0] < threshold[0]:
+            return
+        # 第0世代の回収回数が第1世代の閾値を超えたら第1世代、さらに第2世代も同様に
+        generation = 0
+        if threshold[1] and count[1] >= threshold[1]:
+            generation = 1
+            if threshold[2] and count[2] >= threshold[2]:
+                generation = 2
+        self.stats["gc_deferred"] += 1
+        self._in_controlled = True
+        t0 = time.perf_counter()
+        n = gc.collect(generation)
+        ms = (time.perf_counter() - t0) * 1000.0
+        self._in_controlled = False
+        st = self.stats
+        st["gc_controlled_collections"] += 1
+        st["gc_collections_by_gen"][generation] += 1
+        st["gc_collected_objects"] += n
+        st["gc_collect_ms_total"] += ms
+        if ms > st["gc_collect_ms_max"]:
+            st["gc_collect_ms_max"] = ms
+
+    def report(self) -> dict:
+        stats = dict(self.stats)
+        stats["gc_collections_by_gen"] = list(stats["gc_collections_by_gen"])
+        return stats
+
+    def _on_gc(self, phase, info):
+        if phase == "start" and not self._in_controlled:
+            self.stats["gc_other_collections"] += 1
+
+    # ---- CPU 固定 / 優先度 ----
+
+    def _set_affinity(self, cpu: int) -> dict:
+        try:
+            if hasattr(os, "sched_setaffinity"):
+                # Linux では pid=0 は呼び出したスレッド
+                before = os.sched_getaffinity(0)
+                os.sched_setaffinity(0, {cpu})
+                self._undo.append(lambda: os.sched_setaffinity(0, before))
+                return {"cpu": cpu, "applied": True}
+            if sys.platform == "win32":
+                import ctypes
+                k32 = ctypes.windll.kernel32
+                k32.GetCurrentThread.restype = ctypes.c_void_p
+                k32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+                k32.SetThreadAffinityMask.restype = ctypes.c_size_t
+                before = k32.SetThreadAffinityMask(k32.GetCurrentThread(), 1 << cpu)
+                ok = bool(before)
+                if ok:
+                    self._undo.append(lambda: k32.SetThreadAffinityMask(k32.GetCurrentThread(), before))
+                return {"cpu": cpu, "applied": bool(ok)}
+            return {"cpu": cpu, "applied": False, "error": "unsupported"}
+        except (OSError, ValueError) as e:
+            return {"cpu": cpu, "applied": False, "error": str(e)}
+
+    def _raise_priority(self) -> dict:
+        mode = self.priority
+        try:
+            if mode == "fifo" and hasattr(os, "sched_setscheduler"):
+                policy, param = os.sched_getscheduler(0), os.sched_getparam(0)
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.fifo_priority))
+                self._undo.append(lambda: os.sched_setscheduler(0, policy, param))
+                return {"mode": "fifo", "applied": True, "value": self.fifo_priority}
+            if sys.platform == "win32":
+                import ctypes
+                k32 = ctypes.windll.kernel32
+                k32.GetCurrentThread.restype = ctypes.c_void_p
+                k32.SetThreadPriority.argtypes = [ctypes.c_void_p, ctypes.c_int]
+                k32.GetThreadPriority.argtypes = [ctypes.c_void_p]
+                # THREAD_PRIORITY_HIGHEST / TIME_CRITICAL
+                value = 15 if mode == "fifo" else 2
+                before = k32.GetThreadPriority(k32.GetCurrentThread())
+                ok = k32.SetThreadPriority(k32.GetCurrentThread(), value)
+                if ok:
+                    self._undo.append(lambda: k32.SetThreadPriority(k32.GetCurrentThread(), before))
+                return {"mode": mode, "applied": bool(ok), "value": value}
+            if hasattr(os, "setpriority"):
+                # Linux ではスレッド ID を指定するとそのスレッドだけに効く
+                tid = threading.get_native_id()
+                before = os.getpriority(os.PRIO_PROCESS, tid)
+                os.setpriority(os.PRIO_PROCESS, tid, self.nice)
+                self._undo.append(lambda: os.setpriority(os.PRIO_PROCESS, tid, before))
+                return {"mode": "nice", "applied": True, "value": self.nice}
+            return {"mode": mode, "applied": False, "error": "unsupported"}
+        except (OSError, ValueError) as e:
+            return {"mode": mode, "applied": False, "error": str(e)}
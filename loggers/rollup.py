@@ -0,0 +1,127 @@
+# loggers/rollup.py
+
+import math
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ROLLUP_SUFFIX = ".rollup.parquet"
+# トリガーの軸（静止位置が -1.0、いっぱいに引くと 1.0。ControllerWidget の lt/rt と同じ）
+TRIGGER_AXES = (4, 5)
+
+
+def axis_deflection(axes):
+    """
+    軸ごとの静止位置からの振れ（0-1）
+    スティックは絶対値、トリガーは (a + 1) / 2。axes は1サンプルのリスト、または [サンプル, 軸] の配列
+    """
+    if isinstance(axes, np.ndarray):
+        d = np.abs(axes)
+        if axes.ndim == 2:
+            for i in TRIGGER_AXES:
+                if i < axes.shape[1]:
+                    d[:, i] = (axes[:, i] + 1.0) * 0.5
+        return d
+    return [(a + 1.0) * 0.5 if i in TRIGGER_AXES else abs(a) for i, a in enumerate(axes)]
+
+
+class RollupAccumulator:
+    """
+    記録中に時間窓（既定1秒）ごとの集計を逐次更新する
+    - ボタン押下回数（立ち上がりの数）
+    - 軸ごとの件数・合計・二乗和・最小・最大（平均/標準偏差は保存時に算出）
+    - アクティブ時間（いずれかのボタン押下中、または軸の静止位置からの振れが閾値を超えている時間）
+    窓の境界は壁時計（UNIX 時刻）に揃えるため、セッションをまたいで結合できる。
+    """
+    def __init__(self, headers, window=1.0, offset_ns=0, active_threshold=0.2, max_gap=1.0):
+        self.axis_names = [h for h in headers if h.startswith("axis")]
+        self.button_names = [h for h in headers if h.startswith("button") or h.startswith("dpad_")]
+        self.window_ns = max(1, int(window * 1e9))
+        self.window = window
+        # 単調時計 → UNIX 時刻（ns）のオフセット
+        self.offset_ns = int(offset_ns)
+        self.active_threshold = active_threshold
+        self.max_gap_ns = int(max_gap * 1e9)
+        self.rows = []
+        self._key = None
+        self._prev_buttons = None
+        self._last_ts = None
+
+    def _reset(self, key):
+        na, nb = len(self.axis_names), len(self.button_names)
+        self._key = key
+        self._n = 0
+        self._active_ns = 0
+        self._presses = [0] * nb
+        self._sum = [0.0] * na
+        self._sumsq = [0.0] * na
+        self._min = [math.inf] * na
+        self._max = [-math.inf] * na
+
+    def _flush(self):
+        if self._key is None or self._n == 0:
+            return
+        self.rows.append((
+            self._key, self._n, self._active_ns, self._presses,
+            self._sum, self._sumsq, self._min, self._max,
+        ))
+
+    def add(self, timestamp_ns: int, axes, buttons):
+        key = (timestamp_ns + self.offset_ns) // self.window_ns
+        if key != self._key:
+            self._flush()
+            self._reset(key)
+        self._n += 1
+
+        # アクティブ時間は前サンプルからの経過時間を加算（長い空白は打ち切り）
+        last = self._last_ts
+        self._last_ts = timestamp_ns
+        th = self.active_threshold
+        active = any(buttons) or any(d > th for d in axis_deflection(axes))
+        if active and last is not None:
+            self._active_ns += min(timestamp_ns - last, self.max_gap_ns)
+
+        prev = self._prev_buttons
+        if prev is not None and buttons != prev:
+            presses = self._presses
+            for i, (b, p) in enumerate(zip(buttons, prev)):
+                if b and not p:
+                    presses[i] += 1
+        self._prev_buttons = buttons
+
+        s, sq, mn, mx = self._sum, self._sumsq, self._min, self._max
+        for i, a in enumerate(axes):
+            s[i] += a
+            sq[i] += a * a
+            if a < mn[i]:
+                mn[i] = a
+            if a > mx[i]:
+                mx[i] = a
+
+    def to_table(self) -> pa.Table:
+        self._flush()
+        self._key = None
+        rows = self.rows
+        cols = {
+            "window_start": [r[0] * self.window_ns / 1e9 for r in rows],
+            "window_s": [float(self.window)] * len(rows),
+            "samples": [r[1] for r in rows],
+            "active_s": [r[2] / 1e9 for r in rows],
+        }
+        for j, name in enumerate(self.button_names):
+            cols[f"{name}_presses"] = [r[3][j] for r in rows]
+        for j, name in enumerate(self.axis_names):
+            n = [r[1] for r in rows]
+            sums = [r[4][j] for r in rows]
+            sqs = [r[5][j] for r in rows]
+            cols[f"{name}_sum"] = sums
+            cols[f"{name}_sumsq"] = sqs
+            cols[f"{name}_min"] = [r[6][j] for r in rows]
+            cols[f"{name}_max"] = [r[7][j] for r in rows]
+            cols[f"{name}_mean"] = [s / c for s, c in zip(sums, n)]
+            cols[f"{name}_std"] = [math.sqrt(max(0.0, q / c - (s / c) ** 2)) for s, q, c in zip(sums, sqs, n)]
+        return pa.table(cols)
+
+    def write(self, path: str):
+        pq.write_table(self.to_table(), path)
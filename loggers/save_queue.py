@@ -0,0 +1,79 @@
+# loggers/save_queue.py
+
+import queue
+import threading
+import time
+
+
+class SaveJob:
+    """保存ジョブ1件の状態（queued / saving / done / error）"""
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+        self.state = "queued"
+        self.progress = 0.0
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        # 呼び出し側が失敗を通知済みかどうか
+        self.notified = False
+
+    def _report(self, fraction: float):
+        self.progress = max(0.0, min(1.0, float(fraction)))
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "error")
+
+
+class SaveQueue:
+    """
+    セッションの保存（DataFrame/Arrow 変換・圧縮・書き込み）を
+    バックグラウンドスレッドで順番に処理するキュー
+    - submit() はすぐ戻るため、保存中でも次の記録を開始できる
+    - func(progress) の progress(0.0-1.0) で進捗を報告する
+    """
+    def __init__(self, history=20):
+        self._queue = queue.Queue()
+        self._jobs = []
+        self._history = history
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="SaveQueue", daemon=True)
+        self._thread.start()
+
+    def submit(self, name, func) -> SaveJob:
+        job = SaveJob(name, func)
+        with self._lock:
+            self._jobs.append(job)
+            # 完了済みの古い履歴は捨てる
+            done = [j for j in self._jobs if j.finished]
+            for j in done[:max(0, len(done) - self._history)]:
+                self._jobs.remove(j)
+        self._queue.put(job)
+        return job
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs)
+
+    def active_jobs(self):
+        return [j for j in self.jobs() if not j.finished]
+
+    def wait(self):
+        """キューが空になるまで待つ（終了時用）"""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                job.state = "saving"
+                job.func(job._report)
+                job.progress = 1.0
+                job.state = "done"
+            except Exception as e:
+                job.error = e
+                job.state = "error"
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
@@ -0,0 +1,333 @@
+# loggers/telemetry.py
+"""
+記録中のサンプルをローカルソケットで配信する
+
+アドレスは "unix:/tmp/controller_logger.sock" または "tcp:127.0.0.1:8765"（localhost のみ）。
+フレーム形式（リトルエンディアン）:
+    [type: u8][length: u32][payload]
+    type=1 スキーマ  payload は JSON（headers, record_format, n_axes, n_buttons, timestamp_unit）
+    type=2 バッチ    payload は [count: u32][dropped: u32] に続いて count 件のレコード
+                     レコード = timestamp int64 ns, axes float32 × n_axes, buttons のビット列
+接続直後にスキーマを1回送り、以降は flush_interval ごとにバッチを送る。
+キャプチャ側の処理はキューへの追加のみで、送信は配信スレッドが行う。
+遅い購読者は送信待ちが上限を超えた時点で、古いバッチを捨てて最新サンプルだけに
+まとめる（coalesce）か、新しいバッチを捨てる（drop）。いずれも捨てた件数は次のバッチで通知する。
+"""
+
+import json
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+FRAME_HEADER = struct.Struct("<BI")
+BATCH_HEADER = struct.Struct("<II")
+FRAME_SCHEMA = 1
+FRAME_BATCH = 2
+SCHEMA_VERSION = 1
+
+
+def record_dtype(n_axes: int, n_buttons: int) -> np.dtype:
+    """1サンプルのバイナリ表現（パディングなし）"""
+    return np.dtype([
+        ("timestamp", "<i8"),
+        ("axes", "<f4", (n_axes,)),
+        ("buttons", "u1", ((n_buttons + 7) // 8,)),
+    ])
+
+
+def schema_for(headers) -> dict:
+    """get_headers() の列名からスキーマを作る"""
+    n_axes = sum(1 for h in headers if h.startswith("axis"))
+    buttons = [h for h in headers if h.startswith("button") or h.startswith("dpad_")]
+    return {
+        "version": SCHEMA_VERSION,
+        "headers": list(headers),
+        "n_axes": n_axes,
+        "n_buttons": len(buttons),
+        "timestamp_unit": "ns",
+        "record_format": f"<q{n_axes}f{(len(buttons) + 7) // 8}B",
+    }
+
+
+def parse_address(address: str):
+    """(family, sockaddr) を返す"""
+    kind, _, rest = address.partition(":")
+    if kind == "unix":
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError(f"この環境では UNIX ソケットを使用できません（tcp: を指定してください）: {address}")
+        return socket.AF_UNIX, rest
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        host = host or "127.0.0.1"
+        if host not in ("127.0.0.1", "localhost"):
+            raise ValueError(f"TCP は localhost のみ使用できます: {address}")
+        return socket.AF_INET, (host, int(port))
+    raise ValueError(f"未対応のアドレスです: {address}")
+
+
+class _Subscriber:
+    def __init__(self, sock):
+        self.sock = sock
+        self.frames = []
+        self.pending_bytes = 0
+        self.offset = 0
+        self.dropped = 0
+        self.registered = False
+
+
+class TelemetryPublisher:
+    """
+    サンプルをローカルの購読者に配信する
+    :param address: "unix:パス" または "tcp:ホスト:ポート"
+    :param flush_interval: バッチ送信の間隔（秒）
+    :param max_pending: 購読者ごとの送信待ちの上限（バイト）
+    :param policy: 上限を超えたときの扱い（"coalesce" / "drop"）
+    """
+    def __init__(self, address, headers, flush_interval=0.02, max_pending=1 << 20, policy="coalesce"):
+        self.address = address
+        self.schema = schema_for(headers)
+        self.dtype = record_dtype(self.schema["n_axes"], self.schema["n_buttons"])
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.policy = policy
+        self.samples_sent = 0
+        self.samples_dropped = 0
+        self.subscribers_total = 0
+        # キャプチャスレッドが append、配信スレッドが popleft する（どちらもスレッドセーフ）
+        self._pending = deque()
+        self._subs = []
+        self._running = False
+        self._thread = None
+        self._server = None
+        self._sel = None
+        self._schema_frame = self._frame(FRAME_SCHEMA, json.dumps(self.schema).encode("utf-8"))
+
+    def start(self):
+        family, addr = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(addr):
+            os.unlink(addr)
+        srv = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        srv.bind(addr)
+        srv.listen(8)
+        srv.setblocking(False)
+        self._server = srv
+        self._sel = selectors.DefaultSelector()
+        self._sel.register(srv, selectors.EVENT_READ)
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="TelemetryPublisher", daemon=True)
+        self._thread.start()
+
+    def publish(self, timestamp, axes, buttons):
+        """キャプチャスレッドから毎サンプル呼ぶ（キューへの追加のみ）"""
+        self._pending.append((timestamp, axes, buttons))
+
+    def close(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        for sub in self._subs:
+            try:
+                sub.sock.close()
+            except OSError:
+                pass
+        self._subs = []
+        if self._server is not None:
+            self._server.close()
+            family, addr = parse_address(self.address)
+            if family == socket.AF_UNIX:
+                try:
+                    os.unlink(addr)
+                except OSError:
+                    pass
+            self._server = None
+        if self._sel is not None:
+            self._sel.close()
+            self._sel = None
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subs),
+            "subscribers_total": self.subscribers_total,
+            "samples_sent": self.samples_sent,
+            "samples_dropped": self.samples_dropped,
+        }
+
+    # ---- 配信スレッド ----
+
+    @staticmethod
+    def _frame(kind, payload):
+        return FRAME_HEADER.pack(kind, len(payload)) + payload
+
+    def _encode(self, samples, dropped=0):
+        n = len(samples)
+        rec = np.zeros(n, dtype=self.dtype)
+        if n:
+            rec["timestamp"] = [s[0] for s in samples]
+            if self.schema["n_axes"]:
+                rec["axes"] = [s[1] for s in samples]
+            nb = self.schema["n_buttons"]
+            if nb:
+                bits = np.array([s[2] for s in samples], dtype=np.uint8).reshape(n, nb)
+                rec["buttons"] = np.packbits(bits, axis=1, bitorder="little")
+        payload = BATCH_HEADER.pack(n, dropped) + rec.tobytes()
+        return self._frame(FRAME_BATCH, payload)
+
+    def _loop(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while self._running:
+            timeout = max(0.0, next_flush - time.monotonic())
+            for key, events in self._sel.select(timeout):
+                if key.fileobj is self._server:
+                    self._accept()
+                elif events & selectors.EVENT_WRITE:
+                    self._send(key.data)
+            if time.monotonic() >= next_flush:
+                next_flush += self.flush_interval
+                if next_flush < time.monotonic():
+                    next_flush = time.monotonic() + self.flush_interval
+                self._flush()
+        # 停止時に残りを送る
+        self._flush()
+        for sub in list(self._subs):
+            self._send(sub)
+
+    def _accept(self):
+        try:
+            sock, _ = self._server.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        sub = _Subscriber(sock)
+        self._subs.append(sub)
+        self.subscribers_total += 1
+        self._queue(sub, self._schema_frame)
+        self._send(sub)
+
+    def _flush(self):
+        pending = self._pending
+        n = len(pending)
+        if not n:
+            return
+        # 数えた件数だけ取り出す（取り出し中に追加されたサンプルは次のバッチに回る）
+        popleft = pending.popleft
+        samples = [popleft() for _ in range(n)]
+        if not self._subs:
+            return
+        frame = self._encode(samples)
+        for sub in list(self._subs):
+            if sub.pending_bytes + len(frame) > self.max_pending:
+                self._overflow(sub, samples, frame)
+            else:
+                self._queue(sub, self._encode(samples, sub.dropped) if sub.dropped else frame)
+                sub.dropped = 0
+            self._send(sub)
+        self.samples_sent += len(samples)
+
+    def _overflow(self, sub, samples, frame):
+        """遅い購読者: 未送信のバッチを捨てる（送信途中のフレームは残す）"""
+        if self.policy == "drop":
+            sub.dropped += len(samples)
+            self.samples_dropped += len(samples)
+            return
+        keep = sub.frames[:1] if sub.offset else []
+        lost = 0
+        for f in sub.frames[len(keep):]:
+            if f[0] == FRAME_BATCH:
+                lost += BATCH_HEADER.unpack_from(f, FRAME_HEADER.size)[0]
+        lost += len(samples) - 1
+        sub.frames = keep
+        sub.pending_bytes = sum(len(f) for f in keep) - sub.offset
+        sub.dropped += lost
+        self.samples_dropped += lost
+        self._queue(sub, self._encode(samples[-1:], sub.dropped))
+        sub.dropped = 0
+
+    def _queue(self, sub, frame):
+        sub.frames.append(frame)
+        sub.pending_bytes += len(frame)
+
+    def _send(self, sub):
+        try:
+            while sub.frames:
+                head = sub.frames[0]
+                n = sub.sock.send(memoryview(head)[sub.offset:])
+                sub.offset += n
+                sub.pending_bytes -= n
+                if sub.offset < len(head):
+                    break
+                sub.frames.pop(0)
+                sub.offset = 0
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self._drop_subscriber(sub)
+            return
+        # 送信待ちがある間だけ書き込み可能イベントを待つ
+        want = bool(sub.frames)
+        if want and not sub.registered:
+            self._sel.register(sub.sock, selectors.EVENT_WRITE, sub)
+            sub.registered = True
+        elif not want and sub.registered:
+            self._sel.unregister(sub.sock)
+            sub.registered = False
+
+    def _drop_subscriber(self, sub):
+        if sub.registered:
+            try:
+                self._sel.unregister(sub.sock)
+            except (KeyError, ValueError):
+                pass
+        try:
+            sub.sock.close()
+        except OSError:
+            pass
+        if sub in self._subs:
+            self._subs.remove(sub)
+
+
+def subscribe(address: str):
+    """
+    配信を受け取る（オーバーレイやノートブック用）
+    (schema, records, dropped) を順に返す。records は record_dtype の構造化配列。
+    """
+    family, addr = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.connect(addr)
+    schema, dtype = None, None
+    buf = bytearray()
+    try:
+        while True:
+            chunk = sock.recv(1 << 16)
+            if not chunk:
+                return
+            buf += chunk
+            while len(buf) >= FRAME_HEADER.size:
+                kind, length = FRAME_HEADER.unpack_from(buf)
+                end = FRAME_HEADER.size + length
+                if len(buf) < end:
+                    break
+                payload = bytes(buf[FRAME_HEADER.size:end])
+                del buf[:end]
+                if kind == FRAME_SCHEMA:
+                    schema = json.loads(payload)
+                    dtype = record_dtype(schema["n_axes"], schema["n_buttons"])
+                elif kind == FRAME_BATCH and dtype is not None:
+                    count, dropped = BATCH_HEADER.unpack_from(payload)
+                    records = np.frombuffer(payload, dtype=dtype, count=count, offset=BATCH_HEADER.size)
+                    yield schema, records, dropped
+    finally:
+        sock.close()
+
+
+def unpack_buttons(records, n_buttons: int) -> np.ndarray:
+    """records["buttons"] のビット列を (件数, n_buttons) の 0/1 配列に戻す"""
+    return np.unpackbits(records["buttons"], axis=1, count=n_buttons, bitorder="little")
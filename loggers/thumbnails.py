@@ -0,0 +1,170 @@
+# loggers/thumbnails.py
+
+import os
+import threading
+
+import numpy as np
+
+THUMBNAIL_NAME = ".thumbnails.npz"
+THUMBNAIL_VERSION = 1
+# スパークラインの区間数（セッションの長さに関係なく固定）
+BUCKETS = 48
+
+# 保存キューと GUI の両方から書くため、合流・置き換えはプロセス内で直列にする
+_write_lock = threading.Lock()
+
+
+def activity_profile(t, axes, buttons, buckets=BUCKETS):
+    """
+    一覧のスパークライン用の活動量プロファイル
+    セッションを buckets 個の区間に等分し、区間ごとに
+    - presses: ボタン押下（立ち上がり）の合計（uint16）
+    - stick: スティックの大きさの二乗平均平方根（左右の大きい方、0-255 の uint8）
+    を求める。t は昇順であれば単位を問わない（ns でも秒でも可）。
+    """
+    presses = np.zeros(buckets, dtype=np.uint16)
+    stick = np.zeros(buckets, dtype=np.uint8)
+    t = np.asarray(t, dtype=np.float64)
+    n = len(t)
+    if n == 0:
+        return presses, stick
+    span = t[-1] - t[0]
+    if span > 0:
+        idx = ((t - t[0]) * (buckets / span)).astype(np.int64)
+        np.clip(idx, 0, buckets - 1, out=idx)
+    else:
+        idx = np.zeros(n, dtype=np.int64)
+
+    b = np.asarray(buttons)
+    if b.ndim == 2 and b.shape[1] and n > 1:
+        b = b != 0
+        rises = (b[1:] & ~b[:-1]).sum(axis=1)
+        counts = np.bincount(idx[1:], weights=rises, minlength=buckets)
+        presses[:] = np.minimum(counts, 65535)
+
+    a = np.asarray(axes, dtype=np.float64)
+    if a.ndim == 2:
+        num = np.maximum(np.bincount(idx, minlength=buckets), 1)
+        best = np.zeros(buckets)
+        for ix, iy in ((0, 1), (2, 3)):
+            if a.shape[1] <= iy:
+                break
+            sq = a[:, ix] ** 2 + a[:, iy] ** 2
+            np.maximum(best, np.sqrt(np.bincount(idx, weights=sq, minlength=buckets) / num), out=best)
+        stick[:] = np.round(np.clip(best, 0.0, 1.0) * 255)
+    return presses, stick
+
+
+def profile_from_frame(df, buckets=BUCKETS):
+    """
+    セッションの DataFrame からプロファイルを作る
+    保存時は MainLogger.save() が作った DataFrame をそのまま渡す（ファイルもレコードも読み直さない）
+    """
+    if df is None or not len(df):
+        return activity_profile([], None, None, buckets)
+    cols = list(df.columns)
+    axes = [c for c in cols if c.startswith("axis")]
+    buttons = [c for c in cols if c.startswith("button") or c.startswith("dpad_")]
+    return activity_profile(df["timestamp"].to_numpy(), df[axes].to_numpy(), df[buttons].to_numpy(), buckets)
+
+
+def _load(path: str) -> dict:
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["version"]) != THUMBNAIL_VERSION or z["presses"].shape[1:] != (BUCKETS,):
+                return {}
+            return {
+                str(n): (int(m), int(s), p, k)
+                for n, m, s, p, k in zip(z["names"], z["mtimes"], z["sizes"], z["presses"], z["stick"])
+            }
+    except Exception:
+        return {}
+
+
+def _write(path: str, entries: dict):
+    names = sorted(entries)
+    tmp = path + ".tmp.npz"
+    np.savez(
+        tmp, version=THUMBNAIL_VERSION, names=np.array(names, dtype=str),
+        mtimes=np.array([entries[n][0] for n in names], dtype=np.int64),
+        sizes=np.array([entries[n][1] for n in names], dtype=np.int64),
+        presses=np.array([entries[n][2] for n in names], dtype=np.uint16).reshape(len(names), BUCKETS),
+        stick=np.array([entries[n][3] for n in names], dtype=np.uint8).reshape(len(names), BUCKETS),
+    )
+    os.replace(tmp, path)
+
+
+class ThumbnailCache:
+    """
+    save_dir/.thumbnails.npz: セッションごとの活動量プロファイルのキャッシュ
+    - キーはファイル名と (mtime_ns, size)。ファイルが書き換わった項目は使わない
+    - save() はディスク上の内容と合流してから置き換える（保存キューと GUI の両方が書く）
+    - 消えたセッションの項目は save() のときに捨てる
+    """
+    def __init__(self, save_dir: str):
+        self.save_dir = save_dir
+        self.path = os.path.join(save_dir, THUMBNAIL_NAME)
+        self._entries = {}
+        self._dirty = {}
+        self._loaded_mtime = None
+        self.reload()
+
+    def reload(self) -> bool:
+        """ディスク上のキャッシュが更新されていれば読み直し、読み直したかを返す"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._loaded_mtime:
+            return False
+        self._entries.update(_load(self.path))
+        self._entries.update(self._dirty)
+        self._loaded_mtime = mtime
+        return True
+
+    def get(self, name: str, mtime_ns: int, size: int):
+        """(presses, stick) を返す。ないか古ければ None"""
+        e = self._entries.get(name)
+        if e is None or e[0] != mtime_ns or e[1] != size:
+            return None
+        return e[2], e[3]
+
+    def put(self, name: str, mtime_ns: int, size: int, profile):
+        e = (int(mtime_ns), int(size), profile[0], profile[1])
+        self._entries[name] = e
+        self._dirty[name] = e
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty)
+
+    def save(self):
+        if not self._dirty:
+            return
+        with _write_lock:
+            entries = _load(self.path)
+            entries.update(self._dirty)
+            try:
+                present = set(os.listdir(self.save_dir))
+            except OSError:
+                present = set(entries)
+            entries = {n: e for n, e in entries.items() if n in present}
+            _write(self.path, entries)
+        self._entries.update(entries)
+        self._dirty.clear()
+        try:
+            self._loaded_mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            pass
+
+
+def store_profile(paths, profile):
+    """保存したセッションファイル（複数形式可）のプロファイルをキャッシュに書く"""
+    caches = {}
+    for path in paths:
+        d = os.path.dirname(path) or "."
+        cache = caches.get(d) or caches.setdefault(d, ThumbnailCache(d))
+        st = os.stat(path)
+        cache.put(os.path.basename(path), st.st_mtime_ns, st.st_size, profile)
+    for cache in caches.values():
+        cache.save()
@@ -0,0 +1,182 @@
+# loggers/trigger.py
+
+import os
+import threading
+from collections import deque
+
+from .main_logger import MainLogger
+
+
+class ComboTrigger:
+    """指定ボタンがすべて押された瞬間に発火する（押しっぱなしでは再発火しない）"""
+    def __init__(self, indices, name=None):
+        self.indices = list(indices)
+        self.name = name or "combo"
+        self._held = False
+
+    def check(self, axes, buttons):
+        held = all(buttons[i] for i in self.indices)
+        fired = held and not self._held
+        self._held = held
+        return fired
+
+
+class StickTrigger:
+    """軸の絶対値が閾値を超えた瞬間に発火する"""
+    def __init__(self, index, threshold=0.9, name=None):
+        self.index = index
+        self.threshold = threshold
+        self.name = name or "stick"
+        self._over = False
+
+    def check(self, axes, buttons):
+        a = axes[self.index]
+        over = a > self.threshold or a < -self.threshold
+        fired = over and not self._over
+        self._over = over
+        return fired
+
+
+class HotkeyTrigger:
+    """外部（GUI のショートカットなど）から fire() で発火する"""
+    def __init__(self, name="hotkey"):
+        self.name = name
+        self._event = threading.Event()
+
+    def fire(self):
+        self._event.set()
+
+    def check(self, axes, buttons):
+        if self._event.is_set():
+            self._event.clear()
+            return True
+        return False
+
+
+def build_triggers(specs, headers):
+    """
+    設定からトリガーを作る（ホットキーは常に含める）
+    例: [{"type": "combo", "buttons": ["button4", "button5"]},
+         {"type": "stick", "axis": "axis1", "threshold": 0.9}]
+    """
+    axis_names = [h for h in headers if h.startswith("axis")]
+    button_names = [h for h in headers if h.startswith("button") or h.startswith("dpad_")]
+    triggers = [HotkeyTrigger()]
+    for spec in specs or []:
+        kind = spec.get("type")
+        if kind == "combo":
+            names = spec.get("buttons", [])
+            if names and all(n in button_names for n in names):
+                triggers.append(ComboTrigger(
+                    [button_names.index(n) for n in names], name=spec.get("name") or "+".join(names),
+                ))
+        elif kind == "stick":
+            axis = spec.get("axis", "axis0")
+            if axis in axis_names:
+                triggers.append(StickTrigger(
+                    axis_names.index(axis), float(spec.get("threshold", 0.9)), name=spec.get("name") or axis,
+                ))
+    return triggers
+
+
+class TriggerRecorder:
+    """
+    トリガー記録: サンプルは常にプリロールのリングに入れ、トリガー発火時だけ
+    「発火の pre_seconds 前〜最後の発火の post_seconds 後」をクリップとして書き出す
+    - リングは時間で古いものを捨て、max_rows を上限とする（待機中のメモリは一定）
+    - クリップの長さは max_clip_seconds で打ち切る
+    - 書き出しは保存キューに任せ、キャプチャスレッドでは行わない（プリロールのコピーやメタデータの計算も含む）
+    """
+    def __init__(self, logger_classes, log_dir, filename, triggers, save_queue,
+                 pre_seconds=5.0, post_seconds=5.0, max_clip_seconds=120.0, max_rows=200_000,
+                 metadata_func=None):
+        self.logger_classes = logger_classes
+        self.log_dir = log_dir
+        self.stem = os.path.splitext(filename)[0]
+        self.ext = os.path.splitext(logger_classes[0].default_filename)[1]
+        self.triggers = triggers
+        self.save_queue = save_queue
+        self.pre_ns = int(pre_seconds * 1e9)
+        self.post_ns = int(post_seconds * 1e9)
+        self.max_clip_ns = int(max_clip_seconds * 1e9)
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        # 保存時に付けるメタデータ（時計アンカーなど）を返す関数
+        self.metadata_func = metadata_func
+        self._ring = deque(maxlen=max_rows)
+        self._clip = None
+        self.fired = 0
+        self.clips = []
+        self.jobs = []
+
+    def fire(self, name="hotkey"):
+        for t in self.triggers:
+            if isinstance(t, HotkeyTrigger) and t.name == name:
+                t.fire()
+
+    def add(self, timestamp, axes, buttons, data):
+        clip = self._clip
+        if clip is not None:
+            clip["rows"].append(data)
+        else:
+            ring = self._ring
+            ring.append(data)
+            limit = timestamp - self.pre_ns
+            while ring[0]["timestamp"] < limit:
+                ring.popleft()
+
+        fired = None
+        for t in self.triggers:
+            if t.check(axes, buttons) and fired is None:
+                fired = t.name
+        if fired is not None:
+            self.fired += 1
+            if clip is None:
+                # プリロールはリングごと引き渡す（コピーせず、新しいリングに差し替える）
+                ring = self._ring
+                clip = self._clip = {"pre": ring, "rows": [], "start": ring[0]["timestamp"], "triggers": []}
+                self._ring = deque(maxlen=ring.maxlen)
+            clip["triggers"].append({"name": fired, "timestamp": timestamp})
+            clip["end"] = timestamp + self.post_ns
+
+        if clip is not None and (timestamp >= clip["end"] or timestamp - clip["start"] >= self.max_clip_ns):
+            self._finish()
+
+    def pending_count(self) -> int:
+        """メモリに保持している行数（プリロールのリングと書き出し中のクリップ）"""
+        clip = self._clip
+        n = len(self._ring)
+        if clip is not None:
+            n += len(clip["pre"]) + len(clip["rows"])
+        return n
+
+    def close(self):
+        """記録終了時: 書き出し中のクリップを保存する"""
+        if self._clip is not None:
+            self._finish()
+        self._ring.clear()
+
+    def _finish(self):
+        clip, self._clip = self._clip, None
+        filename = f"{self.stem}_clip{len(self.clips) + 1:03d}{self.ext}"
+        clip_meta = {
+            "pre_seconds": self.pre_seconds,
+            "post_seconds": self.post_seconds,
+            "triggers": clip["triggers"],
+        }
+        logger_classes, log_dir, metadata_func = self.logger_classes, self.log_dir, self.metadata_func
+
+        # 行の結合とメタデータの計算（遅延の分位点など）は保存キューで行う
+        def save(progress=None):
+            meta = dict(metadata_func() if metadata_func else {})
+            meta["clip"] = clip_meta
+            logger = MainLogger(logger_classes, log_dir=log_dir, filename=filename)
+            records = logger.logger.records
+            records.extend(clip["pre"])
+            records.extend(clip["rows"])
+            for k, v in meta.items():
+                logger.set_metadata(k, v)
+            logger.save(progress)
+
+        self.clips.append(os.path.join(log_dir, filename))
+        self.jobs.append(self.save_queue.submit(filename, save))
@@ -0,0 +1,43 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from loggers.adaptive_rate import AdaptiveRate
+
+MS = 1_000_000
+
+
+def test_switches_to_active_on_change_and_back_after_idle():
+    rate = AdaptiveRate(idle_interval=0.05, active_interval=0.002, idle_after=0.1, deadband=0.02)
+    assert rate.update(0, [0.0], [0]) == 0.002
+    # 不感帯以内の揺れは変化とみなさない
+    assert rate.update(50 * MS, [0.01], [0]) == 0.002
+    assert rate.update(100 * MS, [0.01], [0]) == 0.05
+    assert rate.update(110 * MS, [0.01], [1]) == 0.002
+    assert rate.rate_hz == pytest.approx(500.0)
+    assert rate.update(150 * MS, [0.5], [1]) == 0.002
+
+
+def test_rate_column_is_measured(tmp_path):
+    pytest.importorskip("pyarrow")
+    from loggers.logger_worker import LoggerWorker
+
+    path = os.path.join(tmp_path, "s.parquet")
+    worker = LoggerWorker(
+        path, interval=0.005, backend="synthetic", rollup_window=0,
+        adaptive={"idle_interval": 0.005, "active_interval": 0.005},
+    )
+    t = threading.Thread(target=worker.run)
+    t.start()
+    time.sleep(0.3)
+    worker.stop()
+    t.join(timeout=5)
+    df = pd.read_parquet(path)
+    assert "rate_hz" in df.columns and len(df) > 10
+    # 各行のレートは直前の行からの実測間隔（要求値の 200 Hz を上回らない）
+    dt = df["timestamp"].diff().to_numpy()[1:]
+    assert df["rate_hz"].to_numpy()[1:] == pytest.approx(1e9 / dt)
+    assert df["rate_hz"].iloc[1:].max() <= 200.0
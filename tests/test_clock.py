@@ -0,0 +1,44 @@
+import time
+
+import numpy as np
+import pytest
+
+from loggers.clock import SessionClock, to_epoch_seconds, to_relative_seconds
+
+
+def _meta(drift=()):
+    return {"clock_info": {
+        "anchor": {"mono_ns": 1_000_000_000, "wall_ns": 1_700_000_000_000_000_000},
+        "drift": [{"mono_ns": m, "drift_ns": d} for m, d in drift],
+    }}
+
+
+def test_epoch_conversion_uses_anchor_and_interpolates_drift():
+    ts = np.array([1_000_000_000, 3_000_000_000, 11_000_000_000], dtype=np.int64)
+    assert to_epoch_seconds(ts, _meta()).tolist() == pytest.approx([1.7e9, 1.7e9 + 2, 1.7e9 + 10])
+    # アンカーから 10 秒後に +1 ms ずれていた → 途中は線形補間
+    out = to_epoch_seconds(ts, _meta([(11_000_000_000, 1_000_000)]))
+    assert out[1] - (1.7e9 + 2) == pytest.approx(0.0002, abs=1e-6)
+    assert out[2] - (1.7e9 + 10) == pytest.approx(0.001, abs=1e-6)
+
+
+def test_legacy_and_unanchored_timestamps():
+    legacy = np.array([1.5e9, 1.5e9 + 0.25])
+    assert to_epoch_seconds(legacy, _meta()).tolist() == legacy.tolist()
+    ns = np.array([5_000_000_000, 5_500_000_000], dtype=np.int64)
+    assert to_epoch_seconds(ns).tolist() == [0.0, 0.5]
+    assert to_relative_seconds(ns).tolist() == [0.0, 0.5]
+    assert to_relative_seconds(np.zeros(0)).tolist() == []
+
+
+def test_session_clock_anchor_and_drift_schedule():
+    clock = SessionClock(drift_interval=60.0)
+    anchor = clock.anchor
+    assert anchor["uncertainty_ns"] >= 0
+    assert abs(anchor["wall_ns"] - time.time_ns()) < 5_000_000_000
+    clock.maybe_record_drift(anchor["mono_ns"] + 1)
+    assert clock.drift == []
+    clock.maybe_record_drift(anchor["mono_ns"] + 61_000_000_000)
+    assert len(clock.drift) == 1 and "drift_ns" in clock.drift[0]
+    meta = clock.metadata()
+    assert meta["timestamp_unit"] == "ns" and meta["anchor"] == anchor
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+pytest.importorskip("pyarrow")
+from analysis.csv_ingest import csv_schema, iter_csv_frames, read_csv_fast  # noqa: E402
+from analysis.ml_export import iter_chunks  # noqa: E402
+from analysis.query import LogQuery  # noqa: E402
+
+
+def _write(path, n=1000):
+    # 軸が整数だけでも推論に任せず float64 で読むこと
+    pd.DataFrame({
+        "timestamp": np.arange(n, dtype=np.int64) * 10_000_000,
+        "axis0": np.zeros(n, dtype=np.int64),
+        "button0": np.arange(n) % 2,
+        "dpad_up": np.zeros(n, dtype=np.int64),
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_csv_schema_from_header_and_first_row():
+    types = csv_schema(["timestamp", "axis0", "button0", "dpad_up", "note"], ["1.5", "0", "1", "0", "x"])
+    assert types == {"timestamp": pa.float64(), "axis0": pa.float64(), "button0": pa.int8(), "dpad_up": pa.int8()}
+    assert csv_schema(["timestamp"], ["123"])["timestamp"] == pa.int64()
+
+
+def test_read_csv_fast_preview_and_types(tmp_path):
+    path = _write(tmp_path / "s.csv")
+    df = read_csv_fast(path, nrows=5)
+    assert len(df) == 5
+    assert df["axis0"].dtype == np.float64
+    assert df["button0"].dtype == np.int8
+    assert df["timestamp"].dtype == np.int64
+
+
+def test_streamed_chunks_keep_schema(tmp_path):
+    path = _write(tmp_path / "s.csv", n=50_000)
+    frames = list(iter_csv_frames(path, ["timestamp", "axis0"], chunk_rows=1000))
+    assert len(frames) > 1
+    assert sum(len(f) for f in frames) == 50_000
+    assert all(f["axis0"].dtype == np.float64 for f in frames)
+    chunk = next(iter_chunks(path, ["button0", "missing"], chunk_rows=1000))
+    assert list(chunk.columns) == ["timestamp", "button0"]
+    assert chunk["button0"].dtype == np.int8
+
+
+def test_query_scans_csv_with_schema(tmp_path):
+    _write(tmp_path / "s.csv", n=10)
+    df = LogQuery(str(tmp_path), fmt="csv").to_pandas(columns=["axis0", "button0"])
+    assert df["axis0"].dtype == np.float64
+    assert df["button0"].dtype == np.int8
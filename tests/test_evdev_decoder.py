@@ -0,0 +1,155 @@
+import json
+import os
+import time
+
+import pytest
+
+evdev_reader = pytest.importorskip("evdev_reader")
+from evdev_reader import (  # noqa: E402
+    EVENT, EV_ABS, EV_KEY, EV_SYN, SYN_REPORT, SYN_DROPPED, ABS_HAT0X, ABS_HAT0Y,
+    EvdevCaps, EvdevDecoder, EvdevDumpReader, EvdevReader,
+)
+
+ABS_X, ABS_Y = 0x00, 0x01
+BTN_SOUTH, BTN_EAST = 0x130, 0x131
+
+
+def _caps():
+    return EvdevCaps(
+        "test pad",
+        {ABS_X: (0, 255), ABS_Y: (0, 255), ABS_HAT0X: (-1, 1), ABS_HAT0Y: (-1, 1)},
+        [BTN_SOUTH, BTN_EAST],
+    )
+
+
+def _ev(t_us, etype, code, value):
+    return EVENT.pack(t_us // 1_000_000, t_us % 1_000_000, etype, code, value)
+
+
+def _events():
+    return [
+        _ev(1000, EV_ABS, ABS_X, 255),
+        _ev(1000, EV_KEY, BTN_SOUTH, 1),
+        _ev(1000, EV_SYN, SYN_REPORT, 0),
+        _ev(2000, EV_ABS, ABS_HAT0Y, -1),
+        _ev(2000, EV_KEY, BTN_SOUTH, 0),
+        _ev(2000, EV_SYN, SYN_REPORT, 0),
+    ]
+
+
+def _write_dump(path, events):
+    with open(path, "wb") as f:
+        f.write(json.dumps({"caps": _caps().to_json()}).encode("utf-8") + b"\n")
+        f.write(b"".join(events))
+
+
+def test_caps_headers():
+    assert _caps().headers() == [
+        "timestamp", "axis0", "axis1", "button0", "button1",
+        "dpad_up", "dpad_down", "dpad_left", "dpad_right",
+    ]
+
+
+def test_decoder_commits_on_syn_report_across_split_reads():
+    dec = EvdevDecoder(_caps())
+    data = b"".join(_events())
+    # イベントの途中で分割しても SYN_REPORT 単位で確定する
+    assert dec.feed(data[:EVENT.size + 5]) == []
+    assert dec.snapshot() == ([0.0, 0.0], [0] * 6)
+    assert dec.feed(data[EVENT.size + 5:EVENT.size * 3]) == [1_000_000]
+    axes, buttons = dec.snapshot()
+    assert axes[0] == pytest.approx(1.0)
+    assert buttons == [1, 0, 0, 0, 0, 0]
+    assert dec.feed(data[EVENT.size * 3:]) == [2_000_000]
+    assert dec.snapshot()[1] == [0, 0, 1, 0, 0, 0]
+
+
+def test_decoder_drops_until_report_after_syn_dropped():
+    dec = EvdevDecoder(_caps())
+    data = b"".join([
+        _ev(1000, EV_SYN, SYN_DROPPED, 0),
+        _ev(1000, EV_KEY, BTN_EAST, 1),
+        _ev(1000, EV_SYN, SYN_REPORT, 0),
+    ])
+    assert dec.feed(data) == []
+    assert dec.need_resync
+    assert dec.dropped == 1
+    assert dec.snapshot()[1][:2] == [0, 0]
+
+
+def test_dump_reader_replays_one_report_per_read(tmp_path):
+    path = tmp_path / "pad.evdump"
+    _write_dump(path, _events())
+    reader = EvdevDumpReader(str(path), realtime=False)
+    assert reader.get_headers() == _caps().headers()
+
+    ts1, axes1, buttons1 = reader.read()
+    ts2, _, buttons2 = reader.read()
+    assert (ts1, ts2) == (1_000_000, 2_000_000)
+    assert axes1[0] == pytest.approx(1.0)
+    assert buttons1[:2] == [1, 0]
+    assert buttons2 == [0, 0, 1, 0, 0, 0]
+    assert reader.finished() and not reader.disconnected
+
+    # 出し切った後の読み取りで終わりを知らせる（時刻は単調増加のまま）
+    ts3, _, _ = reader.read()
+    assert reader.disconnected
+    assert ts3 > ts2
+
+
+def _pipe_reader():
+    """パイプを入力デバイスの代わりにした EvdevReader（ioctl を使わない部分の検証用）"""
+    r, w = os.pipe()
+    os.set_blocking(r, False)
+    reader = EvdevReader.__new__(EvdevReader)
+    reader.clock = time.perf_counter_ns
+    reader.fd = r
+    reader._poll = None
+    reader.kernel_clock = True
+    reader.disconnected = False
+    reader.decoder = EvdevDecoder(_caps())
+    reader.collect_events = True
+    reader._last_ts = 0
+    reader._reports = []
+    reader.last_events = []
+    reader.last_pump_ns = 0
+    reader.prev_pump_ns = 0
+    return reader, w
+
+
+def test_wait_keeps_sample_interval_and_buffers_reports():
+    reader, w = _pipe_reader()
+    try:
+        os.write(w, b"".join(_events()[:3]))
+        t0 = time.perf_counter()
+        # 入力が届いていても次のサンプルの時刻まで戻らない
+        assert reader.wait(0.05)
+        assert time.perf_counter() - t0 >= 0.045
+        os.write(w, b"".join(_events()[3:]))
+        ts, _, buttons = reader.read()
+        assert ts == 2_000_000
+        assert reader.last_events == [1_000_000, 2_000_000]
+        assert buttons == [0, 0, 1, 0, 0, 0]
+    finally:
+        reader.close()
+        os.close(w)
+
+
+def test_failed_open_releases_fd(tmp_path, monkeypatch):
+    # 通常のファイルには ioctl が使えない（grab で失敗する）
+    path = tmp_path / "not-a-device"
+    path.write_bytes(b"")
+    opened = []
+    real_open = os.open
+
+    def tracking_open(*args, **kwargs):
+        fd = real_open(*args, **kwargs)
+        opened.append(fd)
+        return fd
+
+    monkeypatch.setattr(os, "open", tracking_open)
+    with pytest.raises(OSError):
+        EvdevReader(str(path), grab=True)
+    assert len(opened) == 1
+    with pytest.raises(OSError):
+        os.fstat(opened[0])
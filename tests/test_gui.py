@@ -0,0 +1,146 @@
+import os
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+gui = pytest.importorskip("gui")
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def test_timeline_decimation_keeps_extremes(app):
+    plot = gui.TimelinePlot()
+    n = 1000
+    t = np.arange(n, dtype=np.float64)
+    axes = np.zeros((n, 1), dtype=np.float32)
+    axes[503, 0] = 1.0
+    axes[507, 0] = -1.0
+    buttons = np.zeros((n, 1), dtype=np.uint8)
+    buttons[250, 0] = 1
+    plot._ensure_buffers(100, 1, 1)
+    m = plot._decimate(t, axes, buttons, 100)
+    assert m == 100
+    # 間引いても1サンプルだけの極値・押下は残る
+    assert plot._amax[50, 0] == 1.0 and plot._amin[50, 0] == -1.0
+    assert plot._bmax[25, 0] == 1 and plot._bmax[:m, 0].sum() == 1
+    # 各列の時刻はバケットの最後のサンプル
+    assert plot._tcol[0] == 9.0 and plot._tcol[m - 1] == 999.0
+
+
+def test_controller_widget_states_and_antialias_hysteresis(app):
+    w = gui.ControllerWidget()
+    w.resize(600, 200)
+    w._layout()
+    states = w._element_states([1.0, 0.0, 0.0, 0.0, -1.0, 1.0], [1, 0, 0, 0, 0, 1])
+    assert states["ls"][0] > 0 and states["ls"][1] == 0
+    # トリガーは静止位置（-1.0）で 0、いっぱいで矩形の高さ
+    assert states["lt"] == 0 and states["rt"] == w._rects["rt"].height()
+    assert states["dpad"] == (False, False, False, True)
+    assert states[0] is True and states[11] is None
+
+    # 予算を超えるフレームが続いたときだけ画質を下げ、余裕が続けば戻す
+    w.FRAME_BUDGET = 0.0
+    for _ in range(w.DEGRADE_AFTER - 1):
+        w.grab()
+    assert w._antialias
+    w.grab()
+    assert not w._antialias
+    w.FRAME_BUDGET = 10.0
+    w.RESTORE_AFTER = 3
+    for _ in range(3):
+        w.grab()
+    assert w._antialias
+
+
+def test_session_panel_pauses_timers_in_background(app, tmp_path):
+    panel = gui.SessionListPanel()
+    try:
+        panel.set_directory(str(tmp_path))
+        panel._schedule_rescan()
+        panel.set_background(True)
+        assert not panel._rescan_timer.isActive() and not panel._thumb_timer.isActive()
+        # 非表示中の変更通知は再表示までためる
+        panel._schedule_rescan()
+        assert not panel._rescan_timer.isActive()
+        panel.set_background(False)
+        assert panel._rescan_timer.isActive()
+    finally:
+        panel.shutdown()
+
+
+def test_worker_skips_callbacks_when_detached(tmp_path):
+    from loggers.logger_worker import LoggerWorker
+
+    worker = LoggerWorker(str(tmp_path / "s.parquet"), interval=0.001, backend="synthetic", rollup_window=0)
+    worker.gui_attached = False
+    calls = []
+    ticks = []
+
+    def sleep(interval):
+        ticks.append(interval)
+        if len(ticks) >= 20:
+            worker.stop()
+
+    worker.run(status_callback=calls.append, update_callback=lambda a, b: calls.append("update"),
+               sleep_func=sleep)
+    # 記録中の定期ステータスと入力表示は送らない（終了の通知だけ）
+    assert calls == ["記録停止"]
+    assert (tmp_path / "s.parquet").exists()
+
+
+def test_scan_sessions_lists_only_session_files(tmp_path):
+    (tmp_path / "a.parquet").write_bytes(b"x")
+    (tmp_path / "b.csv").write_bytes(b"xy")
+    (tmp_path / "notes.txt").write_bytes(b"x")
+    (tmp_path / "sub.csv").mkdir()
+    entries = gui.scan_sessions(str(tmp_path))
+    assert sorted(entries) == ["a.parquet", "b.csv"]
+    assert entries["b.csv"][1] == 2
+
+
+def test_session_model_applies_diffs_newest_first(app):
+    model = gui.SessionListModel()
+    events = []
+    model.rowsInserted.connect(lambda _p, first, last: events.append(("insert", first)))
+    model.rowsRemoved.connect(lambda _p, first, last: events.append(("remove", first)))
+    model.dataChanged.connect(lambda a, b, roles=(): events.append(("change", a.row())))
+    model.modelReset.connect(lambda: events.append(("reset",)))
+
+    assert model.apply({"a.csv": (1, 1), "c.csv": (1, 1)}) == (["a.csv", "c.csv"], [], [])
+    assert [model.name_at(r) for r in range(model.rowCount())] == ["c.csv", "a.csv"]
+    events.clear()
+
+    added, removed, changed = model.apply({"b.csv": (1, 1), "c.csv": (2, 1)})
+    assert (added, removed, changed) == (["b.csv"], ["a.csv"], ["c.csv"])
+    assert [model.name_at(r) for r in range(model.rowCount())] == ["c.csv", "b.csv"]
+    assert model.row_of("b.csv") == 1 and model.row_of("a.csv") == -1
+    # 差分だけを通知する（リセットしない）
+    assert events == [("remove", 1), ("insert", 1), ("change", 0)]
+
+    # 大量の追加はまとめてリセットする
+    model.RESET_THRESHOLD = 2
+    events.clear()
+    model.apply({f"s{i}.csv": (1, 1) for i in range(5)})
+    assert events == [("reset",)]
+    assert model.rowCount() == 5 and model.name_at(0) == "s4.csv"
+
+
+def test_session_panel_reselects_after_reset(app, tmp_path):
+    for name in ("a.csv", "b.csv"):
+        (tmp_path / name).write_text("timestamp,axis0\n1.0,0.0\n", encoding="utf-8")
+    panel = gui.SessionListPanel()
+    try:
+        panel.set_directory(str(tmp_path))
+        panel.list.setCurrentIndex(panel.model.index(panel.model.row_of("a.csv")))
+        panel.model.RESET_THRESHOLD = 0
+        (tmp_path / "c.csv").write_text("timestamp,axis0\n1.0,0.0\n", encoding="utf-8")
+        panel.reload()
+        assert panel.model.rowCount() == 3
+        assert os.path.basename(panel._current_path()) == "a.csv"
+    finally:
+        panel.shutdown()
@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+from loggers.latency import LatencyEstimator, SyntheticInputSource
+
+
+def _run(source, seconds=0.6, poll=0.001):
+    est = LatencyEstimator(event_timestamps=source.event_timestamps)
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        ts, _, _ = source.read()
+        est.observe(ts, time.perf_counter_ns(), source.last_events, source.last_pump_ns, source.prev_pump_ns)
+        time.sleep(poll)
+    return est.summary()
+
+
+def test_synthetic_delay_is_recovered_from_event_timestamps():
+    source = SyntheticInputSource(toggle_interval=0.02, report_delay=0.005, jitter=0.0)
+    summary = _run(source)
+    assert summary["method"] == "event_timestamp"
+    assert summary["count"] >= 10 and summary["estimated"] == 0
+    # 遅延は report_delay ＋ ポーリング間隔（sleep の分解能ぶんの余裕を見る）以内
+    p50 = summary["event_to_stamp"]["p50_ms"]
+    assert 5.0 <= p50 < 5.0 + 5.0
+
+
+def test_missing_event_timestamps_are_labelled_estimated():
+    source = SyntheticInputSource(toggle_interval=0.02, report_delay=0.005, jitter=0.0, with_timestamps=False)
+    summary = _run(source)
+    assert summary["method"] == "pump_midpoint"
+    assert summary["exact"] == 0 and summary["estimated"] >= 10
+    # 中点推定は観測できた時刻の近くに寄るため、実際の遅延より小さく出る
+    assert summary["event_to_stamp"]["p50_ms"] < 5.0
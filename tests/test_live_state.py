@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from loggers.live_state import LatestState, SampleRing
+
+
+def test_latest_state_sequence_advances_per_publish():
+    state = LatestState()
+    assert state.read() == (0, (), ())
+    axes, buttons = [0.5], [1]
+    state.publish(axes, buttons)
+    state.publish([0.25], [0])
+    seq, a, b = state.read()
+    assert seq == 2 and a == [0.25] and b == [0]
+
+
+def _ring(capacity):
+    ring = SampleRing(capacity)
+    clock = iter(np.arange(0.0, 1000.0, 0.1))
+    ring._clock = lambda: next(clock)
+    return ring
+
+
+def test_sample_ring_window_is_time_ordered_after_wrap():
+    ring = _ring(16)
+    for i in range(40):
+        ring.append([float(i)], [i % 2])
+    t, axes, buttons = ring.window(1.05)
+    # 直近 1.05 秒（0.1 秒刻み）= 最後の11サンプル、リングの折り返しをまたいでも時系列順
+    assert axes[:, 0].tolist() == [float(i) for i in range(29, 40)]
+    assert np.all(np.diff(t) > 0)
+    assert buttons[-1, 0] == 1
+    # 容量より長い区間を求めても容量分まで
+    assert len(ring.window(100.0)[0]) == 16
+
+
+def test_sample_ring_empty():
+    assert SampleRing(4).window(1.0) is None
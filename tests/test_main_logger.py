@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+from loggers.csv_logger import CSVLogger  # noqa: E402
+from loggers.main_logger import MainLogger  # noqa: E402
+from loggers.metadata import read_metadata  # noqa: E402
+from loggers.parquet_logger import ParquetLogger  # noqa: E402
+
+
+def test_fan_out_writes_each_format_once(tmp_path):
+    logger = MainLogger([ParquetLogger, CSVLogger], log_dir=str(tmp_path), filename="s.parquet")
+    assert [os.path.basename(p) for p in logger.filepaths] == ["s.parquet", "s.csv"]
+    for i in range(5):
+        logger.log({"timestamp": i * 1_000_000, "axis0": i / 10, "button0": i % 2})
+    # 記録は共有（各形式で同じレコードを持つ）
+    assert logger.pending_count() == 5
+    assert all(lg.records is logger.logger.records for lg in logger.loggers)
+    logger.set_metadata("clock_info", {"timestamp_unit": "ns"})
+    progress = []
+    df = logger.save(progress.append)
+
+    assert len(df) == 5
+    assert progress and progress[-1] == pytest.approx(1.0)
+    parquet = pd.read_parquet(tmp_path / "s.parquet")
+    csv = pd.read_csv(tmp_path / "s.csv")
+    pd.testing.assert_frame_equal(parquet, csv, check_dtype=False)
+    # メタデータは Parquet に埋め込み、CSV はサイドカー
+    assert read_metadata(str(tmp_path / "s.parquet"))["clock_info"] == {"timestamp_unit": "ns"}
+    assert read_metadata(str(tmp_path / "s.csv"))["clock_info"] == {"timestamp_unit": "ns"}
+    assert not any(name.endswith(".part") for name in os.listdir(tmp_path))
+
+
+def test_error_in_one_format_is_raised(tmp_path, monkeypatch):
+    def broken(self, progress=None, df=None):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(CSVLogger, "save", broken)
+    logger = MainLogger([ParquetLogger, CSVLogger], log_dir=str(tmp_path), filename="s.parquet")
+    logger.log({"timestamp": 0, "axis0": 0.0})
+    with pytest.raises(OSError):
+        logger.save()
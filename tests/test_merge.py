@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+pytest.importorskip("pyarrow")
+from analysis import merge  # noqa: E402
+from analysis.merge import asof_indices, merge_sessions  # noqa: E402
+
+
+def _session(path, t, button=None):
+    df = pd.DataFrame({"timestamp": np.asarray(t, dtype=np.float64), "axis0": np.linspace(0, 1, len(t))})
+    df["button0"] = np.asarray(button if button is not None else np.zeros(len(t)), dtype=np.int8)
+    if str(path).endswith(".csv"):
+        df.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, index=False)
+    return str(path)
+
+
+def test_asof_indices_backward_and_nearest():
+    t = np.array([1.0, 2.0, 3.0])
+    idx, valid = asof_indices(np.array([0.5, 1.9, 3.05]), t, 0.2)
+    assert list(valid) == [False, False, True]
+    assert idx[2] == 2
+    idx, valid = asof_indices(np.array([1.9]), t, 0.2, direction="nearest")
+    assert idx[0] == 1 and valid[0]
+
+
+def test_merge_matches_and_keeps_button_type(tmp_path):
+    t = 1_700_000_000.0 + np.arange(100) * 0.01
+    a = _session(tmp_path / "a.parquet", t)
+    b = _session(tmp_path / "b.csv", t - 0.002, button=np.arange(100) % 2)
+    out = str(tmp_path / "m.parquet")
+    result = merge_sessions([a, b], out, tolerance=0.005, names=["p1", "p2"], chunk_rows=16)
+    assert result["rows"] == 100
+    assert result["match_rate"]["p2"] == pytest.approx(1.0)
+    table = pq.read_table(out)
+    assert str(table.schema.field("p2_button0").type) == "int8"
+    assert table.column("p2_button0").to_pylist()[1:4] == [1, 0, 1]
+
+
+def test_mixed_time_bases_need_offsets(tmp_path):
+    a = _session(tmp_path / "a.parquet", 1_700_000_000.0 + np.arange(10) * 0.01)
+    rel = pd.DataFrame({"timestamp": np.arange(10, dtype=np.int64) * 10_000_000, "axis0": 0.0})
+    rel.to_parquet(tmp_path / "b.parquet", index=False)
+    with pytest.raises(ValueError):
+        merge_sessions([a, str(tmp_path / "b.parquet")], str(tmp_path / "m.parquet"))
+
+
+def test_early_source_buffer_stays_bounded(tmp_path, monkeypatch):
+    # 比較対象のセッションが基準より大幅に早く始まっても、読んだ分をすべて抱え込まない
+    t0 = 1_700_000_000.0
+    a = _session(tmp_path / "a.parquet", t0 + 100 + np.arange(50) * 0.01)
+    b = _session(tmp_path / "b.parquet", t0 + np.arange(20_000) * 0.01)
+    peak = []
+    pull = merge._Source.pull
+
+    def tracking_pull(self):
+        ok = pull(self)
+        if self.prefix == "s1":
+            peak.append(len(self.t))
+        return ok
+
+    monkeypatch.setattr(merge._Source, "pull", tracking_pull)
+    result = merge_sessions([a, b], str(tmp_path / "m.parquet"), tolerance=0.005, chunk_rows=256)
+    assert result["match_rate"]["s1"] == pytest.approx(1.0)
+    assert max(peak) <= 2 * 256
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from loggers.metrics import LatencyHistogram, WorkerMetrics
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    h = LatencyHistogram()
+    for _ in range(98):
+        h.add(0.0004)
+    h.add(0.02)
+    h.add(0.3)
+    assert h.count == 100
+    assert h.percentile(50) == pytest.approx(500e-6)
+    assert h.percentile(99) == pytest.approx(25e-3)
+    # 最後のバケット（上限なし）は最大値で代用する
+    assert h.percentile(100) == pytest.approx(0.3)
+    assert h.to_dict()["max_ms"] == pytest.approx(300.0)
+
+
+def test_late_and_dropped_ticks():
+    m = WorkerMetrics(snapshot_interval=1e9)
+    m.reset(0.01)
+    for t in (0.0, 0.01, 0.02, 0.05, 0.06):
+        m.tick(t)
+    s = m.snapshot()
+    assert s["ticks"] == 5
+    # 0.02 → 0.05 は3周期分: 遅延1回、取りこぼし2回
+    assert s["late_ticks"] == 1
+    assert s["dropped_ticks"] == 2
+
+
+def test_export_jsonl_writes_history_and_current(tmp_path):
+    m = WorkerMetrics(snapshot_interval=0.5)
+    m.reset(0.01)
+    t = 0.0
+    while t < 2.0:
+        m.tick(t)
+        m.record(0.0001, 0.0002, 0.0003, 7)
+        t += 0.01
+    path = tmp_path / "s.metrics.jsonl"
+    m.export_jsonl(str(path))
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == len(m.history) + 1 >= 4
+    assert lines[-1]["buffer_depth"] == 7
+    assert lines[-1]["achieved_hz"] == pytest.approx(100.0, rel=0.05)
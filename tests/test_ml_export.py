@@ -0,0 +1,72 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+from analysis.ml_export import MANIFEST_NAME, Resampler, export_dataset, export_session  # noqa: E402
+
+
+def _frame(n=250, step=0.01, t0=1_700_000_000.0):
+    t = t0 + np.arange(n) * step
+    return pd.DataFrame({
+        "timestamp": t,
+        "axis0": np.linspace(-1.0, 1.0, n),
+        "button0": (np.arange(n) // 10 % 2).astype(np.int8),
+    })
+
+
+def test_resampler_interpolates_across_chunks():
+    r = Resampler(0.5)
+    t = np.array([0.0, 1.0])
+    gt, ga, gb = r.push(t, np.array([[0.0], [1.0]]), np.array([[0], [1]]))
+    assert gt.tolist() == [0.0, 0.5, 1.0]
+    assert ga[:, 0].tolist() == pytest.approx([0.0, 0.5, 1.0])
+    # ボタンは直前値を保持する
+    assert gb[:, 0].tolist() == [0, 0, 1]
+    # 次のチャンクは前の最終行から補間を続ける
+    gt, ga, gb = r.push(np.array([2.0]), np.array([[3.0]]), np.array([[0]]))
+    assert gt.tolist() == [1.5, 2.0]
+    assert ga[:, 0].tolist() == pytest.approx([2.0, 3.0])
+    assert gb[:, 0].tolist() == [1, 0]
+    # 格子の次の点に届かなければ何も返さない
+    assert r.push(np.array([2.2]), np.array([[0.0]]), np.array([[0]])) is None
+
+
+def test_export_session_windows_and_shards(tmp_path):
+    path = tmp_path / "a.parquet"
+    _frame().to_parquet(path, index=False)
+    out = tmp_path / "out"
+    out.mkdir()
+    entry = export_session(str(path), 0, str(out), ["axis0"], ["button0"], rate_hz=100.0,
+                           window=50, stride=25, shard_windows=3)
+    assert entry["samples"] == 250
+    # (250 - 50) // 25 + 1 = 9 窓を 3 窓ずつのシャードに
+    assert entry["windows"] == 9
+    assert [s["windows"] for s in entry["shards"]] == [3, 3, 3]
+    assert entry["epoch_start"] == pytest.approx(1_700_000_000.0)
+    with np.load(out / entry["shards"][0]["files"]) as z:
+        assert z["axes"].shape == (3, 50, 1) and z["axes"].dtype == np.float32
+        assert z["buttons"].shape == (3, 50, 1) and z["buttons"].dtype == np.uint8
+        assert z["start"].tolist() == pytest.approx([0.0, 0.25, 0.5])
+
+
+def test_export_dataset_writes_dual_format_sessions_once(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    _frame().to_parquet(logs / "a.parquet", index=False)
+    _frame().to_csv(logs / "a.csv", index=False)
+    _frame(n=120).to_parquet(logs / "b.parquet", index=False)
+    out = tmp_path / "dataset"
+
+    manifest = export_dataset(str(logs), str(out), rate_hz=100.0, window=100, workers=1)
+    assert sorted(e["session"] for e in manifest["sessions"]) == ["a.parquet", "b.parquet"]
+    assert manifest["axes"] == ["axis0"] and manifest["buttons"] == ["button0"]
+    assert manifest["windows"] == 2 + 1
+    with open(out / MANIFEST_NAME, encoding="utf-8") as f:
+        assert json.load(f)["windows"] == manifest["windows"]
+    for e in manifest["sessions"]:
+        for shard in e["shards"]:
+            assert os.path.exists(out / "shards" / shard["files"])
@@ -0,0 +1,36 @@
+import threading
+import time
+
+import pytest
+
+from loggers.profiler import PHASES, CaptureProfiler, PhaseRing
+
+
+def test_phase_ring_overwrites_oldest():
+    ring = PhaseRing(capacity=3)
+    for i in range(5):
+        ring.record(i, 0.0, 0.0, 0.0, 0.0)
+    assert [r[0] for r in ring.rows()] == [2.0, 3.0, 4.0]
+    summary = ring.summary()
+    assert set(summary) == set(PHASES)
+    assert summary["read"]["mean_ms"] == pytest.approx(3000.0)
+    assert summary["read"]["max_ms"] == pytest.approx(4000.0)
+
+
+def test_profiler_writes_companions(tmp_path):
+    prof = CaptureProfiler(capacity=16, sample_interval=0.001)
+    prof.start()
+    end = time.perf_counter() + 0.05
+    while time.perf_counter() < end:
+        prof.phases.record(0.001, 0.0, 0.0, 0.0, 0.0)
+    prof.stop()
+    prof.save(str(tmp_path / "session.parquet"))
+
+    csv = (tmp_path / "session.phases.csv").read_text(encoding="utf-8").splitlines()
+    assert csv[0] == ",".join(f"{p}_ms" for p in PHASES)
+    assert len(csv) == 17
+    folded = (tmp_path / "session.folded").read_text(encoding="utf-8").splitlines()
+    # サンプリングしたのは計測対象（このテストの）スレッドのスタック
+    assert folded and all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+    assert any("test_profiler_writes_companions" in line for line in folded)
+    assert prof.sampler.thread_id == threading.get_ident()
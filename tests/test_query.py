@@ -0,0 +1,50 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+from analysis.query import LogQuery  # noqa: E402
+
+T0 = datetime.datetime(2024, 1, 1).timestamp()
+
+
+def _frame(t0, n=10):
+    return pd.DataFrame({
+        "timestamp": [t0 + i * 0.01 for i in range(n)],
+        "axis0": [0.5] * n,
+        "button0": [1, 0] * (n // 2),
+    })
+
+
+def test_dual_format_session_is_counted_once(tmp_path):
+    df = _frame(T0)
+    df.to_parquet(tmp_path / "20240101_000000.parquet", index=False)
+    df.to_csv(tmp_path / "20240101_000000.csv", index=False)
+    _frame(T0 + 60).to_csv(tmp_path / "20240101_000100.csv", index=False)
+
+    q = LogQuery(str(tmp_path))
+    sessions = q.sessions()
+    assert [s.name for s in sessions] == ["20240101_000000", "20240101_000100"]
+    assert sessions[0].path.endswith(".parquet")
+
+    out = q.aggregate({"button0": "sum", "axis0": "count"})
+    assert list(out["button0_sum"]) == [5, 5]
+    assert list(out["axis0_count"]) == [10, 10]
+
+
+def test_format_filter_keeps_csv_copy(tmp_path):
+    df = _frame(T0)
+    df.to_parquet(tmp_path / "20240101_000000.parquet", index=False)
+    df.to_csv(tmp_path / "20240101_000000.csv", index=False)
+    sessions = LogQuery(str(tmp_path), fmt="csv").sessions()
+    assert [s.path.endswith(".csv") for s in sessions] == [True]
+
+
+def test_where_and_time_range(tmp_path):
+    _frame(T0).to_parquet(tmp_path / "20240101_000000.parquet", index=False)
+    q = LogQuery(str(tmp_path))
+    df = q.to_pandas(columns=["button0"], where=[("button0", "==", 1)])
+    assert len(df) == 5 and set(df["button0"]) == {1}
+    df = q.to_pandas(start=T0, end=T0 + 0.045)
+    assert len(df) == 5
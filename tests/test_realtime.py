@@ -0,0 +1,118 @@
+import gc
+
+import pytest
+
+from loggers.realtime import RealtimeGuard
+
+
+@pytest.fixture
+def restore_gc():
+    enabled = gc.isenabled()
+    threshold = gc.get_threshold()
+    yield
+    gc.set_threshold(*threshold)
+    if enabled:
+        gc.enable()
+    else:
+        gc.disable()
+
+
+def test_enter_disables_gc_and_exit_is_idempotent(restore_gc):
+    gc.enable()
+    guard = RealtimeGuard(priority="none")
+    guard.enter()
+    try:
+        assert not gc.isenabled()
+        assert guard._on_gc in gc.callbacks
+    finally:
+        guard.exit()
+    assert gc.isenabled()
+    assert guard._on_gc not in gc.callbacks
+    # 2回目の exit() は何もしない
+    guard.exit()
+    assert gc.isenabled()
+
+
+def test_exit_without_enter_leaves_gc_alone(restore_gc):
+    gc.disable()
+    RealtimeGuard(priority="none").exit()
+    assert not gc.isenabled()
+
+
+def test_exit_runs_undo_in_reverse_order():
+    guard = RealtimeGuard(gc_mode="auto", priority="none")
+    order = []
+    guard._undo.append(lambda: order.append("affinity"))
+    guard._undo.append(lambda: order.append("priority"))
+
+    def failing():
+        raise OSError("denied")
+
+    guard._undo.append(failing)
+    guard.exit()
+    assert order == ["priority", "affinity"]
+    assert guard._undo == []
+
+
+def test_idle_collects_only_after_interval_and_threshold(restore_gc):
+    guard = RealtimeGuard(collect_interval=1.0, priority="none")
+    guard.enter()
+    try:
+        gc.set_threshold(1, 0, 0)
+        garbage = [[] for _ in range(10)]
+        del garbage
+        # 間隔が来るまでは回収しない
+        guard.idle(guard._next_collect - 0.5)
+        assert guard.stats["gc_controlled_collections"] == 0
+        guard.idle(guard._next_collect)
+        assert guard.stats["gc_controlled_collections"] == 1
+        assert guard.stats["gc_collections_by_gen"] == [1, 0, 0]
+        assert guard.stats["gc_deferred"] == 1
+    finally:
+        guard.exit()
+
+
+def test_idle_escalates_to_older_generations(restore_gc, monkeypatch):
+    guard = RealtimeGuard(collect_interval=0.0, priority="none")
+    guard.enter()
+    try:
+        collected = []
+        monkeypatch.setattr(gc, "get_threshold", lambda: (10, 5, 5))
+        monkeypatch.setattr(gc, "get_count", lambda: (12, 6, 1))
+        monkeypatch.setattr(gc, "collect", lambda gen=2: collected.append(gen) or 0)
+        guard.idle(guard._next_collect)
+        monkeypatch.setattr(gc, "get_count", lambda: (12, 6, 7))
+        guard.idle(guard._next_collect)
+        monkeypatch.setattr(gc, "get_count", lambda: (3, 6, 7))
+        guard.idle(guard._next_collect)
+    finally:
+        monkeypatch.undo()
+        guard.exit()
+    assert collected == [1, 2]
+    report = guard.report()
+    assert report["gc_collections_by_gen"] == [0, 1, 1]
+    # report() は統計の写しを返す
+    report["gc_collections_by_gen"][0] = 99
+    assert guard.stats["gc_collections_by_gen"][0] == 0
+
+
+def test_off_mode_never_collects(restore_gc):
+    guard = RealtimeGuard(gc_mode="off", collect_interval=0.0, priority="none")
+    guard.enter()
+    try:
+        gc.set_threshold(1, 0, 0)
+        guard.idle(guard._next_collect + 10)
+        assert guard.stats["gc_controlled_collections"] == 0
+        assert not gc.isenabled()
+    finally:
+        guard.exit()
+
+
+def test_foreign_collections_are_counted(restore_gc):
+    guard = RealtimeGuard(priority="none")
+    guard.enter()
+    try:
+        gc.collect()
+    finally:
+        guard.exit()
+    assert guard.stats["gc_other_collections"] >= 1
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+from loggers.rollup import RollupAccumulator, axis_deflection  # noqa: E402
+
+HEADERS = ["timestamp", "axis0", "axis1", "axis2", "axis3", "axis4", "axis5", "button0"]
+REST = [0.0, 0.0, 0.0, 0.0, -1.0, -1.0]
+
+
+def test_axis_deflection_measures_triggers_from_rest():
+    assert axis_deflection([-0.5, 0.0, 0.0, 0.0, -1.0, 1.0]) == [0.5, 0.0, 0.0, 0.0, 0.0, 1.0]
+    d = axis_deflection(np.array([REST, [0.0, 0.0, 0.0, 0.0, 0.0, -1.0]], dtype=np.float32))
+    assert d[0].tolist() == [0.0] * 6
+    assert d[1, 4] == pytest.approx(0.5) and d[1, 5] == 0.0
+
+
+def test_released_triggers_are_not_active():
+    acc = RollupAccumulator(HEADERS, window=1.0)
+    for i in range(100):
+        acc.add(i * 10_000_000, REST, [0])
+    table = acc.to_table()
+    assert table.column("active_s").to_pylist() == [0.0]
+
+
+def test_presses_and_active_time_per_window():
+    acc = RollupAccumulator(HEADERS, window=1.0)
+    # 0.5 秒ごとに押下と解放、トリガーは2つ目の窓だけ引く
+    for i in range(200):
+        t = i * 10_000_000
+        axes = list(REST)
+        if i >= 100:
+            axes[5] = 1.0
+        acc.add(t, axes, [1 if (i // 50) % 2 else 0])
+    table = acc.to_table().to_pydict()
+    assert table["button0_presses"] == [1, 1]
+    assert table["samples"] == [100, 100]
+    assert table["active_s"][0] == pytest.approx(0.5)
+    assert table["active_s"][1] == pytest.approx(1.0)
+    assert table["axis5_max"] == [-1.0, 1.0]
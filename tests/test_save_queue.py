@@ -0,0 +1,66 @@
+import os
+import threading
+import time
+
+import pytest
+
+from loggers.save_queue import SaveQueue
+
+
+def test_jobs_run_in_order_and_report_progress():
+    queue = SaveQueue()
+    gate = threading.Event()
+    order = []
+
+    def slow(progress):
+        gate.wait(2.0)
+        progress(0.5)
+        order.append("a")
+
+    def failing(progress):
+        raise OSError("disk full")
+
+    a = queue.submit("a", slow)
+    b = queue.submit("b", failing)
+    c = queue.submit("c", lambda progress: order.append("c"))
+    # submit はすぐ戻り、ジョブは順番待ち
+    assert [j.name for j in queue.active_jobs()] == ["a", "b", "c"]
+    gate.set()
+    queue.wait()
+    assert order == ["a", "c"]
+    assert (a.state, a.progress) == ("done", 1.0)
+    assert b.state == "error" and isinstance(b.error, OSError)
+    assert c.state == "done" and queue.active_jobs() == []
+
+
+def test_history_is_trimmed():
+    queue = SaveQueue(history=2)
+    for i in range(5):
+        queue.submit(str(i), lambda progress: None)
+        queue.wait()
+    queue.submit("last", lambda progress: None)
+    queue.wait()
+    assert len(queue.jobs()) <= 3
+
+
+def test_worker_run_returns_before_save_finishes(tmp_path):
+    pytest.importorskip("pyarrow")
+    from loggers.logger_worker import LoggerWorker
+
+    queue = SaveQueue()
+    gate = threading.Event()
+    # 先に詰まったジョブがあっても記録の停止（run の終了）は待たされない
+    queue.submit("blocker", lambda progress: gate.wait(5.0))
+    path = os.path.join(tmp_path, "s.parquet")
+    worker = LoggerWorker(path, interval=0.002, backend="synthetic", save_queue=queue)
+    t = threading.Thread(target=worker.run)
+    t.start()
+    time.sleep(0.1)
+    worker.stop()
+    t.join(timeout=2.0)
+    assert not t.is_alive()
+    assert worker.save_job is not None and not worker.save_job.finished
+    assert not os.path.exists(path)
+    gate.set()
+    queue.wait()
+    assert worker.save_job.state == "done" and os.path.exists(path)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.sequence import (
+    DIRECTIONS, Pattern, SequenceMatcher, dpad_codes, event_stream, find_sequences, stick_dir_codes,
+)
+
+
+def _session(moves, dt=0.02):
+    """moves: (x, y, button0) の列"""
+    x, y, b = (np.array(v, dtype=float) for v in zip(*moves))
+    return pd.DataFrame({
+        "timestamp": np.arange(len(moves)) * dt,
+        "axis0": x, "axis1": y,
+        "button0": b.astype(np.int8), "button1": np.zeros(len(moves), dtype=np.int8),
+    })
+
+
+QCF = [(0, 0, 0), (0, 1, 0), (0.7, 0.7, 0), (1, 0, 0), (1, 0, 1), (0, 0, 0)]
+
+
+def test_stick_codes_match_scalar_rules():
+    gui = pytest.importorskip("gui")
+    rng = np.random.default_rng(0)
+    xs, ys = rng.uniform(-1, 1, 500), rng.uniform(-1, 1, 500)
+    codes = stick_dir_codes(xs, ys)
+    for x, y, c in zip(xs, ys, codes):
+        expected = gui.stick_dir(x, y)
+        assert (DIRECTIONS[c - 1] if c else None) == expected
+
+
+def test_dpad_prefers_diagonals():
+    codes = dpad_codes([1, 1, 0], [0, 0, 0], [0, 1, 0], [0, 0, 1])
+    assert [DIRECTIONS[c - 1] if c else None for c in codes] == ["↑", "↖", "→"]
+
+
+def test_event_stream_tokens():
+    stream = event_stream(_session(QCF))
+    assert stream.labels() == ["↓", "↘", "→", "Btn1"]
+    assert stream.samples.tolist() == [1, 2, 3, 4]
+
+
+def test_find_sequences_with_time_limits():
+    pats = [Pattern("↓↘→+Btn1", name="hadouken"), Pattern("→ Btn2")]
+    res = find_sequences(_session(QCF), pats)
+    assert res["pattern"].tolist() == ["hadouken"]
+    assert (res["start_row"].iloc[0], res["end_row"].iloc[0]) == (1, 4)
+    # 入力の間隔が max_gap を超えると一致しない
+    slow = find_sequences(_session(QCF, dt=0.5), [Pattern("↓↘→+Btn1", max_gap=0.25, max_span=5.0)])
+    assert slow.empty
+
+
+def test_overlapping_patterns_share_the_automaton():
+    matcher = SequenceMatcher([Pattern("↘→"), Pattern("↓↘→"), Pattern("→")], n_buttons=2)
+    res = matcher.find(event_stream(_session(QCF)))
+    assert set(res["pattern"]) == {"↓↘→", "→", "↘→"} and len(res) == 3
+    with pytest.raises(ValueError):
+        Pattern("  ")
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from analysis.session_reader import SessionReader
+
+N = 1000
+
+
+def _frame():
+    return pd.DataFrame({
+        "timestamp": np.arange(N, dtype=np.int64) * 10_000_000 + 123,
+        "axis0": np.linspace(-1, 1, N),
+        "button0": (np.arange(N) % 3 == 0).astype(np.int8),
+    })
+
+
+@pytest.fixture(params=["parquet", "csv"])
+def session(request, tmp_path, monkeypatch):
+    df = _frame()
+    path = tmp_path / f"s.{request.param}"
+    if request.param == "parquet":
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, row_group_size=128)
+    else:
+        monkeypatch.setattr(SessionReader, "CSV_CHUNK_ROWS", 100)
+        df.to_csv(path, index=False)
+    return str(path), df
+
+
+def test_seek_and_rows_across_chunks(session):
+    path, df = session
+    reader = SessionReader(path)
+    try:
+        assert reader.num_rows == N
+        assert reader.duration == pytest.approx(9.99)
+        assert len(reader.chunk_starts) > 1
+        assert reader.index_at(-1.0) == 0
+        assert reader.index_at(5.005) == 500
+        assert reader.index_at(100.0) == N - 1
+        # チャンクの境界の前後と、後ろから前へのシーク
+        for i in (0, 99, 100, 127, 128, 999, 3):
+            t, axes, buttons = reader.row(i)
+            assert t == pytest.approx(i * 0.01)
+            assert axes[0] == pytest.approx(df["axis0"][i], abs=1e-6)
+            assert buttons == [int(df["button0"][i])]
+    finally:
+        reader.close()
+
+
+def test_index_is_cached_per_file(session):
+    path, _ = session
+    SessionReader(path).close()
+    cache = path + ".index.npz"
+    assert os.path.exists(cache)
+    mtime = os.stat(cache).st_mtime_ns
+    reader = SessionReader(path)
+    try:
+        assert os.stat(cache).st_mtime_ns == mtime
+        assert reader.row(N - 1)[0] == pytest.approx(9.99)
+    finally:
+        reader.close()
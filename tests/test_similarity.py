@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+from analysis.similarity import FEATURE_DIM, FeatureIndex, extract_features  # noqa: E402
+
+
+def _frame(seed, n=400):
+    rng = np.random.default_rng(seed)
+    t = 1_700_000_000.0 + np.arange(n) * 0.01
+    return pd.DataFrame({
+        "timestamp": t,
+        "axis0": np.clip(rng.normal(0, 0.5, n), -1, 1),
+        "axis1": np.clip(rng.normal(0, 0.5, n), -1, 1),
+        "button0": (rng.random(n) < 0.3).astype(np.int8),
+    })
+
+
+def test_extract_features_shape():
+    v = extract_features(_frame(0))
+    assert v.shape == (FEATURE_DIM,) and v.dtype == np.float32
+
+
+def test_dual_format_indexed_once_and_excluded_from_own_hits(tmp_path):
+    _frame(1).to_parquet(tmp_path / "a.parquet", index=False)
+    _frame(1).to_csv(tmp_path / "a.csv", index=False)
+    _frame(2).to_parquet(tmp_path / "b.parquet", index=False)
+    _frame(3).to_parquet(tmp_path / "c.parquet", index=False)
+
+    index = FeatureIndex(str(tmp_path))
+    assert index.update(workers=1) == 3
+    assert sorted(index.names) == ["a.parquet", "b.parquet", "c.parquet"]
+    assert index.update(workers=1) == 0
+
+    # CSV 側で問い合わせても、同じセッション（a.parquet）は結果に出ない
+    hits = [name for name, _ in index.similar_to(os.path.join(tmp_path, "a.csv"), k=5)]
+    assert sorted(hits) == ["b.parquet", "c.parquet"]
@@ -0,0 +1,67 @@
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from loggers.telemetry import TelemetryPublisher, parse_address, schema_for, subscribe, unpack_buttons
+
+HEADERS = ["timestamp", "axis0", "axis1", "button0", "button1", "button2"]
+
+
+def test_schema_and_address_parsing(monkeypatch):
+    schema = schema_for(HEADERS)
+    assert (schema["n_axes"], schema["n_buttons"]) == (2, 3)
+    assert schema["record_format"] == "<q2f1B"
+    assert parse_address("tcp::8765") == (socket.AF_INET, ("127.0.0.1", 8765))
+    with pytest.raises(ValueError):
+        parse_address("tcp:10.0.0.1:8765")
+    monkeypatch.delattr(socket, "AF_UNIX", raising=False)
+    with pytest.raises(ValueError):
+        parse_address("unix:/tmp/x.sock")
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="UNIX ソケットがない環境")
+def test_batches_round_trip(tmp_path):
+    address = f"unix:{tmp_path / 'pad.sock'}"
+    pub = TelemetryPublisher(address, HEADERS, flush_interval=0.005)
+    pub.start()
+    received = []
+
+    def consume():
+        for schema, records, dropped in subscribe(address):
+            received.append((schema, records.copy(), dropped))
+            if sum(len(r) for _, r, _ in received) >= 3:
+                break
+
+    t = threading.Thread(target=consume, daemon=True)
+    t.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while pub.stats()["subscribers"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        for i in range(3):
+            pub.publish(1_000 + i, [0.5, -0.25], [1, 0, i % 2])
+        t.join(timeout=2.0)
+    finally:
+        pub.close()
+    assert not t.is_alive()
+    schema = received[0][0]
+    assert schema["headers"] == HEADERS
+    records = [r for _, batch, _ in received for r in batch]
+    assert [int(r["timestamp"]) for r in records] == [1_000, 1_001, 1_002]
+    assert records[0]["axes"].tolist() == [0.5, -0.25]
+    bits = unpack_buttons(np.array(records), 3)
+    assert bits.tolist() == [[1, 0, 0], [1, 0, 1], [1, 0, 0]]
+    assert all(dropped == 0 for _, _, dropped in received)
+
+
+def test_publish_during_flush_is_not_lost():
+    pub = TelemetryPublisher("tcp:127.0.0.1:0", HEADERS)
+    for i in range(5):
+        pub.publish(i, [0.0, 0.0], [0, 0, 0])
+    pub._flush()
+    pub.publish(5, [0.0, 0.0], [0, 0, 0])
+    # 購読者がいなければ取り出した分は捨てるが、後から追加した分はキューに残る
+    assert [s[0] for s in pub._pending] == [5]
@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from loggers.thumbnails import BUCKETS, ThumbnailCache, activity_profile, profile_from_frame, store_profile
+
+
+def _profile(value):
+    return np.full(BUCKETS, value, dtype=np.uint16), np.full(BUCKETS, value, dtype=np.uint8)
+
+
+def test_activity_profile_counts_rises_and_stick_rms():
+    t = np.arange(8, dtype=np.float64)
+    buttons = np.array([[0], [1], [1], [0], [1], [0], [0], [0]])
+    axes = np.zeros((8, 4))
+    axes[:, 2] = 1.0
+    presses, stick = activity_profile(t, axes, buttons, buckets=2)
+    # 押しっぱなしは1回、立ち上がりだけを数える
+    assert presses.tolist() == [1, 1]
+    # 右スティックの方が大きいのでそちらを使う
+    assert stick.tolist() == [255, 255]
+
+
+def test_activity_profile_handles_empty_and_constant_time():
+    presses, stick = activity_profile([], None, None)
+    assert presses.shape == (BUCKETS,) and not presses.any() and not stick.any()
+    presses, _ = activity_profile([5, 5, 5], np.zeros((3, 2)), np.array([[0], [1], [0]]), buckets=4)
+    assert presses.tolist() == [1, 0, 0, 0]
+
+
+def test_profile_from_frame_uses_axis_and_button_columns():
+    df = pd.DataFrame({
+        "timestamp": [0, 1, 2, 3],
+        "axis0": [0.0, 0.0, 0.0, 0.0],
+        "axis1": [0.5, 0.5, 0.5, 0.5],
+        "button0": [0, 1, 0, 1],
+        "dpad_up": [0, 0, 1, 1],
+    })
+    presses, stick = profile_from_frame(df, buckets=1)
+    assert presses.tolist() == [3]
+    assert stick.tolist() == [round(0.5 * 255)]
+
+
+def test_cache_rejects_stale_entries_and_merges_on_save(tmp_path):
+    (tmp_path / "a.csv").write_text("x", encoding="utf-8")
+    (tmp_path / "b.csv").write_text("x", encoding="utf-8")
+    first = ThumbnailCache(str(tmp_path))
+    second = ThumbnailCache(str(tmp_path))
+    first.put("a.csv", 1, 10, _profile(1))
+    assert first.dirty
+    first.save()
+    assert not first.dirty
+    # 別のインスタンスの保存はディスク上の内容と合流する
+    second.put("b.csv", 2, 20, _profile(2))
+    second.save()
+    assert second.get("a.csv", 1, 10)[0][0] == 1
+
+    fresh = ThumbnailCache(str(tmp_path))
+    assert fresh.get("a.csv", 1, 10) is not None and fresh.get("b.csv", 2, 20) is not None
+    # mtime・サイズが変わった項目は使わない
+    assert fresh.get("a.csv", 1, 11) is None and fresh.get("a.csv", 3, 10) is None
+
+
+def test_cache_drops_entries_of_removed_sessions(tmp_path):
+    (tmp_path / "a.csv").write_text("x", encoding="utf-8")
+    cache = ThumbnailCache(str(tmp_path))
+    cache.put("a.csv", 1, 1, _profile(1))
+    cache.put("gone.csv", 1, 1, _profile(1))
+    cache.save()
+    assert ThumbnailCache(str(tmp_path)).get("gone.csv", 1, 1) is None
+
+
+def test_cache_reload_picks_up_other_writers(tmp_path):
+    (tmp_path / "a.csv").write_text("x", encoding="utf-8")
+    reader = ThumbnailCache(str(tmp_path))
+    assert not reader.reload()
+    path = str(tmp_path / "a.csv")
+    store_profile([path], _profile(7))
+    assert reader.reload()
+    st = os.stat(path)
+    assert reader.get("a.csv", st.st_mtime_ns, st.st_size)[1][0] == 7
+    assert not reader.reload()
+
+
+def test_update_thumbnails_computes_only_missing(tmp_path):
+    pytest.importorskip("pyarrow")
+    from analysis.thumbnails import update_thumbnails
+
+    df = pd.DataFrame({"timestamp": np.arange(10) * 0.01, "axis0": 0.0, "button0": np.arange(10) % 2})
+    df.to_csv(tmp_path / "a.csv", index=False)
+    df.to_parquet(tmp_path / "b.parquet", index=False)
+    assert update_thumbnails(str(tmp_path), workers=1) == 2
+    assert update_thumbnails(str(tmp_path), workers=1) == 0
+    cache = ThumbnailCache(str(tmp_path))
+    st = os.stat(tmp_path / "a.csv")
+    assert cache.get("a.csv", st.st_mtime_ns, st.st_size)[0].sum() == 5
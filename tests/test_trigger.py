@@ -0,0 +1,66 @@
+import threading
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+from loggers.metadata import read_metadata  # noqa: E402
+from loggers.parquet_logger import ParquetLogger  # noqa: E402
+from loggers.save_queue import SaveQueue  # noqa: E402
+from loggers.trigger import ComboTrigger, HotkeyTrigger, TriggerRecorder  # noqa: E402
+
+MS = 1_000_000
+
+
+def _recorder(tmp_path, queue, threads):
+    def metadata():
+        threads.append(threading.current_thread().name)
+        return {"clock_info": {"anchor": None}}
+
+    return TriggerRecorder(
+        [ParquetLogger], str(tmp_path), "session.parquet", [HotkeyTrigger(), ComboTrigger([0])], queue,
+        pre_seconds=0.1, post_seconds=0.05, metadata_func=metadata,
+    )
+
+
+def _add(rec, i, button=0):
+    t = i * MS
+    rec.add(t, [0.0], [button], {"timestamp": t, "axis0": 0.0, "button0": button})
+
+
+def test_clip_keeps_pre_roll_and_post_roll(tmp_path):
+    queue, threads = SaveQueue(), []
+    rec = _recorder(tmp_path, queue, threads)
+    for i in range(500):
+        _add(rec, i)
+    # 待機中のリングはプリロールの長さだけ保持する
+    assert rec.pending_count() == 101
+    _add(rec, 500, button=1)
+    for i in range(501, 600):
+        _add(rec, i)
+    queue.wait()
+
+    assert rec.fired == 1
+    assert [j.state for j in rec.jobs] == ["done"]
+    df = pd.read_parquet(rec.clips[0])
+    assert df["timestamp"].iloc[0] == 400 * MS
+    assert df["timestamp"].iloc[-1] == 550 * MS
+    assert df["button0"].sum() == 1
+    meta = read_metadata(rec.clips[0])
+    assert meta["clip"]["triggers"] == [{"name": "combo", "timestamp": 500 * MS}]
+    # メタデータはキャプチャスレッドではなく保存キューで作る
+    assert threads == ["SaveQueue"]
+    assert rec.pending_count() <= 101
+
+
+def test_close_saves_open_clip(tmp_path):
+    queue, threads = SaveQueue(), []
+    rec = _recorder(tmp_path, queue, threads)
+    for i in range(10):
+        _add(rec, i)
+    rec.fire()
+    _add(rec, 10)
+    rec.close()
+    queue.wait()
+    assert len(rec.clips) == 1
+    assert len(pd.read_parquet(rec.clips[0])) == 11